@@ -5,9 +5,9 @@ EPUB & PDF to TXT Converter v1.0.0
 Entry point for the application
 """
 
+import multiprocessing
 import sys
 import os
-import tkinter as tk
 from pathlib import Path
 
 # Add src directory to Python path
@@ -15,12 +15,24 @@ src_path = Path(__file__).parent / "src"
 sys.path.insert(0, str(src_path))
 
 # Import from the modular structure
-from gui.main_window import MainWindow
 from utils import app_logger
 
 
 def main():
     """Main entry point"""
+    # Any arguments select a command-line command instead of the GUI
+    if len(sys.argv) > 1:
+        from cli import run_cli
+        return run_cli(sys.argv[1:])
+    
+    return run_gui()
+
+
+def run_gui():
+    """Start the GUI application"""
+    import tkinter as tk
+    from gui.main_window import MainWindow
+    
     logger = app_logger.get_logger()
     
     try:
@@ -59,4 +71,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # Lets the frozen executable start conversion worker processes
+    multiprocessing.freeze_support()
     sys.exit(main())
@@ -0,0 +1,59 @@
+"""
+Benchmark Script for layout-aware PDF extraction
+Compares plain and layout extraction time on the given PDF files
+"""
+
+import sys
+import time
+from pathlib import Path
+
+# Add src directory to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from core.pdf_processor import PdfProcessor
+
+# Layout mode may cost at most this multiple of plain mode
+MAX_SLOWDOWN = 1.5
+
+
+def time_extraction(processor, pdf_path, layout, repeat):
+    """Return the best wall time of several extraction runs"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        processor.extract_text(str(pdf_path), layout=layout)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def main():
+    """Run the benchmark"""
+    if len(sys.argv) < 2:
+        print("Usage: python scripts/benchmark_pdf_layout.py FILE.pdf [FILE.pdf ...] [--repeat N]")
+        return 1
+
+    args = sys.argv[1:]
+    repeat = 3
+    if '--repeat' in args:
+        index = args.index('--repeat')
+        repeat = int(args[index + 1])
+        del args[index:index + 2]
+
+    processor = PdfProcessor()
+    failed = False
+
+    for pdf_path in map(Path, args):
+        plain = time_extraction(processor, pdf_path, False, repeat)
+        layout = time_extraction(processor, pdf_path, True, repeat)
+        ratio = layout / plain if plain else 0.0
+        status = "✅" if ratio <= MAX_SLOWDOWN else "❌"
+        failed = failed or ratio > MAX_SLOWDOWN
+        print(f"{status} {pdf_path.name}: plain {plain:.3f}s, layout {layout:.3f}s ({ratio:.2f}x)")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,480 @@
+"""
+Regression Harness for EPUB and PDF extraction
+Generates a local corpus, converts it in every extraction mode, and checks the
+output against golden hashes and each mode's time and memory budget
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+# Add src directory to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+# Golden hashes and budgets, recorded with --update
+GOLDEN_FILE = Path(__file__).parent / "regression_golden.json"
+
+# Bump when the generated corpus changes, so old golden files are not compared against it
+CORPUS_VERSION = 2
+CORPUS_SEED = 1729
+
+# Content file size of the huge EPUB; above EpubProcessor's streaming threshold
+HUGE_MEMBER_BYTES = 10 * 1024 * 1024
+
+# Pages per draft/final cycle of the long PDF; the first half of each cycle is marked as draft
+DRAFT_PERIOD = 24
+
+# Budgets written by --update: the measured time and peak memory times these factors
+TIME_HEADROOM = 2.0
+MEMORY_HEADROOM = 1.5
+
+# Extraction modes: option overrides and the corpus files they apply to
+MODES = {
+    'default': ({}, ('pdf', 'epub')),
+    'pdf_layout': ({'pdf_layout': True}, ('pdf',)),
+    'strip_boilerplate': ({'strip_boilerplate': True}, ('pdf',)),
+    'low_memory': ({'low_memory': True}, ('pdf',)),
+    'epub_chapters': ({'epub_chapters': True}, ('epub',)),
+    'parallel': ({'max_workers': 2}, ('pdf', 'epub')),
+    # Without the huge EPUB the long PDF dominates the batch and is split into page chunks
+    'parallel_pdf_chunks': ({'max_workers': 2}, ('pdf',)),
+    # Header/footer stripping must keep the long PDF whole rather than judge each chunk on its own
+    'parallel_pdf_chunks_boilerplate': ({'max_workers': 2, 'strip_boilerplate': True}, ('pdf',)),
+}
+
+# Modes whose output must match another mode's, golden file or not
+EQUIVALENT_MODES = {'parallel': 'default', 'parallel_pdf_chunks': 'default',
+                    'parallel_pdf_chunks_boilerplate': 'strip_boilerplate'}
+
+# Varied enough that body lines do not look like running headers to the boilerplate filter
+WORDS = ("the committee report river village library market harbour council museum garden bridge school "
+         "railway station festival winter summer autumn spring morning evening history record survey "
+         "budget repair visitor member student teacher farmer merchant builder painter writer reader "
+         "opened closed visited repaired described measured counted recorded printed reviewed planned "
+         "early late quiet busy narrow wide ancient modern northern southern eastern western local "
+         "public private careful sudden steady rapid gentle bright heavy light small large several "
+         "many few every each other another between across beyond during after before without within "
+         "because although while until since whether yet still also often seldom always never again").split()
+CJK_TEXT = ("春眠不覺曉處處聞啼鳥夜來風雨聲花落知多少床前明月光疑是地上霜舉頭望明月低頭思故鄉"
+            "白日依山盡黃河入海流欲窮千里目更上一層樓圖書館的書籍與文字轉換測試")
+
+
+# ---------------------------------------------------------------- PDF writer
+
+def pdf_bytes(pages, cjk=False):
+    """Build a PDF whose pages hold (x, y, size, text) items, in Helvetica or a standard CJK font"""
+    objects = []
+
+    def add(body):
+        objects.append(body)
+        return len(objects)
+
+    if cjk:
+        # Adobe-CNS1 font that readers supply themselves, so nothing is embedded
+        descendant = add(b"<< /Type /Font /Subtype /CIDFontType0 /BaseFont /MSung-Light "
+                         b"/CIDSystemInfo << /Registry (Adobe) /Ordering (CNS1) /Supplement 4 >> "
+                         b"/FontDescriptor << /Type /FontDescriptor /FontName /MSung-Light /Flags 6 "
+                         b"/FontBBox [0 -200 1000 900] /ItalicAngle 0 /Ascent 880 /Descent -120 "
+                         b"/CapHeight 880 /StemV 93 >> /DW 1000 >>")
+        font = add(b"<< /Type /Font /Subtype /Type0 /BaseFont /MSung-Light /Encoding /UniCNS-UCS2-H "
+                   b"/DescendantFonts [%d 0 R] >>" % descendant)
+    else:
+        font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    pages_id = add(None)
+    kids = []
+    for items in pages:
+        stream = "BT\n"
+        for x, y, size, text in items:
+            if cjk:
+                shown = "<" + text.encode('utf-16-be').hex().upper() + ">"
+            else:
+                shown = "(" + text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ")"
+            stream += f"/F1 {size} Tf 1 0 0 1 {x} {y} Tm {shown} Tj\n"
+        data = (stream + "ET").encode('latin-1')
+        contents = add(b"<< /Length %d >>\nstream\n" % len(data) + data + b"\nendstream")
+        kids.append(add(b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 792] /Contents %d 0 R "
+                        b"/Resources << /Font << /F1 %d 0 R >> >> >>" % (pages_id, contents, font)))
+    objects[pages_id - 1] = (b"<< /Type /Pages /Kids [" + b" ".join(b"%d 0 R" % kid for kid in kids) +
+                             b"] /Count %d >>" % len(kids))
+    catalog = add(b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, catalog, xref)
+    return bytes(out)
+
+
+def sentence(rng, words=8):
+    """Return a pseudo-random sentence"""
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def two_column_pdf(rng, pages=8):
+    """Journal pages: running header, two columns of text, page number footer"""
+    result = []
+    for page in range(pages):
+        items = [(200, 760, 9, "Journal of Regression Testing, Volume 7")]
+        for column, x in enumerate((60, 320)):
+            for line in range(36):
+                items.append((x, 720 - line * 18, 10, f"C{column + 1}L{line + 1} " + sentence(rng, 5)))
+        items.append((300, 30, 9, str(page + 1)))
+        result.append(items)
+    return pdf_bytes(result)
+
+
+def many_pages_pdf(rng, pages=300):
+    """A long report of short single-column pages with a running header and page-number footer"""
+    result = []
+    for page in range(pages):
+        items = [(72, 760, 9, "Annual Report of the Regression Society")]
+        # Draft sections: whether this line is stripped depends on the pages around it, so
+        # judging page chunks on their own would change the output near chunk boundaries
+        if page % DRAFT_PERIOD < DRAFT_PERIOD // 2:
+            items.append((72, 745, 9, "Draft - not for circulation"))
+        items.append((72, 730, 14, f"Section {page + 1}"))
+        items += [(72, 690 - line * 20, 11, sentence(rng)) for line in range(6)]
+        items.append((290, 30, 9, f"Page {page + 1} of {pages}"))
+        result.append(items)
+    return pdf_bytes(result)
+
+
+def cjk_pdf(pages=12):
+    """Traditional Chinese pages"""
+    result = []
+    for page in range(pages):
+        items = []
+        for line in range(20):
+            start = (page * 20 + line) * 7 % len(CJK_TEXT)
+            items.append((72, 720 - line * 24, 14, (CJK_TEXT * 2)[start:start + 24]))
+        result.append(items)
+    return pdf_bytes(result, cjk=True)
+
+
+# --------------------------------------------------------------- EPUB writer
+
+def epub_bytes(items, toc=None, nav=False, extra=None):
+    """
+    Build an EPUB from (name, xhtml bytes) content files in reading order
+
+    toc holds (title, href) entries written as an NCX, or as an EPUB 3 nav
+    document when nav is set; extra holds further (name, bytes) members.
+    """
+    manifest = "".join(f'<item id="i{index}" href="{name}" media-type="application/xhtml+xml"/>'
+                       for index, (name, _) in enumerate(items))
+    spine = "".join(f'<itemref idref="i{index}"/>' for index in range(len(items)))
+    members = [("META-INF/container.xml",
+                b'<?xml version="1.0"?><container version="1.0" '
+                b'xmlns="urn:oasis:names:tc:opendocument:xmlns:container"><rootfiles>'
+                b'<rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/>'
+                b'</rootfiles></container>')]
+    spine_attributes = ""
+
+    if toc and nav:
+        links = "".join(f'<li><a href="{href}">{title}</a></li>' for title, href in toc)
+        manifest += '<item id="nav" href="nav.xhtml" media-type="application/xhtml+xml" properties="nav"/>'
+        members.append(("OEBPS/nav.xhtml", (
+            '<?xml version="1.0" encoding="utf-8"?><html xmlns="http://www.w3.org/1999/xhtml" '
+            'xmlns:epub="http://www.idpf.org/2007/ops"><body><nav epub:type="toc"><ol>'
+            f'{links}</ol></nav></body></html>').encode('utf-8')))
+    elif toc:
+        points = "".join(f'<navPoint id="p{index}"><navLabel><text>{title}</text></navLabel>'
+                         f'<content src="{href}"/></navPoint>' for index, (title, href) in enumerate(toc))
+        manifest += '<item id="ncx" href="toc.ncx" media-type="application/x-dtbncx+xml"/>'
+        spine_attributes = ' toc="ncx"'
+        members.append(("OEBPS/toc.ncx", (
+            '<?xml version="1.0" encoding="utf-8"?><ncx xmlns="http://www.daisy.org/z3986/2005/ncx/" '
+            f'version="2005-1"><navMap>{points}</navMap></ncx>').encode('utf-8')))
+
+    members.append(("OEBPS/content.opf", (
+        '<?xml version="1.0" encoding="utf-8"?><package xmlns="http://www.idpf.org/2007/opf" version="3.0">'
+        '<metadata xmlns:dc="http://purl.org/dc/elements/1.1/"><dc:title>Regression</dc:title></metadata>'
+        f'<manifest>{manifest}</manifest><spine{spine_attributes}>{spine}</spine></package>').encode('utf-8')))
+    members.extend((f"OEBPS/{name}", data) for name, data in items)
+    members.extend(extra or [])
+
+    buffer = _ZipBuffer()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        # Fixed timestamps keep the corpus byte-identical between runs
+        archive.writestr(zipfile.ZipInfo("mimetype", (1980, 1, 1, 0, 0, 0)), b"application/epub+zip")
+        for name, data in members:
+            info = zipfile.ZipInfo(name, (1980, 1, 1, 0, 0, 0))
+            info.compress_type = zipfile.ZIP_DEFLATED
+            archive.writestr(info, data)
+    return buffer.getvalue()
+
+
+class _ZipBuffer:
+    """Write-only in-memory file for zipfile"""
+
+    def __init__(self):
+        self._data = bytearray()
+
+    def write(self, data):
+        self._data += data
+        return len(data)
+
+    def tell(self):
+        return len(self._data)
+
+    def flush(self):
+        pass
+
+    def getvalue(self):
+        return bytes(self._data)
+
+
+def xhtml(body, title="", encoding='utf-8'):
+    """Wrap body markup in an XHTML document in the given encoding"""
+    return (f'<?xml version="1.0" encoding="{encoding}"?><html xmlns="http://www.w3.org/1999/xhtml">'
+            f'<head><title>{title}</title></head><body>{body}</body></html>').encode(encoding)
+
+
+def chapters_epub(rng):
+    """Novel with an NCX whose chapters start mid-file at anchors"""
+    items, toc = [], []
+    for index in range(6):
+        body = ""
+        for chapter in (2 * index + 1, 2 * index + 2):
+            toc.append((f"Chapter {chapter}", f"part{index + 1}.xhtml#ch{chapter}"))
+            body += f'<h2 id="ch{chapter}">Chapter {chapter}</h2>'
+            body += "".join(f"<p>{sentence(rng, 12)} {sentence(rng, 9)}</p>" for _ in range(25))
+        items.append((f"part{index + 1}.xhtml", xhtml(body, f"Part {index + 1}")))
+    return epub_bytes(items, toc)
+
+
+def cjk_epub():
+    """Traditional Chinese book with an EPUB 3 nav document and Big5-encoded content files"""
+    items, toc = [], []
+    for index in range(5):
+        paragraphs = "".join(f"<p>{(CJK_TEXT * 3)[line * 5:line * 5 + 40]}</p>" for line in range(30))
+        encoding = 'big5' if index % 2 else 'utf-8'
+        items.append((f"c{index + 1}.xhtml", xhtml(f"<h1>第{index + 1}章</h1>{paragraphs}", f"第{index + 1}章",
+                                                   encoding)))
+        toc.append((f"第{index + 1}章", f"c{index + 1}.xhtml"))
+    return epub_bytes(items, toc, nav=True)
+
+
+def huge_member_epub(rng):
+    """A whole book in one content file larger than HUGE_MEMBER_BYTES, with chapters at anchors"""
+    paragraphs = [f"<p>{sentence(rng, 14)} {sentence(rng, 10)} &amp; {sentence(rng, 6)}</p>" for _ in range(500)]
+    body, toc, size, chapter = [], [], 0, 0
+    while size < HUGE_MEMBER_BYTES:
+        if len(body) % 4000 == 0:
+            chapter += 1
+            toc.append((f"Chapter {chapter}", f"book.xhtml#c{chapter}"))
+            body.append(f'<h1 id="c{chapter}">Chapter {chapter}</h1>')
+        body.append(paragraphs[len(body) % len(paragraphs)])
+        size += len(body[-1])
+    return epub_bytes([("book.xhtml", xhtml("".join(body), "Book"))], toc)
+
+
+def image_pages_epub(rng):
+    """Comic whose pages only wrap an image, between a text title and afterword"""
+    items = [("title.xhtml", xhtml(f"<h1>Comic</h1><p>{sentence(rng)}</p>", "Title"))]
+    images = []
+    for page in range(120):
+        items.append((f"p{page + 1:03d}.xhtml",
+                      xhtml(f'<div><img src="img/p{page + 1:03d}.png" alt=""/></div>', f"Page {page + 1}")))
+        images.append((f"OEBPS/img/p{page + 1:03d}.png", b"\x89PNG\r\n\x1a\n" + bytes(64)))
+    items.append(("after.xhtml", xhtml(f"<h1>Afterword</h1><p>{sentence(rng, 20)}</p>", "Afterword")))
+    return epub_bytes(items, extra=images)
+
+
+def build_corpus(corpus_dir):
+    """Write the regression corpus, returning its files"""
+    rng = random.Random(CORPUS_SEED)
+    documents = {
+        "pdf/two_column.pdf": two_column_pdf(rng),
+        "pdf/many_pages.pdf": many_pages_pdf(rng),
+        "pdf/cjk.pdf": cjk_pdf(),
+        "epub/chapters.epub": chapters_epub(rng),
+        "epub/cjk.epub": cjk_epub(),
+        "epub/huge_member.epub": huge_member_epub(rng),
+        "epub/image_pages.epub": image_pages_epub(rng),
+    }
+    # An identical copy, converted once and shared
+    documents["copies/two_column_copy.pdf"] = documents["pdf/two_column.pdf"]
+
+    files = []
+    for name, data in documents.items():
+        path = corpus_dir / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+        files.append(path)
+    return files
+
+
+# ------------------------------------------------------------------- running
+
+def run_mode(name, corpus_dir, output_dir):
+    """Convert the corpus in one mode (runs in its own process) and measure it"""
+    from core.converter import DocumentToTxtConverter
+    from utils import app_logger
+    from utils.resources import get_peak_rss_bytes
+
+    app_logger.set_log_level('WARNING')
+    overrides, extensions = MODES[name]
+    inputs = [str(corpus_dir)] if len(extensions) > 1 else [str(corpus_dir / "**" / f"*.{extensions[0]}")]
+
+    converter = DocumentToTxtConverter()
+    job = converter.new_job(skip_existing=False, **overrides)
+    start = time.perf_counter()
+    converter.convert_batch(inputs, str(output_dir), job=job)
+    seconds = time.perf_counter() - start
+
+    statistics = job.get_statistics()
+    outputs = {}
+    for path in sorted(output_dir.rglob("*.txt")):
+        if path.name != "conversion_report.txt":
+            outputs[path.relative_to(output_dir).as_posix()] = hashlib.sha256(path.read_bytes()).hexdigest()
+    return {
+        'seconds': round(seconds, 3),
+        'peak_rss_mb': round(max(get_peak_rss_bytes(), statistics['peak_rss_bytes']) / (1024 * 1024), 1),
+        'failed': statistics['failed'],
+        'outputs': outputs
+    }
+
+
+def measure(name, corpus_dir, work_dir):
+    """Run a mode in a fresh process, so its time and peak memory are its own"""
+    output_dir = work_dir / name
+    result_file = work_dir / f"{name}.json"
+    subprocess.run([sys.executable, str(Path(__file__).resolve()), "--run-mode", name,
+                    "--corpus", str(corpus_dir), "--output", str(output_dir), "--result", str(result_file)],
+                   cwd=work_dir, check=True)
+    with open(result_file, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def check(result, golden, budget_scale):
+    """Compare a mode's result with its golden record; return the problems found"""
+    problems = []
+    if result['failed']:
+        problems.append(f"{result['failed']} files failed")
+    if golden is None:
+        return problems
+
+    expected = golden['outputs']
+    for output in sorted(set(expected) | set(result['outputs'])):
+        if output not in result['outputs']:
+            problems.append(f"{output} missing")
+        elif output not in expected:
+            problems.append(f"{output} not in golden record")
+        elif result['outputs'][output] != expected[output]:
+            problems.append(f"{output} changed")
+
+    if result['seconds'] > golden['max_seconds'] * budget_scale:
+        problems.append(f"{result['seconds']:.1f}s over budget of {golden['max_seconds'] * budget_scale:.1f}s")
+    if result['peak_rss_mb'] > golden['max_rss_mb'] * budget_scale:
+        problems.append(f"{result['peak_rss_mb']:.0f} MB over budget of {golden['max_rss_mb'] * budget_scale:.0f} MB")
+    return problems
+
+
+def main():
+    """Run the harness"""
+    parser = argparse.ArgumentParser(description="Check extraction output and speed against golden records")
+    parser.add_argument("--mode", action="append", choices=sorted(MODES),
+                        help="mode to run (repeatable; default: all)")
+    parser.add_argument("--golden", default=str(GOLDEN_FILE), help="golden file (default: %(default)s)")
+    parser.add_argument("--update", action="store_true",
+                        help="record the output hashes and budgets of the modes run in the golden file")
+    parser.add_argument("--budget-scale", type=float, default=1.0,
+                        help="multiply every budget, e.g. 2 on a machine twice as slow as the reference")
+    parser.add_argument("--keep", metavar="DIR", help="generate the corpus and outputs in DIR and keep them")
+    parser.add_argument("--run-mode", help=argparse.SUPPRESS)
+    parser.add_argument("--corpus", help=argparse.SUPPRESS)
+    parser.add_argument("--output", help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_mode:
+        result = run_mode(args.run_mode, Path(args.corpus), Path(args.output))
+        with open(args.result, 'w', encoding='utf-8') as f:
+            json.dump(result, f)
+        return 0
+
+    golden_path = Path(args.golden)
+    golden = {'corpus_version': CORPUS_VERSION, 'modes': {}}
+    if golden_path.exists():
+        with open(golden_path, 'r', encoding='utf-8') as f:
+            golden = json.load(f)
+        if golden.get('corpus_version') != CORPUS_VERSION and args.update:
+            golden['modes'] = {}
+        elif golden.get('corpus_version') != CORPUS_VERSION:
+            print(f"❌ {golden_path} was recorded for corpus version {golden.get('corpus_version')}, "
+                  f"not {CORPUS_VERSION}; rerun with --update")
+            return 1
+
+    work_dir = Path(args.keep) if args.keep else Path(tempfile.mkdtemp(prefix="regression_"))
+    try:
+        corpus_dir = work_dir / "corpus"
+        if corpus_dir.exists():
+            shutil.rmtree(corpus_dir)
+        files = build_corpus(corpus_dir)
+        print(f"Corpus: {len(files)} files in {corpus_dir}")
+
+        results = {}
+        failed = False
+        for name in args.mode or list(MODES):
+            if (work_dir / name).exists():
+                shutil.rmtree(work_dir / name)
+            results[name] = result = measure(name, corpus_dir, work_dir)
+
+            # Updating replaces the golden record, so only failures and equivalence are checked
+            record = None if args.update else golden['modes'].get(name)
+            problems = check(result, record, args.budget_scale)
+            if record is None and not args.update:
+                problems.append("no golden record (run with --update)")
+            reference = EQUIVALENT_MODES.get(name)
+            if reference in results and any(results[reference]['outputs'].get(output) != digest
+                                            for output, digest in result['outputs'].items()):
+                problems.append(f"output differs from {reference}")
+            if args.update:
+                golden['modes'][name] = {
+                    'max_seconds': math.ceil(result['seconds'] * TIME_HEADROOM * 10) / 10,
+                    'max_rss_mb': math.ceil(result['peak_rss_mb'] * MEMORY_HEADROOM),
+                    'outputs': result['outputs']
+                }
+
+            failed = failed or bool(problems)
+            status = "❌" if problems else "✅"
+            print(f"{status} {name}: {len(result['outputs'])} outputs, {result['seconds']:.1f}s, "
+                  f"{result['peak_rss_mb']:.0f} MB")
+            for problem in problems:
+                print(f"    {problem}")
+
+        if args.update and failed:
+            print(f"Golden records not written to {golden_path}")
+        elif args.update:
+            golden['corpus_version'] = CORPUS_VERSION
+            with open(golden_path, 'w', encoding='utf-8') as f:
+                json.dump(golden, f, indent=2, sort_keys=True)
+                f.write("\n")
+            print(f"Golden records written to {golden_path}")
+
+        return 1 if failed else 0
+
+    finally:
+        if not args.keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
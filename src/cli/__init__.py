@@ -0,0 +1,7 @@
+"""
+Command-line interface for EPUB & PDF to TXT Converter
+"""
+
+from .commands import run_cli
+
+__all__ = ['run_cli']
@@ -0,0 +1,279 @@
+"""
+Command-line commands for EPUB & PDF to TXT Converter
+"""
+
+import argparse
+from pathlib import Path
+from typing import List, Optional
+
+from config.settings import Settings
+from core.chunker import OUTPUT_FORMATS
+from core.converter import DocumentToTxtConverter
+from core.probe import DocumentProber, load_plan
+from core.profiling import PROFILE_MODES
+from core.search_index import SearchIndex, TOKENIZERS
+from core.selection import parse_page_range
+from core.watcher import FolderWatcher, DEFAULT_POLL_INTERVAL, DEFAULT_SETTLE_TIME
+from server.http_server import ConversionServer, DEFAULT_HOST, DEFAULT_PORT
+from utils import app_logger
+
+
+def create_converter(settings: Settings) -> DocumentToTxtConverter:
+    """
+    Create a converter configured from settings
+
+    Args:
+        settings: Application settings
+
+    Returns:
+        DocumentToTxtConverter: Configured converter
+    """
+    converter = DocumentToTxtConverter()
+    converter.preserve_structure = settings.get_preserve_structure()
+    converter.skip_existing = settings.get_skip_existing()
+    converter.pdf_layout = settings.get_pdf_layout()
+    converter.strip_boilerplate = settings.get_strip_boilerplate()
+    converter.low_memory = settings.get_low_memory()
+    converter.deduplicate = settings.get_deduplicate()
+    converter.output_encoding = settings.get_output_encoding()
+    converter.page_range = settings.get_parsed_page_range()
+    converter.max_chars = settings.get_max_chars() or None
+    converter.epub_chapters = settings.get_epub_chapters()
+    converter.max_workers = settings.get_effective_max_workers()
+    converter.profile = settings.get_profile()
+    converter.profile_top = settings.get_profile_top()
+    converter.profile_threshold = settings.get_profile_threshold()
+    converter.index_path = settings.get_index_path()
+    converter.index_tokenizer = settings.get_index_tokenizer()
+    converter.output_format = settings.get_output_format()
+    converter.chunk_size = settings.get_chunk_size()
+    converter.chunk_overlap = settings.get_chunk_overlap()
+    converter.chunk_sentences = settings.get_chunk_sentences()
+    converter.split_pages = settings.get_split_pages()
+    return converter
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command-line argument parser"""
+    parser = argparse.ArgumentParser(
+        prog='main.py',
+        description='EPUB & PDF to TXT Converter. Run without arguments to start the GUI.'
+    )
+    parser.add_argument('--config', default='config.json',
+                        help='settings file providing conversion options (default: config.json)')
+    parser.add_argument('--pages', metavar='RANGE',
+                        help="pages (PDF) or spine items (EPUB) to extract, e.g. '1-10' or '5-'; "
+                             "overrides page_range in the settings file")
+    parser.add_argument('--max-chars', type=int, metavar='N',
+                        help='stop extracting each document after N characters (0 for no limit); '
+                             'overrides max_chars in the settings file')
+    parser.add_argument('--epub-chapters', action='store_true', default=None,
+                        help='split EPUB text at the chapters of the table of contents instead of at content '
+                             'files, so search hits, JSONL chunks and split output refer to chapter titles')
+    parser.add_argument('--profile', choices=PROFILE_MODES,
+                        help='profile the slowest documents and save the profiles next to the report '
+                             "('sample' is cheap enough to leave on, 'cprofile' records exact call counts)")
+    parser.add_argument('--profile-top', type=int, metavar='N',
+                        help='keep the profiles of the N slowest documents (default: 5)')
+    parser.add_argument('--profile-threshold', type=float, metavar='SECONDS',
+                        help='also keep the profile of every document taking at least SECONDS')
+    subparsers = parser.add_subparsers(dest='command', metavar='COMMAND')
+    subparsers.required = True
+
+    convert_parser = subparsers.add_parser('convert', help='convert files or folders once')
+    convert_parser.add_argument('input', nargs='+',
+                                help='EPUB/PDF files, folders, glob patterns (quoted, e.g. "books/**/*.pdf") or '
+                                     '@file lists naming one input per line; several inputs are converted as one '
+                                     'batch with one worker pool and one report')
+    convert_parser.add_argument('output', help='output folder')
+    convert_parser.add_argument('--workers', type=int, metavar='N',
+                                help='worker processes for batch conversion; overrides max_workers in '
+                                     'the settings file (default 1, sequential; 0 for one per CPU core)')
+    convert_parser.add_argument('--plan', metavar='FILE',
+                                help='probe plan (from the probe command) whose size estimates order the work')
+    convert_parser.add_argument('--index', metavar='FILE',
+                                help='add the converted text to this full-text search index; overrides '
+                                     'index_path in the settings file (files skipped because their output '
+                                     'exists are not indexed)')
+    convert_parser.add_argument('--index-tokenizer', choices=TOKENIZERS,
+                                help="tokenizer of a new index: 'unicode61' matches words, 'trigram' matches "
+                                     'any text of 3 or more characters and suits Chinese and Japanese')
+    convert_parser.add_argument('--format', choices=OUTPUT_FORMATS,
+                                help="output format: 'txt', 'jsonl' with one JSON chunk per line for NLP "
+                                     "and embedding pipelines, or 'split' with a folder per document holding one "
+                                     'file per page range or EPUB chapter and an index.json; overrides '
+                                     'output_format in the settings file')
+    convert_parser.add_argument('--chunk-size', type=int, metavar='CHARS',
+                                help='maximum characters per JSONL chunk; overrides chunk_size in the settings file')
+    convert_parser.add_argument('--chunk-overlap', type=int, metavar='CHARS',
+                                help='characters repeated between consecutive JSONL chunks; overrides '
+                                     'chunk_overlap in the settings file')
+    convert_parser.add_argument('--split-pages', type=int, metavar='N',
+                                help='PDF pages per file of split output; overrides split_pages in the settings file')
+    convert_parser.set_defaults(handler=_run_convert)
+
+    probe_parser = subparsers.add_parser('probe', help='inspect files without converting them and write a JSON plan')
+    probe_parser.add_argument('input', help='EPUB/PDF file or folder')
+    probe_parser.add_argument('--output', metavar='FILE', default='conversion_plan.json',
+                              help='plan file to write (default: conversion_plan.json)')
+    probe_parser.add_argument('--workers', type=int, default=4, help='number of files probed at once (default: 4)')
+    probe_parser.set_defaults(handler=_run_probe)
+
+    search_parser = subparsers.add_parser('search', help='search the text of converted documents')
+    search_parser.add_argument('index', help='search index file (from convert --index)')
+    search_parser.add_argument('query', help="FTS5 query, e.g. 'whale', '\"white whale\"' or 'captain*'")
+    search_parser.add_argument('--limit', type=int, default=20, help='maximum number of hits (default: 20)')
+    search_parser.set_defaults(handler=_run_search)
+
+    watch_parser = subparsers.add_parser('watch', help='watch a folder and convert new or changed files')
+    watch_parser.add_argument('input', help='folder to watch')
+    watch_parser.add_argument('output', help='output folder')
+    watch_parser.add_argument('--interval', type=float, default=DEFAULT_POLL_INTERVAL,
+                              help=f'seconds between scans (default: {DEFAULT_POLL_INTERVAL})')
+    watch_parser.add_argument('--settle', type=float, default=DEFAULT_SETTLE_TIME,
+                              help='seconds a file must stay unchanged before it is converted '
+                                   f'(default: {DEFAULT_SETTLE_TIME})')
+    watch_parser.add_argument('--workers', type=int, default=2,
+                              help='number of concurrent conversions (default: 2)')
+    watch_parser.set_defaults(handler=_run_watch)
+
+    serve_parser = subparsers.add_parser('serve', help='run a local HTTP conversion service')
+    serve_parser.add_argument('--host', default=DEFAULT_HOST, help=f'interface to bind (default: {DEFAULT_HOST})')
+    serve_parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'TCP port (default: {DEFAULT_PORT})')
+    serve_parser.add_argument('--workers', type=int, default=4,
+                              help='maximum documents extracted at once, on threads sharing one converter (default: 4)')
+    serve_parser.add_argument('--root', action='append', default=[], metavar='FOLDER',
+                              help='folder whose files may be converted by path (repeatable); '
+                                   'without it only uploads are accepted')
+    serve_parser.set_defaults(handler=_run_serve)
+
+    return parser
+
+
+def run_cli(argv: Optional[List[str]] = None) -> int:
+    """
+    Run a command-line command
+
+    Args:
+        argv: Command-line arguments without the program name
+
+    Returns:
+        int: Process exit code
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    try:
+        parse_page_range(args.pages or '')
+    except ValueError as e:
+        parser.error(str(e))
+    return args.handler(args)
+
+
+def _load_settings(args: argparse.Namespace) -> Settings:
+    """Load the settings file and apply command-line overrides"""
+    settings = Settings(args.config)
+    if args.pages is not None:
+        settings.set_page_range(args.pages)
+    if args.max_chars is not None:
+        settings.set_max_chars(args.max_chars)
+    if args.epub_chapters is not None:
+        settings.set_epub_chapters(args.epub_chapters)
+    if args.profile is not None:
+        settings.set_profile(args.profile)
+    if args.profile_top is not None:
+        settings.set_profile_top(args.profile_top)
+    if args.profile_threshold is not None:
+        settings.set_profile_threshold(args.profile_threshold)
+    return settings
+
+
+def _run_convert(args: argparse.Namespace) -> int:
+    """Convert a single file, or every supported file of the folders, patterns and lists given"""
+    settings = _load_settings(args)
+    if args.workers is not None:
+        settings.set_max_workers(args.workers)
+    if args.index is not None:
+        settings.set_index_path(args.index)
+    if args.index_tokenizer is not None:
+        settings.set_index_tokenizer(args.index_tokenizer)
+    if args.format is not None:
+        settings.set_output_format(args.format)
+    if args.chunk_size is not None:
+        settings.set_chunk_size(args.chunk_size)
+    if args.chunk_overlap is not None:
+        settings.set_chunk_overlap(args.chunk_overlap)
+    if args.split_pages is not None:
+        settings.set_split_pages(args.split_pages)
+    converter = create_converter(settings)
+
+    if len(args.input) == 1 and Path(args.input[0]).is_file():
+        success = converter.convert_file(args.input[0], args.output)
+    else:
+        plan = load_plan(args.plan) if args.plan else None
+        success = converter.convert_batch(args.input, args.output, plan=plan)
+    return 0 if success else 1
+
+
+def _run_probe(args: argparse.Namespace) -> int:
+    """Probe files and save the conversion plan"""
+    prober = DocumentProber(max_workers=args.workers)
+    plan = prober.build_plan(args.input)
+    return 0 if prober.write_plan(plan, args.output) else 1
+
+
+def _run_search(args: argparse.Namespace) -> int:
+    """Print the segments of converted documents that match a query"""
+    if not Path(args.index).exists():
+        print(f"Search index not found: {args.index}")
+        return 1
+
+    index = SearchIndex(args.index)
+    try:
+        hits = index.search(args.query, args.limit)
+    except ValueError as e:
+        print(str(e))
+        return 1
+    finally:
+        index.close()
+
+    # Keep log lines written by the logging thread from interleaving with the results
+    app_logger.flush()
+    for hit in hits:
+        location = f"{hit.kind} {hit.index}" if hit.label == str(hit.index) else f"{hit.kind} {hit.index} ({hit.label})"
+        print(f"{hit.path} - {location}, characters {hit.start}-{hit.end} of {hit.output}")
+        print(f"    {' '.join(hit.snippet.split())}")
+    print(f"{len(hits)} hits")
+    return 0 if hits else 1
+
+
+def _run_watch(args: argparse.Namespace) -> int:
+    """Run the watch-folder loop until interrupted"""
+    settings = _load_settings(args)
+
+    watcher = FolderWatcher(
+        lambda: create_converter(settings),
+        args.input,
+        args.output,
+        poll_interval=args.interval,
+        settle_time=args.settle,
+        max_workers=args.workers,
+        preserve_structure=settings.get_preserve_structure(),
+        skip_existing=settings.get_skip_existing()
+    )
+
+    watcher.run()
+    return 0 if watcher.stats['failed'] == 0 else 1
+
+
+def _run_serve(args: argparse.Namespace) -> int:
+    """Run the HTTP conversion service until interrupted"""
+    settings = _load_settings(args)
+    server = ConversionServer(
+        create_converter(settings),
+        host=args.host,
+        port=args.port,
+        max_workers=args.workers,
+        allowed_roots=args.root
+    )
+    server.serve_forever()
+    return 0
@@ -3,10 +3,12 @@ Settings management for EPUB/PDF to TXT Converter
 """
 
 import json
+import os
 from pathlib import Path
-from typing import Any
+from typing import Any, List, Optional
 import logging
 
+from core.selection import PageRange, parse_page_range
 from utils import app_logger
 
 
@@ -25,10 +27,29 @@ class Settings:
             'language': 'en',
             'preserve_structure': True,
             'skip_existing': True,
+            'pdf_layout': False,
+            'strip_boilerplate': False,
+            'low_memory': False,
+            'deduplicate': True,
             'output_encoding': 'utf-8',
+            'page_range': '',
+            'max_chars': 0,
+            'epub_chapters': False,
+            'max_workers': 1,
+            'profile': '',
+            'profile_top': 5,
+            'profile_threshold': 0.0,
+            'index_path': '',
+            'index_tokenizer': 'unicode61',
+            'output_format': 'txt',
+            'chunk_size': 2000,
+            'chunk_overlap': 200,
+            'chunk_sentences': True,
+            'split_pages': 1,
             'log_level': 'INFO',
             'window_geometry': '600x500',
             'last_input_path': '',
+            'last_inputs': [],
             'last_output_path': ''
         }
     
@@ -89,6 +110,38 @@ class Settings:
         """Set skip existing files setting"""
         self.settings['skip_existing'] = skip
     
+    def get_pdf_layout(self) -> bool:
+        """Get layout-aware PDF extraction setting"""
+        return self.settings.get('pdf_layout', False)
+    
+    def set_pdf_layout(self, layout: bool):
+        """Set layout-aware PDF extraction setting"""
+        self.settings['pdf_layout'] = layout
+    
+    def get_strip_boilerplate(self) -> bool:
+        """Get repeated header/footer removal setting"""
+        return self.settings.get('strip_boilerplate', False)
+    
+    def set_strip_boilerplate(self, strip: bool):
+        """Set repeated header/footer removal setting"""
+        self.settings['strip_boilerplate'] = strip
+    
+    def get_low_memory(self) -> bool:
+        """Get low-memory PDF extraction setting"""
+        return self.settings.get('low_memory', False)
+    
+    def set_low_memory(self, low_memory: bool):
+        """Set low-memory PDF extraction setting"""
+        self.settings['low_memory'] = low_memory
+    
+    def get_deduplicate(self) -> bool:
+        """Get duplicate input detection setting"""
+        return self.settings.get('deduplicate', True)
+    
+    def set_deduplicate(self, deduplicate: bool):
+        """Set duplicate input detection setting"""
+        self.settings['deduplicate'] = deduplicate
+    
     def get_output_encoding(self) -> str:
         """Get output file encoding"""
         return self.settings.get('output_encoding', 'utf-8')
@@ -97,6 +150,131 @@ class Settings:
         """Set output file encoding"""
         self.settings['output_encoding'] = encoding
     
+    def get_page_range(self) -> str:
+        """Get pages (PDF) or spine items (EPUB) to extract, e.g. '1-10'; empty for all"""
+        return self.settings.get('page_range', '')
+    
+    def set_page_range(self, page_range: str):
+        """Set pages (PDF) or spine items (EPUB) to extract"""
+        self.settings['page_range'] = page_range
+    
+    def get_parsed_page_range(self) -> Optional[PageRange]:
+        """Get the page range as (first, last), or None for all or if the saved value is invalid"""
+        try:
+            return parse_page_range(self.get_page_range())
+        except ValueError as e:
+            # --pages is checked when parsing arguments; a bad value saved in the settings file is not
+            self.logger.warning(f"Ignoring page_range in the settings file: {str(e)}")
+            return None
+    
+    def get_max_chars(self) -> int:
+        """Get per-document character budget (0 for no limit)"""
+        return self.settings.get('max_chars', 0)
+    
+    def set_max_chars(self, max_chars: int):
+        """Set per-document character budget (0 for no limit)"""
+        self.settings['max_chars'] = max_chars
+    
+    def get_epub_chapters(self) -> bool:
+        """Get whether EPUB text is split at table-of-contents chapters instead of content files"""
+        return self.settings.get('epub_chapters', False)
+    
+    def set_epub_chapters(self, enabled: bool):
+        """Set whether EPUB text is split at table-of-contents chapters instead of content files"""
+        self.settings['epub_chapters'] = enabled
+    
+    def get_max_workers(self) -> int:
+        """Get number of worker processes for folder conversion (1 converts sequentially, 0 for one per CPU core)"""
+        return self.settings.get('max_workers', 1)
+    
+    def set_max_workers(self, max_workers: int):
+        """Set number of worker processes for folder conversion (1 converts sequentially, 0 for one per CPU core)"""
+        self.settings['max_workers'] = max_workers
+    
+    def get_effective_max_workers(self) -> int:
+        """Get number of worker processes to use, resolving an explicit 0 to the CPU count"""
+        return self.get_max_workers() or os.cpu_count() or 1
+    
+    def get_profile(self) -> str:
+        """Get profiling mode for slow documents ('sample', 'cprofile', or empty for none)"""
+        return self.settings.get('profile', '')
+    
+    def set_profile(self, mode: str):
+        """Set profiling mode for slow documents ('sample', 'cprofile', or empty for none)"""
+        self.settings['profile'] = mode
+    
+    def get_profile_top(self) -> int:
+        """Get number of slowest documents whose profiles are kept"""
+        return self.settings.get('profile_top', 5)
+    
+    def set_profile_top(self, top: int):
+        """Set number of slowest documents whose profiles are kept"""
+        self.settings['profile_top'] = top
+    
+    def get_profile_threshold(self) -> float:
+        """Get seconds above which every document's profile is kept (0 to disable)"""
+        return self.settings.get('profile_threshold', 0.0)
+    
+    def set_profile_threshold(self, seconds: float):
+        """Set seconds above which every document's profile is kept (0 to disable)"""
+        self.settings['profile_threshold'] = seconds
+    
+    def get_index_path(self) -> str:
+        """Get full-text search index file that converted documents are added to (empty for none)"""
+        return self.settings.get('index_path', '')
+    
+    def set_index_path(self, index_path: str):
+        """Set full-text search index file that converted documents are added to (empty for none)"""
+        self.settings['index_path'] = index_path
+    
+    def get_index_tokenizer(self) -> str:
+        """Get tokenizer of a new search index ('unicode61' or 'trigram')"""
+        return self.settings.get('index_tokenizer', 'unicode61')
+    
+    def set_index_tokenizer(self, tokenizer: str):
+        """Set tokenizer of a new search index ('unicode61' or 'trigram')"""
+        self.settings['index_tokenizer'] = tokenizer
+    
+    def get_output_format(self) -> str:
+        """Get output format ('txt', 'jsonl' or 'split')"""
+        return self.settings.get('output_format', 'txt')
+    
+    def set_output_format(self, output_format: str):
+        """Set output format ('txt', 'jsonl' or 'split')"""
+        self.settings['output_format'] = output_format
+    
+    def get_chunk_size(self) -> int:
+        """Get maximum characters per JSONL chunk"""
+        return self.settings.get('chunk_size', 2000)
+    
+    def set_chunk_size(self, size: int):
+        """Set maximum characters per JSONL chunk"""
+        self.settings['chunk_size'] = size
+    
+    def get_chunk_overlap(self) -> int:
+        """Get characters repeated between consecutive JSONL chunks"""
+        return self.settings.get('chunk_overlap', 200)
+    
+    def set_chunk_overlap(self, overlap: int):
+        """Set characters repeated between consecutive JSONL chunks"""
+        self.settings['chunk_overlap'] = overlap
+    
+    def get_chunk_sentences(self) -> bool:
+        """Get whether JSONL chunks end at sentence boundaries where possible"""
+        return self.settings.get('chunk_sentences', True)
+    
+    def set_chunk_sentences(self, enabled: bool):
+        """Set whether JSONL chunks end at sentence boundaries where possible"""
+        self.settings['chunk_sentences'] = enabled
+    
+    def get_split_pages(self) -> int:
+        """Get PDF pages per file of split output"""
+        return self.settings.get('split_pages', 1)
+    
+    def set_split_pages(self, pages: int):
+        """Set PDF pages per file of split output"""
+        self.settings['split_pages'] = pages
+    
     def get_log_level(self) -> str:
         """Get logging level"""
         return self.settings.get('log_level', 'INFO')
@@ -121,6 +299,14 @@ class Settings:
         """Set last used input path"""
         self.settings['last_input_path'] = path
     
+    def get_last_inputs(self) -> List[str]:
+        """Get the input list of the last batch conversion"""
+        return list(self.settings.get('last_inputs', []))
+    
+    def set_last_inputs(self, inputs: List[str]):
+        """Set the input list of the last batch conversion"""
+        self.settings['last_inputs'] = list(inputs)
+    
     def get_last_output_path(self) -> str:
         """Get last used output path"""
         return self.settings.get('last_output_path', '')
@@ -2,8 +2,15 @@
 Core conversion modules for EPUB & PDF to TXT Converter
 """
 
+from .async_converter import AsyncDocumentConverter, ConversionEvent
 from .converter import DocumentToTxtConverter
 from .epub_processor import EpubProcessor
+from .job import ConversionJob, ConversionOptions
 from .pdf_processor import PdfProcessor
+from .probe import DocumentProber
+from .search_index import SearchHit, SearchIndex
+from .watcher import FolderWatcher
 
-__all__ = ['DocumentToTxtConverter', 'EpubProcessor', 'PdfProcessor']
+__all__ = ['DocumentToTxtConverter', 'EpubProcessor', 'PdfProcessor', 'FolderWatcher',
+           'AsyncDocumentConverter', 'ConversionEvent', 'DocumentProber', 'ConversionJob',
+           'ConversionOptions', 'SearchIndex', 'SearchHit']
@@ -0,0 +1,208 @@
+"""
+asyncio facade for embedding the converter in async applications
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import AsyncIterator, Callable, List, NamedTuple, Optional
+
+from utils import app_logger
+from .converter import DocumentToTxtConverter
+from .text_segment import TextSegment, join_text
+
+
+# Events buffered between an extraction thread and a slow consumer
+DEFAULT_QUEUE_SIZE = 16
+
+_END = object()
+
+
+class ConversionEvent(NamedTuple):
+    """Item produced by AsyncDocumentConverter.iter_events"""
+
+    # 'progress' or 'text'
+    kind: str
+    # Progress percentage (progress events)
+    progress: int = 0
+    # Progress message (progress events)
+    message: str = ''
+    # Extracted text (text events)
+    segment: Optional[TextSegment] = None
+
+
+class AsyncDocumentConverter:
+    """Runs conversions on a shared thread pool without blocking the event loop"""
+
+    def __init__(self, converter_factory: Callable[[], DocumentToTxtConverter] = DocumentToTxtConverter,
+                 max_concurrency: int = 4, executor: Optional[Executor] = None,
+                 queue_size: int = DEFAULT_QUEUE_SIZE):
+        """
+        Args:
+            converter_factory: Creates the configured converter shared by all worker threads
+            max_concurrency: Maximum number of conversions running at once
+            executor: Optional thread pool to run conversions on; by default one
+                      with max_concurrency threads is created and owned
+            queue_size: Events buffered per iter_events() call before the
+                        extraction thread waits for the consumer
+        """
+        self.logger = app_logger.get_logger()
+        self.converter = converter_factory()
+        self.max_concurrency = max(1, max_concurrency)
+        self.queue_size = max(1, queue_size)
+
+        self._owns_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(max_workers=self.max_concurrency,
+                                                        thread_name_prefix='async-converter')
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def convert_file(self, input_path: str, output_dir: str,
+                           progress_callback: Optional[Callable[[int, str], None]] = None) -> bool:
+        """
+        Convert a single file to TXT format
+
+        Args:
+            input_path: Path to input file
+            output_dir: Output directory
+            progress_callback: Optional progress callback, called on the event loop thread
+
+        Returns:
+            bool: True if successful
+        """
+        return await self._run(lambda converter, callback: converter.convert_file(input_path, output_dir, callback),
+                               progress_callback)
+
+    async def convert_directory(self, input_dir: str, output_dir: str,
+                                progress_callback: Optional[Callable[[int, str], None]] = None) -> bool:
+        """
+        Convert all supported files in a directory
+
+        Args:
+            input_dir: Input directory
+            output_dir: Output directory
+            progress_callback: Optional progress callback, called on the event loop thread
+
+        Returns:
+            bool: True if at least one file was converted successfully
+        """
+        return await self._run(lambda converter, callback: converter.convert_directory(input_dir, output_dir, callback),
+                               progress_callback)
+
+    async def convert_batch(self, inputs: List[str], output_dir: str,
+                            progress_callback: Optional[Callable[[int, str], None]] = None) -> bool:
+        """
+        Convert the supported files of several folders, files, glob patterns and file lists as one batch
+
+        Args:
+            inputs: Folders, files, glob patterns and file lists ('@list.txt')
+            output_dir: Output directory
+            progress_callback: Optional progress callback, called on the event loop thread
+
+        Returns:
+            bool: True if at least one file was converted successfully
+        """
+        return await self._run(lambda converter, callback: converter.convert_batch(inputs, output_dir, callback),
+                               progress_callback)
+
+    async def iter_events(self, input_path: str) -> AsyncIterator[ConversionEvent]:
+        """
+        Stream progress events and text segments of a file as it is extracted
+
+        Extraction pauses while queue_size events are waiting to be consumed,
+        and stops when the consumer stops iterating.
+
+        Args:
+            input_path: Path to an EPUB or PDF file
+
+        Returns:
+            AsyncIterator[ConversionEvent]: Events in extraction order
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        cancelled = threading.Event()
+
+        def put(item) -> bool:
+            """Hand an item to the consumer, waiting while the queue is full"""
+            if cancelled.is_set():
+                return False
+            asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+            return not cancelled.is_set()
+
+        def produce():
+            segments = None
+            try:
+                def on_progress(progress: int, message: str):
+                    put(ConversionEvent('progress', progress, message))
+
+                segments = self.converter.iter_segments(input_path, on_progress)
+                for segment in segments:
+                    if not put(ConversionEvent('text', segment=segment)):
+                        break
+            except BaseException as e:
+                put(e)
+            finally:
+                if segments is not None:
+                    segments.close()
+                put(_END)
+
+        async with self._limit():
+            producer = loop.run_in_executor(self._executor, produce)
+            try:
+                while True:
+                    item = await queue.get()
+                    if item is _END:
+                        break
+                    if isinstance(item, BaseException):
+                        raise item
+                    yield item
+            finally:
+                # Unblock a producer waiting on a full queue and let it wind down
+                cancelled.set()
+                while not producer.done():
+                    while not queue.empty():
+                        queue.get_nowait()
+                    await asyncio.sleep(0.01)
+
+    async def extract_text(self, input_path: str) -> str:
+        """
+        Extract the full text of a file without writing output
+
+        Args:
+            input_path: Path to an EPUB or PDF file
+
+        Returns:
+            str: Extracted text, empty if nothing could be extracted
+        """
+        segments = [event.segment async for event in self.iter_events(input_path) if event.kind == 'text']
+        return join_text(segments)
+
+    def close(self):
+        """Shut down the executor if this facade created it"""
+        if self._owns_executor:
+            self._executor.shutdown(wait=True)
+
+    async def __aenter__(self) -> 'AsyncDocumentConverter':
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if self._owns_executor:
+            await asyncio.get_running_loop().run_in_executor(None, self.close)
+
+    def _limit(self) -> asyncio.Semaphore:
+        """Get the concurrency limiter, created on first use inside the running loop"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def _run(self, call, progress_callback: Optional[Callable[[int, str], None]]):
+        """Run a blocking converter call on the executor within the concurrency limit"""
+        loop = asyncio.get_running_loop()
+
+        def report_progress(progress: int, message: str):
+            loop.call_soon_threadsafe(progress_callback, progress, message)
+
+        # Progress is reported from the worker thread, so it is handed back to the loop
+        callback = report_progress if progress_callback is not None else None
+
+        async with self._limit():
+            return await loop.run_in_executor(self._executor, lambda: call(self.converter, callback))
@@ -0,0 +1,199 @@
+"""
+Discovery of a batch's input files from folders, files, glob patterns and file lists
+"""
+
+import glob
+import os
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Set
+
+from utils import app_logger
+
+
+# Extensions of the files a batch converts
+SUPPORTED_EXTENSIONS = ('.epub', '.pdf')
+
+# Prefix marking an input as a file list, e.g. '@sources.txt'
+INPUT_LIST_PREFIX = '@'
+
+
+class BatchInput(NamedTuple):
+    """A supported file found for a batch, and the tree it was found in"""
+
+    path: Path
+    # Folder the file's place in the output tree is taken relative to
+    root: Path
+    # Subfolder of the output folder holding the file's tree ('' for none)
+    prefix: str = ''
+
+
+def read_input_list(list_file: str) -> List[str]:
+    """
+    Read a file list: one folder, file or glob pattern per line
+
+    Blank lines and lines starting with '#' are ignored, and relative paths,
+    including those of nested lists ('@other.txt'), are taken relative to the
+    list's folder.
+
+    Args:
+        list_file: UTF-8 text file
+
+    Returns:
+        List[str]: Inputs in the list's order
+
+    Raises:
+        OSError: If the list cannot be read
+    """
+    base = os.path.dirname(os.path.abspath(list_file))
+    inputs = []
+    with open(list_file, 'r', encoding='utf-8-sig') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            # Nested lists keep their '@' so expand_inputs() reads them too
+            prefix = INPUT_LIST_PREFIX if line.startswith(INPUT_LIST_PREFIX) else ''
+            inputs.append(prefix + os.path.join(base, os.path.expanduser(line[len(prefix):])))
+    return inputs
+
+
+def find_supported_files(directory: Path) -> List[Path]:
+    """
+    Find the supported files in a folder and its subfolders
+
+    Args:
+        directory: Folder to search
+
+    Returns:
+        List[Path]: Files, sorted
+    """
+    return sorted(file_path for file_path in directory.rglob('*')
+                  if file_path.suffix.lower() in SUPPORTED_EXTENSIONS and file_path.is_file())
+
+
+def expand_inputs(inputs: Iterable[str]) -> List[str]:
+    """
+    Replace file lists ('@list.txt') with the inputs they name, recursively
+
+    Each list is read once; a list naming itself, directly or through other
+    lists, or named again later, is skipped with a warning.
+
+    Args:
+        inputs: Folders, files, glob patterns and file lists
+
+    Returns:
+        List[str]: Folders, files and glob patterns
+    """
+    return _expand_inputs(inputs, set())
+
+
+def _expand_inputs(inputs: Iterable[str], visited: Set[str]) -> List[str]:
+    """Expand file lists, skipping those whose resolved path is in visited"""
+    logger = app_logger.get_logger()
+    expanded = []
+    for item in inputs:
+        if not item.startswith(INPUT_LIST_PREFIX):
+            expanded.append(item)
+            continue
+        list_file = item[len(INPUT_LIST_PREFIX):]
+        key = os.path.normcase(os.path.realpath(list_file))
+        if key in visited:
+            logger.warning(f"Skipping input list {list_file}: it was already read")
+            continue
+        visited.add(key)
+        try:
+            expanded.extend(_expand_inputs(read_input_list(list_file), visited))
+        except (OSError, UnicodeDecodeError) as e:
+            logger.warning(f"Could not read input list {list_file}: {str(e)}")
+    return expanded
+
+
+def iter_batch_inputs(inputs: Iterable[str]) -> Iterator[BatchInput]:
+    """
+    Discover the supported files of a batch, in input order
+
+    Folders are searched recursively and glob patterns ('books/**/*.pdf')
+    are expanded, folders they match included. An input naming an existing
+    folder or file is taken literally even if it contains wildcard
+    characters, as in '[Author] Title'. A file reached through several
+    inputs is yielded once. Files keep their place in the tree of
+    the folder, or the pattern's fixed leading folder, they were found in.
+    With more than one such tree, each goes in a subfolder named after its
+    folder so trees cannot overwrite each other. Files named directly go
+    in the output folder itself.
+
+    Args:
+        inputs: Folders, files, glob patterns and file lists ('@list.txt')
+
+    Returns:
+        Iterator[BatchInput]: Supported files with their trees
+    """
+    logger = app_logger.get_logger()
+    inputs = expand_inputs(inputs)
+    trees = [item for item in inputs if os.path.isdir(item) or _is_pattern(item)]
+    prefixes = _tree_prefixes(trees) if len(trees) > 1 else {}
+    seen: Set[str] = set()
+
+    for item in inputs:
+        if os.path.isdir(item):
+            root = Path(item)
+            matches = [item]
+        elif os.path.isfile(item):
+            root = Path(item).parent
+            matches = [item]
+        elif _is_pattern(item):
+            root = _glob_root(item)
+            matches = sorted(glob.glob(item, recursive=True))
+            if not matches:
+                logger.warning(f"No files match {item}")
+        else:
+            logger.warning(f"Input does not exist: {item}")
+            continue
+
+        for match in matches:
+            match_path = Path(match)
+            files = find_supported_files(match_path) if match_path.is_dir() else [match_path]
+            for file_path in files:
+                if file_path.suffix.lower() not in SUPPORTED_EXTENSIONS:
+                    if match_path == file_path and not _is_pattern(item):
+                        logger.warning(f"Unsupported file type: {file_path}")
+                    continue
+                key = os.path.normcase(os.path.abspath(file_path))
+                if key in seen:
+                    continue
+                seen.add(key)
+                yield BatchInput(file_path, root, prefixes.get(item, ''))
+
+
+def _is_pattern(item: str) -> bool:
+    """Check if an input is a glob pattern; existing paths such as '[Author] Title' are taken literally"""
+    return glob.has_magic(item) and not os.path.exists(item)
+
+
+def _glob_root(pattern: str) -> Path:
+    """Get the folder of a glob pattern's leading parts without wildcards"""
+    parts = []
+    for part in Path(pattern).parts:
+        if glob.has_magic(part):
+            break
+        parts.append(part)
+    return Path(*parts) if parts else Path('.')
+
+
+def _tree_prefixes(trees: List[str]) -> Dict[str, str]:
+    """Name the output subfolder of each tree after its folder, numbering repeated names"""
+    prefixes: Dict[str, str] = {}
+    used: Set[str] = set()
+    for item in trees:
+        if item in prefixes:
+            continue
+        root = _glob_root(item) if _is_pattern(item) else Path(item)
+        name = Path(os.path.abspath(root)).name or 'root'
+        prefix = name
+        number = 2
+        while prefix.lower() in used:
+            prefix = f"{name}_{number}"
+            number += 1
+        used.add(prefix.lower())
+        prefixes[item] = prefix
+    return prefixes
@@ -0,0 +1,170 @@
+"""
+Detection of repeated headers, footers and page numbers across PDF pages
+
+Each line at the edge of a page is fingerprinted as the set of hashed
+character n-grams (shingles) of its normalized text. Two lines match when
+the Jaccard similarity of their shingle sets reaches MIN_SIMILARITY, so a
+running header whose title fragment changes from chapter to chapter still
+matches itself on other pages. Lines too short for their shingles to tell
+them apart must match exactly.
+"""
+
+import re
+from collections import deque
+from hashlib import blake2b
+from typing import Deque, FrozenSet, Iterable, Iterator, List, Tuple
+
+from .text_segment import TextSegment
+
+
+# Number of lines at the top and bottom of a page considered for removal
+EDGE_LINES = 3
+
+# Number of pages in the sliding window used to count recurring lines
+WINDOW_SIZE = 16
+
+# Fraction of pages in the window a line must appear on to be boilerplate
+MIN_RATIO = 0.6
+
+# Windows with fewer pages than this never remove anything
+MIN_PAGES = 3
+
+# Characters per shingle; short enough for CJK headers without spaces
+SHINGLE_SIZE = 2
+
+# Jaccard similarity of two lines' shingle sets for them to count as the same line
+MIN_SIMILARITY = 0.5
+
+# Lines with fewer shingles than this only match lines with the same shingles
+MIN_FUZZY_SHINGLES = 12
+
+_DIGITS = re.compile(r'\d+')
+_WHITESPACE = re.compile(r'\s+')
+_ROMAN = r'(?=[ivxlcdm])m{0,3}(?:cm|cd|d?c{0,3})(?:xc|xl|l?x{0,3})(?:ix|iv|v?i{0,3})'
+# A roman numeral alone could be a word ('I', 'mix'), so it needs 'page' before it or 'of N' after it
+_PAGE_NUMBER = re.compile(
+    r'^[\W_]*(?:'
+    r'(?:page|p\.|第)?\s*\d+(?:\s*(?:of|/)\s*\d+)?'
+    r'|(?:page|p\.)\s*' + _ROMAN + r'(?:\s*(?:of|/)\s*\d+)?'
+    r'|' + _ROMAN + r'\s*(?:of|/)\s*\d+'
+    r')\s*(?:頁)?[\W_]*$',
+    re.IGNORECASE
+)
+
+# Shingle set of a line; empty for blank lines, which never match
+Fingerprint = FrozenSet[int]
+
+# A page in the window: segment, lines, and fingerprints of its header and footer lines
+_WindowEntry = Tuple[TextSegment, List[str], List[Fingerprint], List[Fingerprint]]
+
+
+class BoilerplateFilter:
+    """Streaming filter removing lines that recur, exactly or nearly, at the edges of most pages"""
+
+    def __init__(self, window_size: int = WINDOW_SIZE, edge_lines: int = EDGE_LINES,
+                 min_ratio: float = MIN_RATIO, min_similarity: float = MIN_SIMILARITY):
+        self.window_size = max(window_size, MIN_PAGES)
+        self.edge_lines = edge_lines
+        self.min_ratio = min_ratio
+        self.min_similarity = min_similarity
+
+        # Statistics
+        self.bytes_removed = 0
+        self.lines_removed = 0
+
+    def filter_pages(self, pages: Iterable[TextSegment]) -> Iterator[TextSegment]:
+        """
+        Remove recurring header, footer and page-number lines from a page stream
+
+        Only the pages in the sliding window are kept in memory; each page is
+        judged against the window it is in when it reaches the front.
+
+        Args:
+            pages: Page segments, one line per text line
+
+        Returns:
+            Iterator[TextSegment]: Page segments with boilerplate lines removed
+        """
+        window: Deque[_WindowEntry] = deque()
+
+        for page in pages:
+            lines = page.text.split('\n')
+            head, tail = self._edge_counts(lines)
+            window.append((page, lines,
+                           [self._fingerprint(lines[offset]) for offset in range(head)],
+                           [self._fingerprint(lines[len(lines) - 1 - offset]) for offset in range(tail)]))
+
+            if len(window) >= self.window_size:
+                yield self._strip(window[0], window)
+                window.popleft()
+
+        # The last pages are all judged against the final window
+        final = list(window)
+        for entry in final:
+            yield self._strip(entry, final)
+
+    def _strip(self, entry: _WindowEntry, window: Iterable[_WindowEntry]) -> TextSegment:
+        """Strip boilerplate from a page of the window"""
+        page, lines, top, bottom = entry
+        tops = [other[2] for other in window]
+        bottoms = [other[3] for other in window]
+        if len(tops) < MIN_PAGES:
+            return page
+
+        threshold = max(2, self.min_ratio * len(tops))
+        remove = set()
+
+        for offset, fingerprint in enumerate(top):
+            if self._recurrences(fingerprint, tops) >= threshold:
+                remove.add(offset)
+        for offset, fingerprint in enumerate(bottom):
+            if self._recurrences(fingerprint, bottoms) >= threshold:
+                remove.add(len(lines) - 1 - offset)
+
+        if not remove:
+            return page
+
+        kept = []
+        for index, line in enumerate(lines):
+            if index in remove:
+                self.bytes_removed += len(line.encode('utf-8')) + 1
+                self.lines_removed += 1
+            else:
+                kept.append(line)
+        return page._replace(text='\n'.join(kept))
+
+    def _recurrences(self, fingerprint: Fingerprint, pages: List[List[Fingerprint]]) -> int:
+        """Count the pages with a line in the same zone similar enough to a fingerprint"""
+        if not fingerprint:
+            return 0
+        return sum(1 for zone in pages if any(self._similarity(fingerprint, other) >= self.min_similarity
+                                              for other in zone))
+
+    def _similarity(self, first: Fingerprint, second: Fingerprint) -> float:
+        """Jaccard similarity of two shingle sets, or 0 or 1 if either is too short to compare loosely"""
+        if not second:
+            return 0.0
+        if min(len(first), len(second)) < MIN_FUZZY_SHINGLES:
+            return 1.0 if first == second else 0.0
+        common = len(first & second)
+        return common / (len(first) + len(second) - common)
+
+    def _edge_counts(self, lines: List[str]) -> Tuple[int, int]:
+        """Number of lines treated as header and footer, without overlap"""
+        head = min(self.edge_lines, len(lines))
+        tail = min(self.edge_lines, len(lines) - head)
+        return head, tail
+
+    def _fingerprint(self, line: str) -> Fingerprint:
+        """Hash the shingles of a line, with whitespace removed and digit runs masked so page numbers compare equal"""
+        line = line.strip()
+        if not line:
+            return frozenset()
+        if _PAGE_NUMBER.match(line):
+            normalized = '#page'
+        else:
+            normalized = _DIGITS.sub('#', _WHITESPACE.sub('', line.lower()))
+        shingles = {normalized[start:start + SHINGLE_SIZE]
+                    for start in range(max(1, len(normalized) - SHINGLE_SIZE + 1))}
+        return frozenset(int.from_bytes(blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'little')
+                         for shingle in shingles)
@@ -0,0 +1,187 @@
+"""
+Chunked JSONL output for downstream NLP and embedding pipelines
+"""
+
+import json
+import os
+import re
+from pathlib import Path
+from typing import Iterable, Iterator, List, NamedTuple, Tuple
+
+from .text_segment import TextSegment
+
+
+# Output formats: one TXT file per document, one JSON chunk per line, or a folder
+# of TXT parts (see core.split_output)
+OUTPUT_TXT = 'txt'
+OUTPUT_JSONL = 'jsonl'
+OUTPUT_SPLIT = 'split'
+OUTPUT_FORMATS = (OUTPUT_TXT, OUTPUT_JSONL, OUTPUT_SPLIT)
+
+# Default chunk size and overlap between consecutive chunks, in characters
+DEFAULT_CHUNK_SIZE = 2000
+DEFAULT_CHUNK_OVERLAP = 200
+
+# End of a sentence: terminal punctuation, optional closing quotes or brackets, then
+# whitespace; CJK full stops end a sentence without any following space
+SENTENCE_END = re.compile(r'[.!?…]["\'”’」』)\]]*(?=\s)|[。！？][」』”’）)]*')
+
+WHITESPACE = re.compile(r'\s')
+
+
+class TextChunk(NamedTuple):
+    """A chunk of a document's text and where it came from"""
+
+    # 0-based chunk number within the document
+    number: int
+    text: str
+    # 'page', 'item' or 'chapter' of the segments the chunk was taken from
+    kind: str
+    # 1-based first and last page (PDF), spine item or chapter (EPUB) the chunk overlaps
+    first: int
+    last: int
+    # Labels of those pages, content files or chapters, in reading order
+    labels: Tuple[str, ...]
+
+
+def iter_chunks(segments: Iterable[TextSegment], size: int = DEFAULT_CHUNK_SIZE,
+                overlap: int = DEFAULT_CHUNK_OVERLAP, sentences: bool = True) -> Iterator[TextChunk]:
+    """
+    Split a stream of segments into chunks of at most size characters
+
+    Segments are joined as in the TXT output. Only the text not yet emitted
+    and the last segment read are held in memory.
+
+    Args:
+        segments: Extracted segments in reading order
+        size: Maximum characters per chunk
+        overlap: Characters repeated from the end of the previous chunk (at most size // 2 - 1)
+        sentences: End chunks at a sentence boundary, or failing that at whitespace,
+                   when one lies in the second half of the chunk
+
+    Returns:
+        Iterator[TextChunk]: Chunks in reading order
+    """
+    size = max(1, size)
+    overlap = max(0, min(overlap, size // 2 - 1))
+
+    buffer = ''
+    # Position in buffer where the next chunk starts, and where text not yet emitted starts
+    pos = 0
+    fresh = 0
+    # (start, end, kind, index, label) of each segment in buffer
+    marks: List[Tuple[int, int, str, int, str]] = []
+    number = 0
+
+    def emit(end: int) -> TextChunk:
+        # A chunk made only of a separator takes the segment before it
+        overlapping = ([mark for mark in marks if mark[0] < end and mark[1] > pos]
+                       or [mark for mark in marks if mark[0] < end][-1:])
+        labels = tuple(dict.fromkeys(mark[4] for mark in overlapping))
+        return TextChunk(number, buffer[pos:end], overlapping[0][2], overlapping[0][3], overlapping[-1][3], labels)
+
+    for segment in segments:
+        if not segment.text:
+            continue
+
+        # Drop text already emitted
+        if pos:
+            buffer = buffer[pos:]
+            fresh -= pos
+            marks = [(start - pos, end - pos, kind, index, label) for start, end, kind, index, label in marks
+                     if end > pos]
+            pos = 0
+
+        if buffer:
+            buffer += segment.separator
+        marks.append((len(buffer), len(buffer) + len(segment.text), segment.kind, segment.index, segment.label))
+        buffer += segment.text
+
+        while len(buffer) - pos > size:
+            end = _cut(buffer, pos, pos + size, sentences)
+            yield emit(end)
+            number += 1
+            fresh = end
+            pos = _next_start(buffer, pos, end, overlap)
+
+    if len(buffer) > fresh and buffer[fresh:].strip():
+        yield emit(len(buffer))
+
+
+def _cut(buffer: str, start: int, limit: int, sentences: bool) -> int:
+    """Choose where a chunk starting at start ends, at most at limit"""
+    if sentences:
+        half = start + (limit - start) // 2
+        window = buffer[half:limit]
+
+        last_sentence = None
+        for match in SENTENCE_END.finditer(window):
+            last_sentence = match
+        if last_sentence is not None:
+            return half + last_sentence.end()
+
+        for index in range(len(window) - 1, -1, -1):
+            if window[index].isspace():
+                return half + index + 1
+
+    return limit
+
+
+def _next_start(buffer: str, start: int, end: int, overlap: int) -> int:
+    """Choose where the next chunk starts: overlap characters before end, moved forward to a word start"""
+    if overlap <= 0:
+        return end
+    next_start = max(start + 1, end - overlap)
+    match = WHITESPACE.search(buffer, next_start, end)
+    if match is not None and match.end() < end:
+        return match.end()
+    return next_start
+
+
+def write_jsonl(output_file: Path, source: str, segments: Iterable[TextSegment], size: int = DEFAULT_CHUNK_SIZE,
+                overlap: int = DEFAULT_CHUNK_OVERLAP, sentences: bool = True) -> int:
+    """
+    Write a document's chunks as JSON Lines, one object per chunk
+
+    Each line holds 'source' (input path), 'chunk' (0-based number), 'kind'
+    ('page', 'item' or 'chapter'), 'first' and 'last' (1-based page, spine
+    item or chapter range), 'labels' and 'text'. The file is written under a temporary name
+    and only replaces output_file once complete; nothing is written if the
+    document has no text.
+
+    Args:
+        output_file: JSONL file to write (UTF-8)
+        source: Input document path recorded in every chunk
+        segments: Extracted segments in reading order
+        size: Maximum characters per chunk
+        overlap: Characters repeated from the end of the previous chunk
+        sentences: End chunks at sentence boundaries where possible
+
+    Returns:
+        int: Number of chunks written
+    """
+    temp_file = output_file.with_name(output_file.name + '.part')
+    count = 0
+    try:
+        with open(temp_file, 'w', encoding='utf-8', newline='\n') as f:
+            for chunk in iter_chunks(segments, size, overlap, sentences):
+                record = {
+                    'source': source,
+                    'chunk': chunk.number,
+                    'kind': chunk.kind,
+                    'first': chunk.first,
+                    'last': chunk.last,
+                    'labels': list(chunk.labels),
+                    'text': chunk.text
+                }
+                f.write(json.dumps(record, ensure_ascii=False))
+                f.write('\n')
+                count += 1
+
+        if count:
+            os.replace(temp_file, output_file)
+        return count
+
+    finally:
+        if temp_file.exists():
+            temp_file.unlink()
@@ -2,39 +2,125 @@
 Main document converter for EPUB and PDF files
 """
 
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
-from typing import Optional, Callable, List, Tuple
+from typing import Optional, Callable, Dict, Iterable, Iterator, List, Tuple
+import itertools
 import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
 
+from .chunker import DEFAULT_CHUNK_OVERLAP, DEFAULT_CHUNK_SIZE, OUTPUT_JSONL, OUTPUT_SPLIT, OUTPUT_TXT, write_jsonl
+from .batch_inputs import BatchInput, iter_batch_inputs
+from .dedupe import find_duplicate_groups
 from .epub_processor import EpubProcessor
+from .job import ConversionJob, ConversionOptions
 from .pdf_processor import PdfProcessor
+from .profiling import merge_profile
+from .results import ResultTable, STATUS_CONVERTED, STATUS_DUPLICATE, STATUS_FAILED, STATUS_SKIPPED
+from .search_index import SegmentSpan, split_segments, spool_segments
+from .scheduler import MAX_JOB_SHARE, estimate_costs, init_worker, plan_jobs, run_extraction_job
+from .selection import PageRange
+from .split_output import DEFAULT_SPLIT_PAGES, write_split
+from .text_segment import TextSegment, iter_joined
 from utils import app_logger, reporter
+from utils.encoding import write_text_file
+from utils.resources import get_rss_bytes
 
 
 class DocumentToTxtConverter:
-    """Main converter for EPUB and PDF documents to TXT format"""
+    """
+    Main converter for EPUB and PDF documents to TXT format
+    
+    The conversion settings below are defaults. Each call runs on its own
+    ConversionJob holding a snapshot of the options and its own statistics,
+    so one converter can be shared by many threads; pass a job to a call to
+    choose its options and read its statistics independently of other calls.
+    """
     
     def __init__(self):
         self.logger = app_logger.get_logger()
         self.epub_processor = EpubProcessor()
         self.pdf_processor = PdfProcessor()
         
-        # Conversion settings
+        # Default conversion settings, see ConversionOptions
         self.preserve_structure = True
         self.skip_existing = True
+        self.pdf_layout = False
+        self.strip_boilerplate = False
+        self.low_memory = False
+        self.deduplicate = True
+        self.output_encoding = 'utf-8'
+        # Pages of a PDF, or spine items of an EPUB, to extract (None for all)
+        self.page_range: Optional[PageRange] = None
+        # Stop extracting a document after this many characters (None for no limit)
+        self.max_chars: Optional[int] = None
+        # Split EPUB text at the chapters of the table of contents instead of at content files
+        self.epub_chapters = False
+        # Worker processes used by convert_directory and convert_batch (1 converts in this process)
+        self.max_workers = 1
+        # Profiling of slow documents: mode ('' for none), how many of the slowest to keep,
+        # and a duration above which every document is kept
+        self.profile = ''
+        self.profile_top = 5
+        self.profile_threshold = 0.0
+        # Output format ('txt', 'jsonl' chunks of chunk_size characters for NLP pipelines,
+        # or 'split' into a folder with one file per split_pages PDF pages or EPUB chapter)
+        self.output_format = OUTPUT_TXT
+        self.chunk_size = DEFAULT_CHUNK_SIZE
+        self.chunk_overlap = DEFAULT_CHUNK_OVERLAP
+        self.chunk_sentences = True
+        self.split_pages = DEFAULT_SPLIT_PAGES
+        # Full-text search index that converted documents are added to ('' for none)
+        self.index_path = ''
+        self.index_tokenizer = 'unicode61'
         
-        # Statistics
-        self.stats = {
-            'total_files': 0,
-            'successful': 0,
-            'failed': 0,
-            'skipped': 0
-        }
+        # Job of the most recently started call, kept for get_statistics()
+        self.last_job = ConversionJob()
         
         self.logger.info("DocumentToTxtConverter initialized")
     
+    @property
+    def stats(self) -> dict:
+        """Batch counters of the most recently started call"""
+        return self.last_job.stats
+    
+    @property
+    def results(self) -> ResultTable:
+        """Per-file results of the most recently started call"""
+        return self.last_job.results
+    
+    def get_options(self, **overrides) -> ConversionOptions:
+        """
+        Snapshot the default conversion settings
+        
+        Args:
+            **overrides: ConversionOptions fields to change in the snapshot
+            
+        Returns:
+            ConversionOptions: Options for a call
+        """
+        options = ConversionOptions(**{name: getattr(self, name) for name in ConversionOptions._fields})
+        return options._replace(**overrides) if overrides else options
+    
+    def new_job(self, **overrides) -> ConversionJob:
+        """
+        Create a job for one call, with the default settings plus overrides
+        
+        Args:
+            **overrides: ConversionOptions fields to change for this job
+            
+        Returns:
+            ConversionJob: A job to pass to convert_file or convert_directory
+        """
+        return ConversionJob(self.get_options(**overrides))
+    
     def convert_file(self, input_path: str, output_dir: str, 
-                    progress_callback: Optional[Callable[[int, str], None]] = None) -> bool:
+                    progress_callback: Optional[Callable[[int, str], None]] = None,
+                    job: Optional[ConversionJob] = None) -> bool:
         """
         Convert a single file to TXT format
         
@@ -42,6 +128,8 @@ class DocumentToTxtConverter:
             input_path: Path to input file
             output_dir: Output directory
             progress_callback: Optional progress callback
+            job: Optional job holding the options and receiving the statistics
+                 (default: a new job with the converter's settings)
             
         Returns:
             bool: True if successful
@@ -57,8 +145,10 @@ class DocumentToTxtConverter:
             if not output_path.exists():
                 output_path.mkdir(parents=True, exist_ok=True)
             
-            # Reset statistics
-            self.stats = {'total_files': 1, 'successful': 0, 'failed': 0, 'skipped': 0}
+            # Fresh statistics for this call
+            job = job or self.new_job()
+            job.stats['total_files'] = 1
+            self.last_job = job
             
             if progress_callback:
                 progress_callback(10, f"Processing {input_file.name}...")
@@ -67,20 +157,19 @@ class DocumentToTxtConverter:
             file_ext = input_file.suffix.lower()
             
             if file_ext == '.epub':
-                success = self._convert_epub_file(input_file, output_path, progress_callback)
+                success = self._convert_epub_file(job, input_file, output_path, progress_callback)
             elif file_ext == '.pdf':
-                success = self._convert_pdf_file(input_file, output_path, progress_callback)
+                success = self._convert_pdf_file(job, input_file, output_path, progress_callback)
             else:
                 self.logger.warning(f"Unsupported file type: {file_ext}")
                 return False
             
-            if success:
-                self.stats['successful'] += 1
-                if progress_callback:
+            job.write_profiles(output_path)
+            
+            if progress_callback:
+                if success:
                     progress_callback(100, "Conversion completed successfully")
-            else:
-                self.stats['failed'] += 1
-                if progress_callback:
+                else:
                     progress_callback(100, "Conversion failed")
             
             return success
@@ -88,173 +177,509 @@ class DocumentToTxtConverter:
         except Exception as e:
             self.logger.error(f"Error converting file {input_path}: {str(e)}")
             return False
+        
+        finally:
+            if job is not None:
+                job.close()
     
     def convert_directory(self, input_dir: str, output_dir: str,
-                         progress_callback: Optional[Callable[[int, str], None]] = None) -> bool:
+                         progress_callback: Optional[Callable[[int, str], None]] = None,
+                         plan: Optional[dict] = None, job: Optional[ConversionJob] = None) -> bool:
         """
         Convert all supported files in a directory
         
+        With max_workers above 1, files are converted on worker processes,
+        longest first, and PDFs large enough to hold up the batch are split
+        into page chunks.
+        
         Args:
             input_dir: Input directory
             output_dir: Output directory
             progress_callback: Optional progress callback
+            plan: Optional probe plan whose size estimates order the work
+            job: Optional job holding the options and receiving the statistics
+                 (default: a new job with the converter's settings)
+            
+        Returns:
+            bool: True if at least one file was converted successfully
+        """
+        if not Path(input_dir).exists():
+            self.logger.error(f"Input directory does not exist: {input_dir}")
+            return False
+        return self.convert_batch([input_dir], output_dir, progress_callback, plan, job)
+    
+    def convert_batch(self, inputs: List[str], output_dir: str,
+                      progress_callback: Optional[Callable[[int, str], None]] = None,
+                      plan: Optional[dict] = None, job: Optional[ConversionJob] = None) -> bool:
+        """
+        Convert the supported files of several folders, files, glob patterns and file lists as one batch
+        
+        Every input is discovered into a single list of files, which shares one
+        duplicate check, one pool of worker processes and one report, so many
+        small sources keep all workers busy instead of running one after
+        another. See core.batch_inputs.iter_batch_inputs for where each file's
+        output goes.
+        
+        Args:
+            inputs: Folders, files, glob patterns ('books/**/*.pdf') and file lists
+                    ('@list.txt', one input per line)
+            output_dir: Output directory
+            progress_callback: Optional progress callback
+            plan: Optional probe plan whose size estimates order the work
+            job: Optional job holding the options and receiving the statistics
+                 (default: a new job with the converter's settings)
             
         Returns:
             bool: True if at least one file was converted successfully
         """
         try:
-            input_path = Path(input_dir)
             output_path = Path(output_dir)
             
-            if not input_path.exists():
-                self.logger.error(f"Input directory does not exist: {input_dir}")
-                return False
-            
             if not output_path.exists():
                 output_path.mkdir(parents=True, exist_ok=True)
             
             # Find all supported files
-            supported_files = self._find_supported_files(input_path)
+            batch_inputs = list(iter_batch_inputs(inputs))
+            supported_files = [batch_input.path for batch_input in batch_inputs]
             
             if not supported_files:
-                self.logger.warning(f"No supported files found in {input_dir}")
+                self.logger.warning(f"No supported files found in {', '.join(inputs)}")
                 return False
             
-            # Reset statistics
-            self.stats = {
-                'total_files': len(supported_files),
-                'successful': 0,
-                'failed': 0,
-                'skipped': 0
-            }
+            # Fresh statistics for this call
+            job = job or self.new_job()
+            job.stats['total_files'] = len(supported_files)
+            self.last_job = job
+            options = job.options
+            
+            output_dirs = {batch_input.path: self._output_dir_for(job, batch_input, output_path)
+                           for batch_input in batch_inputs}
+            
+            # Extract each distinct document once; copies reuse its output
+            duplicate_groups = find_duplicate_groups(supported_files) if options.deduplicate else []
+            duplicates = {file_path for group in duplicate_groups for file_path in group[1:]}
+            files_to_convert = [file_path for file_path in supported_files if file_path not in duplicates]
             
             if progress_callback:
                 progress_callback(5, f"Found {len(supported_files)} files to convert...")
             
             # Process each file
-            for i, file_path in enumerate(supported_files):
-                try:
-                    relative_path = file_path.relative_to(input_path)
-                    
-                    # Calculate output path
-                    if self.preserve_structure:
-                        output_file_dir = output_path / relative_path.parent
-                    else:
-                        output_file_dir = output_path
-                    
-                    # Ensure output directory exists
-                    output_file_dir.mkdir(parents=True, exist_ok=True)
-                    
-                    # Progress update
-                    if progress_callback:
-                        progress = 10 + int((i / len(supported_files)) * 80)
-                        progress_callback(progress, f"Converting {relative_path.name}... ({i+1}/{len(supported_files)})")
-                    
-                    # Convert file
-                    file_ext = file_path.suffix.lower()
-                    
-                    if file_ext == '.epub':
-                        success = self._convert_epub_file(file_path, output_file_dir, None)
-                    elif file_ext == '.pdf':
-                        success = self._convert_pdf_file(file_path, output_file_dir, None)
-                    else:
-                        self.logger.warning(f"Unsupported file type: {file_ext}")
-                        continue
-                    
-                    if success:
-                        self.stats['successful'] += 1
-                    else:
-                        self.stats['failed'] += 1
-                
-                except Exception as e:
-                    self.logger.error(f"Error processing file {file_path}: {str(e)}")
-                    self.stats['failed'] += 1
+            if options.max_workers > 1 and len(files_to_convert) > 0:
+                self._convert_files_parallel(job, files_to_convert, output_dirs, progress_callback, plan)
+            else:
+                self._convert_files_sequential(job, files_to_convert, output_dirs, progress_callback)
+            
+            if duplicate_groups:
+                self._link_duplicate_outputs(job, duplicate_groups, output_dirs)
+            
+            statistics = job.get_statistics()
             
             # Final progress update
             if progress_callback:
-                progress_callback(100, f"Completed: {self.stats['successful']} successful, {self.stats['failed']} failed")
+                progress_callback(100, f"Completed: {statistics['successful']} successful, {statistics['failed']} failed")
             
-            # Generate report
+            # Generate report, with the profiles of slow documents next to it
+            profiles = job.write_profiles(output_path)
             report_path = output_path / "conversion_report.txt"
-            reporter.generate_conversion_report(self.stats, supported_files, report_path)
+            reporter.generate_conversion_report(statistics, supported_files, report_path, duplicate_groups,
+                                                job.results, profiles)
             
-            return self.stats['successful'] > 0
+            return statistics['successful'] > 0
             
         except Exception as e:
-            self.logger.error(f"Error converting directory {input_dir}: {str(e)}")
+            self.logger.error(f"Error converting {', '.join(inputs)}: {str(e)}")
             return False
+        
+        finally:
+            if job is not None:
+                job.close()
     
-    def _find_supported_files(self, directory: Path) -> List[Path]:
-        """Find all supported files in directory"""
-        supported_extensions = {'.epub', '.pdf'}
-        supported_files = []
+    def iter_segments(self, input_path: str, progress_callback: Optional[Callable[[int, str], None]] = None,
+                      stats: Optional[dict] = None,
+                      options: Optional[ConversionOptions] = None) -> Iterator[TextSegment]:
+        """
+        Stream the text of a file as it is extracted
+        
+        This neither writes output nor touches the converter's statistics.
+        
+        Args:
+            input_path: Path to an EPUB or PDF file
+            progress_callback: Optional progress callback
+            stats: Optional statistics dict updated with extraction counters
+            options: Optional options (default: the converter's settings)
+            
+        Returns:
+            Iterator[TextSegment]: Text segments in reading order
+        """
+        options = options or self.get_options()
+        file_ext = Path(input_path).suffix.lower()
         
-        for file_path in directory.rglob('*'):
-            if file_path.is_file() and file_path.suffix.lower() in supported_extensions:
-                supported_files.append(file_path)
+        if file_ext == '.epub':
+            return self.epub_processor.iter_segments(str(input_path), progress_callback,
+                                                     item_range=options.page_range,
+                                                     max_chars=options.max_chars,
+                                                     stats=stats,
+                                                     chapters=options.epub_chapters)
+        if file_ext == '.pdf':
+            return self.pdf_processor.iter_segments(str(input_path), progress_callback,
+                                                    layout=options.pdf_layout,
+                                                    strip_boilerplate=options.strip_boilerplate,
+                                                    low_memory=options.low_memory,
+                                                    stats=stats,
+                                                    page_range=options.page_range,
+                                                    max_chars=options.max_chars)
         
-        return sorted(supported_files)
+        raise ValueError(f"Unsupported file type: {file_ext}")
     
-    def _convert_epub_file(self, input_file: Path, output_dir: Path,
-                          progress_callback: Optional[Callable[[int, str], None]] = None) -> bool:
-        """Convert EPUB file to TXT"""
+    def get_output_name(self, file_path: Path, options: Optional[ConversionOptions] = None) -> str:
+        """
+        Get the name of a file's output
+        
+        Args:
+            file_path: Input file
+            options: Optional options (default: the converter's settings)
+            
+        Returns:
+            str: TXT or JSONL file name, or folder name for split output
+        """
+        options = options or self.get_options()
+        if options.output_format == OUTPUT_SPLIT:
+            return file_path.stem
+        return f"{file_path.stem}.{options.output_format}"
+    
+    def _write_output(self, job: ConversionJob, input_file: Path, output_file: Path,
+                      segments: Iterable[TextSegment]) -> bool:
+        """Write a document's segments in the job's output format and index them; False if there was no text"""
+        options = job.options
+        
+        # Output is written as the text is extracted, without holding the document in memory;
+        # text to index is spooled to a temporary file on the way and indexed from there
+        spool = tempfile.TemporaryFile('w+', encoding='utf-8', newline='') if options.index_path else None
+        spans: List[SegmentSpan] = []
+        if spool is not None:
+            segments = spool_segments(segments, spool, spans)
+        
         try:
-            output_file = output_dir / f"{input_file.stem}.txt"
+            if options.output_format == OUTPUT_TXT:
+                pieces = iter_joined(segments, [])
+                first = next(pieces, None)
+                if first is not None:
+                    write_text_file(output_file, itertools.chain([first], pieces), options.output_encoding)
+                written = first is not None
+            elif options.output_format == OUTPUT_JSONL:
+                written = write_jsonl(output_file, str(input_file), segments, options.chunk_size,
+                                      options.chunk_overlap, options.chunk_sentences) > 0
+            else:
+                written = write_split(output_file, str(input_file), segments, options.output_encoding,
+                                      options.split_pages) > 0
             
-            # Skip if file exists and skip_existing is True
-            if self.skip_existing and output_file.exists():
+            if written and spool is not None:
+                spool.seek(0)
+                job.index_document(input_file, output_file, spool, spans)
+            return written
+        
+        finally:
+            if spool is not None:
+                spool.close()
+    
+    def _output_dir_for(self, job: ConversionJob, batch_input: BatchInput, output_path: Path) -> Path:
+        """Get the output directory of a file in a batch conversion"""
+        if job.options.preserve_structure:
+            return output_path / batch_input.prefix / batch_input.path.relative_to(batch_input.root).parent
+        return output_path
+    
+    def _convert_files_sequential(self, job: ConversionJob, files: List[Path], output_dirs: Dict[Path, Path],
+                                  progress_callback: Optional[Callable[[int, str], None]] = None):
+        """Convert files one after another in this process"""
+        for i, file_path in enumerate(files):
+            try:
+                # Calculate output path
+                output_file_dir = output_dirs[file_path]
+                
+                # Ensure output directory exists
+                output_file_dir.mkdir(parents=True, exist_ok=True)
+                
+                # Progress update
+                if progress_callback:
+                    progress = 10 + int((i / len(files)) * 80)
+                    progress_callback(progress, f"Converting {file_path.name}... ({i+1}/{len(files)})")
+                
+                # Convert file
+                file_ext = file_path.suffix.lower()
+                
+                if file_ext == '.epub':
+                    self._convert_epub_file(job, file_path, output_file_dir, None)
+                elif file_ext == '.pdf':
+                    self._convert_pdf_file(job, file_path, output_file_dir, None)
+                else:
+                    self.logger.warning(f"Unsupported file type: {file_ext}")
+            
+            except Exception as e:
+                self.logger.error(f"Error processing file {file_path}: {str(e)}")
+                job.record(file_path, STATUS_FAILED)
+    
+    def _convert_files_parallel(self, job: ConversionJob, files: List[Path], output_dirs: Dict[Path, Path],
+                                progress_callback: Optional[Callable[[int, str], None]] = None,
+                                plan: Optional[dict] = None):
+        """Convert files on worker processes, longest first, splitting large PDFs into page chunks"""
+        output_files: Dict[Path, Path] = {}
+        for file_path in files:
+            output_file = output_dirs[file_path] / self.get_output_name(file_path, job.options)
+            if job.options.skip_existing and output_file.exists():
                 self.logger.info(f"Skipping existing file: {output_file}")
-                self.stats['skipped'] += 1
-                return True
-            
-            # Extract text from EPUB
-            text_content = self.epub_processor.extract_text(str(input_file), progress_callback)
-            
-            if not text_content:
-                self.logger.warning(f"No text content extracted from {input_file}")
-                return False
-            
-            # Save to TXT file
-            with open(output_file, 'w', encoding='utf-8') as f:
-                f.write(text_content)
+                job.record(file_path, STATUS_SKIPPED, output_file=output_file)
+                continue
+            output_files[file_path] = output_file
+        
+        if not output_files:
+            return
+        
+        costs = estimate_costs(list(output_files), plan)
+        options = job.options
+        tasks = plan_jobs(costs, options.max_workers, self._splittable_page_counts(options, costs, plan))
+        
+        # Spool file and spans of each chunk, by file, the file's combined counters, and how many
+        # chunks are still running
+        chunks: Dict[Path, List[Optional[Tuple[str, List[SegmentSpan]]]]] = {}
+        chunk_stats: Dict[Path, dict] = {}
+        remaining: Dict[Path, int] = {}
+        for task in tasks:
+            chunks[task.file_path] = [None] * task.parts
+            chunk_stats[task.file_path] = {}
+            remaining[task.file_path] = task.parts
+        
+        split_files = sum(1 for parts in chunks.values() if len(parts) > 1)
+        self.logger.info(f"Converting {len(output_files)} files as {len(tasks)} jobs on {options.max_workers} "
+                         f"workers ({split_files} PDFs split into page chunks)")
+        
+        total_cost = sum(task.cost for task in tasks) or 1
+        done_cost = 0
+        done_files = 0
+        
+        try:
+            # Workers log through a queue to this process's handlers, and report each job
+            # they start for the live metrics
+            events = multiprocessing.Queue()
+            executor = ProcessPoolExecutor(max_workers=min(options.max_workers, len(tasks)),
+                                           initializer=init_worker,
+                                           initargs=(app_logger.get_process_queue(), self.logger.level, events))
+        except (OSError, NotImplementedError) as e:
+            self.logger.warning(f"Worker processes unavailable ({str(e)}), converting sequentially")
+            self._convert_files_sequential(job, list(output_files), output_dirs, progress_callback)
+            return
+        
+        job.metrics.attach_events(events)
+        # Workers write each chunk's text to a spool file here instead of sending it back whole
+        spool_dir = tempfile.TemporaryDirectory(prefix='convert-')
+        try:
+            with executor:
+                futures = {executor.submit(run_extraction_job, options, task, spool_dir.name): task
+                           for task in tasks}
+                
+                for future in as_completed(futures):
+                    task = futures[future]
+                    # Draining the start events here also keeps workers from blocking on a full pipe
+                    job.metrics.read_events()
+                    job.metrics.finish(task.file_path, task.part)
+                    try:
+                        spool_path, job_stats = future.result()
+                        chunks[task.file_path][task.part] = (spool_path, job_stats.pop('spans', []))
+                        self._merge_job_stats(options, chunk_stats[task.file_path], job_stats)
+                    except Exception as e:
+                        self.logger.error(f"Error extracting {task.file_path} (part {task.part + 1}/{task.parts}): {str(e)}")
+                    
+                    done_cost += task.cost
+                    remaining[task.file_path] -= 1
+                    if remaining[task.file_path] == 0:
+                        done_files += 1
+                        self._write_chunks(job, task.file_path, output_files[task.file_path], chunks.pop(task.file_path),
+                                           chunk_stats.pop(task.file_path))
+                        
+                        if progress_callback:
+                            progress = 10 + int((done_cost / total_cost) * 80)
+                            progress_callback(progress, f"Converted {task.file_path.name} ({done_files}/{len(output_files)})")
+        finally:
+            job.metrics.attach_events(None)
+            events.close()
+            spool_dir.cleanup()
+    
+    def _splittable_page_counts(self, options: ConversionOptions, costs: Dict[Path, int],
+                                plan: Optional[dict]) -> Dict[Path, int]:
+        """Get the page counts of PDFs costly enough to be split into chunks"""
+        # A user page range or character budget applies to the whole document, and header/footer
+        # stripping judges each page against its neighbours, which a chunk boundary would cut off
+        if (options.page_range is not None or options.max_chars or options.strip_boilerplate
+                or options.max_workers < 2):
+            return {}
+        
+        planned_pages = {os.path.abspath(record['path']): record['pages'] for record in (plan or {}).get('files', [])}
+        threshold = sum(costs.values()) / options.max_workers * MAX_JOB_SHARE
+        
+        page_counts = {}
+        for file_path, cost in costs.items():
+            if file_path.suffix.lower() == '.pdf' and cost > threshold:
+                pages = planned_pages.get(os.path.abspath(file_path))
+                if pages is None:
+                    pages = self.pdf_processor.get_metadata(str(file_path))['pages']
+                page_counts[file_path] = pages
+        return page_counts
+    
+    def _merge_job_stats(self, options: ConversionOptions, file_stats: dict, job_stats: dict):
+        """Add the counters and profile of one chunk to those of its file"""
+        for key in ('pages', 'boilerplate_bytes_removed', 'image_pages_skipped', 'seconds'):
+            file_stats[key] = file_stats.get(key, 0) + job_stats.get(key, 0)
+        file_stats['peak_rss_bytes'] = max(file_stats.get('peak_rss_bytes', 0), job_stats.get('peak_rss_bytes', 0))
+        file_stats['backend'] = job_stats.get('backend') or file_stats.get('backend', '')
+        file_stats['reason'] = job_stats.get('reason') or file_stats.get('reason', '')
+        if 'pdfplumber_error' in job_stats and 'pdfplumber_error' not in file_stats:
+            file_stats['pdfplumber_error'] = job_stats['pdfplumber_error']
+            file_stats['pdfplumber_failed_page'] = job_stats['pdfplumber_failed_page']
+        if 'profile' in job_stats:
+            merge_profile(options.profile, file_stats.setdefault('profile', {}), job_stats['profile'])
+    
+    def _write_chunks(self, job: ConversionJob, input_file: Path, output_file: Path,
+                      chunks: List[Optional[Tuple[str, List[SegmentSpan]]]], file_stats: dict):
+        """Write the text of a file's spooled chunks in page order and record the outcome"""
+        # Extraction time summed over the file's chunks, as measured by the workers
+        duration = file_stats.get('seconds', 0.0)
+        if job.profiler is not None and 'profile' in file_stats:
+            job.profiler.offer(str(input_file), duration, file_stats.pop('profile'))
+        try:
+            if any(chunk is None for chunk in chunks):
+                job.record(input_file, STATUS_FAILED, duration, file_stats=file_stats)
+                return
+            
+            start = time.perf_counter()
+            output_file.parent.mkdir(parents=True, exist_ok=True)
+            has_text = self._write_output(job, input_file, output_file, self._iter_chunk_segments(chunks))
+            duration += time.perf_counter() - start
+            
+            if not has_text:
+                # Protected files have already been reported by the processor
+                if not file_stats.get('reason'):
+                    self.logger.warning(f"No text content extracted from {input_file}")
+                job.record(input_file, STATUS_FAILED, duration, file_stats=file_stats)
+                return
             
             self.logger.info(f"Successfully converted {input_file} to {output_file}")
-            return True
-            
+            job.record(input_file, STATUS_CONVERTED, duration, output_file, file_stats)
+        
         except Exception as e:
-            self.logger.error(f"Error converting EPUB file {input_file}: {str(e)}")
-            return False
+            self.logger.error(f"Error writing output for {input_file}: {str(e)}")
+            job.record(input_file, STATUS_FAILED, duration, file_stats=file_stats)
+        
+        finally:
+            for chunk in chunks:
+                if chunk is not None and os.path.exists(chunk[0]):
+                    os.remove(chunk[0])
+    
+    def _iter_chunk_segments(self, chunks: List[Tuple[str, List[SegmentSpan]]]) -> Iterator[TextSegment]:
+        """Read the segments of spooled chunks back one at a time, in page order"""
+        for spool_path, spans in chunks:
+            with open(spool_path, 'r', encoding='utf-8', newline='') as spool:
+                yield from split_segments(spool, spans)
     
-    def _convert_pdf_file(self, input_file: Path, output_dir: Path,
+    def _link_duplicate_outputs(self, job: ConversionJob, duplicate_groups: List[List[Path]],
+                                output_dirs: Dict[Path, Path]):
+        """Give every duplicate input the output of the first file in its group"""
+        for original, *copies in duplicate_groups:
+            source = output_dirs[original] / self.get_output_name(original, job.options)
+            
+            for duplicate in copies:
+                try:
+                    target_dir = output_dirs[duplicate]
+                    target = target_dir / self.get_output_name(duplicate, job.options)
+                    
+                    if not source.exists():
+                        self.logger.warning(f"No output to share with duplicate {duplicate} (original: {original})")
+                        job.record(duplicate, STATUS_FAILED)
+                        continue
+                    
+                    if target != source:
+                        if target.exists():
+                            if job.options.skip_existing:
+                                self.logger.info(f"Skipping existing file: {target}")
+                                job.record(duplicate, STATUS_SKIPPED, output_file=target)
+                                continue
+                            if target.is_dir():
+                                shutil.rmtree(target)
+                            else:
+                                target.unlink()
+                        
+                        target_dir.mkdir(parents=True, exist_ok=True)
+                        self._link_or_copy(source, target)
+                    
+                    self.logger.info(f"Duplicate {duplicate} shares output of {original}")
+                    job.index_duplicate(original, duplicate, target)
+                    job.record(duplicate, STATUS_DUPLICATE, output_file=target)
+                
+                except Exception as e:
+                    self.logger.error(f"Error writing output for duplicate {duplicate}: {str(e)}")
+                    job.record(duplicate, STATUS_FAILED)
+    
+    def _link_or_copy(self, source: Path, target: Path):
+        """Hardlink target to source, copying when hardlinks are unsupported (folders file by file)"""
+        if os.path.isdir(source):
+            shutil.copytree(source, target, copy_function=self._link_or_copy)
+            return
+        try:
+            os.link(source, target)
+        except OSError:
+            shutil.copyfile(source, target)
+    
+    def _convert_epub_file(self, job: ConversionJob, input_file: Path, output_dir: Path,
+                          progress_callback: Optional[Callable[[int, str], None]] = None) -> bool:
+        """Convert EPUB file to TXT (or JSONL chunks or split parts)"""
+        return self._convert_document_file(job, input_file, output_dir, 'EPUB', progress_callback)
+    
+    def _convert_pdf_file(self, job: ConversionJob, input_file: Path, output_dir: Path,
                          progress_callback: Optional[Callable[[int, str], None]] = None) -> bool:
-        """Convert PDF file to TXT"""
+        """Convert PDF file to TXT (or JSONL chunks or split parts)"""
+        return self._convert_document_file(job, input_file, output_dir, 'PDF', progress_callback)
+    
+    def _convert_document_file(self, job: ConversionJob, input_file: Path, output_dir: Path, file_type: str,
+                               progress_callback: Optional[Callable[[int, str], None]] = None) -> bool:
+        """Extract a file's segments, write them out as they are extracted and record the outcome"""
+        start = time.perf_counter()
+        file_stats = {}
         try:
-            output_file = output_dir / f"{input_file.stem}.txt"
+            output_file = output_dir / self.get_output_name(input_file, job.options)
             
             # Skip if file exists and skip_existing is True
-            if self.skip_existing and output_file.exists():
+            if job.options.skip_existing and output_file.exists():
                 self.logger.info(f"Skipping existing file: {output_file}")
-                self.stats['skipped'] += 1
+                job.record(input_file, STATUS_SKIPPED, output_file=output_file)
                 return True
             
-            # Extract text from PDF
-            text_content = self.pdf_processor.extract_text(str(input_file), progress_callback)
-            
-            if not text_content:
-                self.logger.warning(f"No text content extracted from {input_file}")
+            # Extract text and write it out as it is extracted
+            job.metrics.start(input_file, file_stats)
+            with job.profile(input_file):
+                segments = self.iter_segments(str(input_file), progress_callback, file_stats, job.options)
+                has_text = self._write_output(job, input_file, output_file, segments)
+            file_stats['peak_rss_bytes'] = max(file_stats.get('peak_rss_bytes', 0), get_rss_bytes())
+            
+            if not has_text:
+                # Protected files have already been reported by the processor
+                if not file_stats.get('reason'):
+                    self.logger.warning(f"No text content extracted from {input_file}")
+                job.record(input_file, STATUS_FAILED, time.perf_counter() - start, file_stats=file_stats)
                 return False
             
-            # Save to TXT file
-            with open(output_file, 'w', encoding='utf-8') as f:
-                f.write(text_content)
-            
             self.logger.info(f"Successfully converted {input_file} to {output_file}")
+            job.record(input_file, STATUS_CONVERTED, time.perf_counter() - start, output_file, file_stats)
             return True
             
         except Exception as e:
-            self.logger.error(f"Error converting PDF file {input_file}: {str(e)}")
+            self.logger.error(f"Error converting {file_type} file {input_file}: {str(e)}")
+            job.record(input_file, STATUS_FAILED, time.perf_counter() - start, file_stats=file_stats)
             return False
     
     def get_statistics(self) -> dict:
-        """Get conversion statistics"""
-        return self.stats.copy()
+        """
+        Get conversion statistics of the most recently started convert_file or
+        convert_directory call; with concurrent calls, read each call's own job
+        
+        Returns:
+            dict: Batch counters plus totals derived from the per-file results
+        """
+        return self.last_job.get_statistics()
@@ -0,0 +1,92 @@
+"""
+Detection of identical input files within a batch
+"""
+
+import os
+from hashlib import blake2b
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+from utils import app_logger
+
+
+# Bytes hashed from each end of a file in the partial-hash stage
+PARTIAL_HASH_BYTES = 64 * 1024
+
+# Read size for the full-hash stage
+FULL_HASH_CHUNK = 1024 * 1024
+
+
+def find_duplicate_groups(files: Iterable[Path]) -> List[List[Path]]:
+    """
+    Group files with identical content
+
+    Files are grouped by size first, then by a hash of their first and last
+    PARTIAL_HASH_BYTES, and only files still colliding are hashed in full,
+    so unique files are usually never read.
+
+    Args:
+        files: Files to compare
+
+    Returns:
+        List[List[Path]]: Groups of two or more identical files, each sorted,
+                          so the first path of a group can act as its original
+    """
+    logger = app_logger.get_logger()
+
+    by_size: Dict[int, List[Path]] = {}
+    for file_path in files:
+        try:
+            by_size.setdefault(os.stat(file_path).st_size, []).append(file_path)
+        except OSError as e:
+            logger.warning(f"Could not stat {file_path}: {str(e)}")
+
+    groups = []
+    for size, same_size in by_size.items():
+        if len(same_size) < 2:
+            continue
+
+        for same_partial in _group_by(same_size, lambda path: _partial_hash(path, size)):
+            if size <= 2 * PARTIAL_HASH_BYTES:
+                # The partial hash already covered the whole file
+                groups.append(sorted(same_partial))
+                continue
+            for same_full in _group_by(same_partial, _full_hash):
+                groups.append(sorted(same_full))
+
+    groups.sort()
+    if groups:
+        duplicate_count = sum(len(group) - 1 for group in groups)
+        logger.info(f"Found {duplicate_count} duplicate files in {len(groups)} groups")
+    return groups
+
+
+def _group_by(files: List[Path], key) -> List[List[Path]]:
+    """Split files into groups of two or more sharing a key"""
+    buckets: Dict[bytes, List[Path]] = {}
+    for file_path in files:
+        try:
+            buckets.setdefault(key(file_path), []).append(file_path)
+        except OSError as e:
+            app_logger.get_logger().warning(f"Could not read {file_path}: {str(e)}")
+    return [bucket for bucket in buckets.values() if len(bucket) > 1]
+
+
+def _partial_hash(file_path: Path, size: int) -> bytes:
+    """Hash the first and last PARTIAL_HASH_BYTES of a file"""
+    digest = blake2b(digest_size=16)
+    with open(file_path, 'rb') as f:
+        digest.update(f.read(PARTIAL_HASH_BYTES))
+        if size > PARTIAL_HASH_BYTES:
+            f.seek(max(PARTIAL_HASH_BYTES, size - PARTIAL_HASH_BYTES))
+            digest.update(f.read(PARTIAL_HASH_BYTES))
+    return digest.digest()
+
+
+def _full_hash(file_path: Path) -> bytes:
+    """Hash the whole content of a file"""
+    digest = blake2b(digest_size=32)
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(FULL_HASH_CHUNK), b''):
+            digest.update(chunk)
+    return digest.digest()
@@ -2,14 +2,62 @@
 EPUB processor for extracting text content from EPUB files
 """
 
+import posixpath
+import re
 import zipfile
 import xml.etree.ElementTree as ET
 from pathlib import Path
-from typing import Optional, Callable, List
+from typing import Optional, Callable, Dict, Iterable, Iterator, List, Tuple
+from urllib.parse import unquote
 from bs4 import BeautifulSoup
 import logging
 
 from utils import app_logger
+from utils.encoding import decode_markup, iter_decoded_markup
+from .results import REASON_DRM
+from .selection import PageRange, limit_chars, range_indexes
+from .text_segment import TextSegment, join_text
+from .xhtml_text import STREAM_TEXT_CHARS, iter_text_chunks
+
+
+# Spine items sampled by probe() to estimate text size
+PROBE_SAMPLE_ITEMS = 3
+
+# Files whose presence marks a DRM scheme
+DRM_MARKERS = {
+    'META-INF/rights.xml': 'Adobe ADEPT',
+    'META-INF/sinf.xml': 'Apple FairPlay'
+}
+
+# encryption.xml algorithms that only obfuscate embedded fonts
+FONT_OBFUSCATION_ALGORITHMS = (
+    'http://www.idpf.org/2008/embedding',
+    'http://ns.adobe.com/pdf/enc#RC'
+)
+
+# Content files up to this size are pre-scanned for text before being parsed
+PRESCAN_MAX_BYTES = 64 * 1024
+
+# Content files larger than this are parsed as they are decompressed, and their
+# text emitted in chunks, instead of being read and parsed whole
+STREAM_MIN_BYTES = 8 * 1024 * 1024
+
+# Raw markup patterns used by the pre-scan: tags, comments and non-text elements,
+# the document head, and image elements
+MARKUP_PATTERN = re.compile(rb'<!--.*?-->|<(script|style)\b.*?</\1\s*>|<[^>]*>', re.S | re.I)
+HEAD_PATTERN = re.compile(rb'<head\b.*?</head\s*>', re.S | re.I)
+IMAGE_TAG_PATTERN = re.compile(rb'<(?:img|image|svg)\b', re.I)
+
+# Media type of an EPUB 2 NCX table of contents
+NCX_MEDIA_TYPE = 'application/x-dtbncx+xml'
+
+# Line marking where a table-of-contents entry starts in a content file's text
+# (private-use characters, which never occur in extracted text)
+CHAPTER_MARK = '\ue000{}\ue000'
+CHAPTER_MARK_PATTERN = re.compile('\ue000(\\d+)\ue000')
+
+# Table-of-contents entry: (content file, fragment id or '', title)
+TocEntry = Tuple[str, str, str]
 
 
 class EpubProcessor:
@@ -20,30 +68,85 @@ class EpubProcessor:
         self.namespaces = {
             'container': 'urn:oasis:names:tc:opendocument:xmlns:container',
             'opf': 'http://www.idpf.org/2007/opf',
-            'dc': 'http://purl.org/dc/elements/1.1/'
+            'dc': 'http://purl.org/dc/elements/1.1/',
+            'ncx': 'http://www.daisy.org/z3986/2005/ncx/'
         }
     
-    def extract_text(self, epub_path: str, progress_callback: Optional[Callable[[int, str], None]] = None) -> str:
+    def extract_text(self, epub_path: str, progress_callback: Optional[Callable[[int, str], None]] = None,
+                     item_range: Optional[PageRange] = None, max_chars: Optional[int] = None,
+                     stats: Optional[dict] = None, chapters: bool = False) -> str:
         """
         Extract text content from EPUB file
         
         Args:
             epub_path: Path to EPUB file
             progress_callback: Optional progress callback
+            item_range: Optional 1-based (first, last) spine items to extract; others are not read
+            max_chars: Optional character budget; extraction stops once it is reached
+            stats: Optional statistics dict updated with the spine items processed ('pages'),
+                   the image-only ones skipped without parsing ('image_pages_skipped'), and
+                   a 'reason' if the content is DRM-protected (core.results.REASONS)
+            chapters: Split the text at the chapters of the table of contents (nav or NCX)
+                      instead of at content files
             
         Returns:
             str: Extracted text content
         """
+        try:
+            segments = self.iter_segments(epub_path, progress_callback, item_range, max_chars, stats, chapters)
+            result = join_text(segments)
+            
+            if progress_callback:
+                progress_callback(90, "Finalizing text extraction...")
+            
+            if result:
+                self.logger.debug("Successfully extracted %d characters from %s", len(result), epub_path)
+            return result
+                
+        except Exception as e:
+            self.logger.error(f"Error extracting text from EPUB {epub_path}: {str(e)}")
+            return ""
+    
+    def iter_segments(self, epub_path: str, progress_callback: Optional[Callable[[int, str], None]] = None,
+                      item_range: Optional[PageRange] = None, max_chars: Optional[int] = None,
+                      stats: Optional[dict] = None, chapters: bool = False) -> Iterator[TextSegment]:
+        """
+        Stream the text of an EPUB file one spine item (or chapter) at a time
+        
+        Takes the same options as extract_text. With chapters, each segment is
+        a 'chapter' labelled with its table-of-contents title and numbered by
+        its 1-based position in the table of contents; text before the first
+        entry is chapter 0, labelled with its content file. The table of
+        contents is read once, and content files are still parsed only once each.
+        
+        Returns:
+            Iterator[TextSegment]: Cleaned text of each non-empty spine item or chapter, in reading order
+        """
+        yield from limit_chars(self._iter_spine_items(epub_path, progress_callback, item_range, stats, chapters),
+                               max_chars)
+    
+    def _iter_spine_items(self, epub_path: str, progress_callback: Optional[Callable[[int, str], None]] = None,
+                          item_range: Optional[PageRange] = None, stats: Optional[dict] = None,
+                          chapters: bool = False) -> Iterator[TextSegment]:
+        """Yield the cleaned text of each selected spine item, or of each chapter"""
         try:
             if progress_callback:
                 progress_callback(20, "Opening EPUB file...")
             
             with zipfile.ZipFile(epub_path, 'r') as zip_file:
+                # DRM-encrypted content would only decode to garbage, so it is not read at all
+                scheme = self._drm_scheme(zip_file)
+                if scheme:
+                    self.logger.warning(f"{epub_path} is DRM-protected ({scheme}), skipping")
+                    if stats is not None:
+                        stats['reason'] = REASON_DRM
+                    return
+                
                 # Find OPF file
                 opf_path = self._find_opf_path(zip_file)
                 if not opf_path:
                     self.logger.error(f"Could not find OPF file in {epub_path}")
-                    return ""
+                    return
                 
                 if progress_callback:
                     progress_callback(30, "Reading OPF file...")
@@ -52,48 +155,333 @@ class EpubProcessor:
                 spine_items = self._parse_opf_spine(zip_file, opf_path)
                 if not spine_items:
                     self.logger.error(f"Could not parse spine from OPF file in {epub_path}")
-                    return ""
+                    return
                 
                 if progress_callback:
                     progress_callback(40, f"Found {len(spine_items)} content files...")
                 
-                # Extract text from each spine item
-                text_content = []
-                total_items = len(spine_items)
-                
-                for i, item_path in enumerate(spine_items):
-                    try:
-                        if progress_callback:
-                            progress = 40 + int((i / total_items) * 40)
-                            progress_callback(progress, f"Processing {Path(item_path).name}...")
-                        
-                        # Read content file
-                        content = zip_file.read(item_path).decode('utf-8', errors='ignore')
-                        
-                        # Extract text using BeautifulSoup
-                        soup = BeautifulSoup(content, 'html.parser')
-                        text = soup.get_text(separator='\n', strip=True)
-                        
-                        if text:
-                            # Clean the text
-                            cleaned_text = self._clean_text(text)
-                            if cleaned_text:
-                                text_content.append(cleaned_text)
-                    
-                    except Exception as e:
-                        self.logger.warning(f"Error processing content file {item_path}: {str(e)}")
-                        continue
+                # Extract text from each selected spine item; the others are never decompressed
+                selected = range_indexes(item_range, len(spine_items))
+                
+                if not chapters:
+                    yield from self._iter_items(zip_file, spine_items, selected, progress_callback, stats)
+                    return
                 
+                # Mark where each table-of-contents entry starts, then regroup the text by entry
+                entries = self._parse_toc(zip_file, opf_path)
+                if not entries:
+                    yield from self._iter_items(zip_file, spine_items, selected, progress_callback, stats)
+                    return
+                marks, first_entry = self._chapter_marks(entries, spine_items, selected)
                 if progress_callback:
-                    progress_callback(90, "Finalizing text extraction...")
+                    progress_callback(40, f"Found {len(entries)} table of contents entries...")
                 
-                result = '\n\n'.join(text_content)
-                self.logger.info(f"Successfully extracted {len(result)} characters from {epub_path}")
-                return result
+                items = self._iter_items(zip_file, spine_items, selected, progress_callback, stats, marks)
+                yield from self._iter_chapters(items, [title for _, _, title in entries], first_entry)
                 
         except Exception as e:
             self.logger.error(f"Error extracting text from EPUB {epub_path}: {str(e)}")
-            return ""
+    
+    def _iter_items(self, zip_file: zipfile.ZipFile, spine_items: List[str], selected: List[int],
+                    progress_callback: Optional[Callable[[int, str], None]] = None, stats: Optional[dict] = None,
+                    marks: Optional[Dict[int, List[Tuple[int, str]]]] = None) -> Iterator[TextSegment]:
+        """Yield the cleaned text of the selected spine items, with chapter marks inserted"""
+        total_items = len(selected)
+        
+        for position, i in enumerate(selected):
+            item_path = spine_items[i]
+            cleaned_text = ""
+            if stats is not None:
+                stats['pages'] = stats.get('pages', 0) + 1
+                stats['backend'] = 'epub'
+            try:
+                if progress_callback:
+                    progress = 40 + int((position / total_items) * 40)
+                    progress_callback(progress, f"Processing {Path(item_path).name}...")
+                
+                item_marks = marks.get(i, []) if marks else []
+                if zip_file.getinfo(item_path).file_size > STREAM_MIN_BYTES:
+                    yield from self._iter_streamed_item(zip_file, i, item_path, item_marks)
+                    continue
+                
+                data = zip_file.read(item_path)
+                
+                # Wrappers around an image (comics, manga, scans) are recognised from
+                # their raw markup and never parsed
+                if len(data) <= PRESCAN_MAX_BYTES:
+                    textless = self._prescan(data)
+                    if textless is not None:
+                        if stats is not None and textless == 'image':
+                            stats['image_pages_skipped'] = stats.get('image_pages_skipped', 0) + 1
+                        cleaned_text = '\n'.join(CHAPTER_MARK.format(entry) for entry, _ in item_marks)
+                        if cleaned_text:
+                            yield TextSegment('item', i + 1, item_path, cleaned_text)
+                        continue
+                
+                # Read content file in its declared or detected encoding
+                content = decode_markup(data)
+                
+                # Extract text using BeautifulSoup
+                soup = BeautifulSoup(content, 'html.parser')
+                starts = self._insert_marks(soup, item_marks)
+                text = soup.get_text(separator='\n', strip=True)
+                
+                # Clean the text
+                cleaned_text = self._clean_text('\n'.join(starts + [text]))
+            
+            except Exception as e:
+                self.logger.warning("Error processing content file %s: %s", item_path, e)
+                continue
+            
+            if cleaned_text:
+                yield TextSegment('item', i + 1, item_path, cleaned_text)
+    
+    def _iter_streamed_item(self, zip_file: zipfile.ZipFile, i: int, item_path: str,
+                            item_marks: List[Tuple[int, str]]) -> Iterator[TextSegment]:
+        """Parse a large content file as it is decompressed, yielding its text in continued segments"""
+        self.logger.debug("Streaming large content file %s", item_path)
+        starts = [CHAPTER_MARK.format(entry) for entry, fragment in item_marks if not fragment]
+        anchors = {fragment: CHAPTER_MARK.format(entry) for entry, fragment in item_marks if fragment}
+        
+        with zip_file.open(item_path) as stream:
+            chunks = iter_text_chunks(iter_decoded_markup(stream), anchors, starts)
+            for position, text in enumerate(chunks):
+                yield TextSegment('item', i + 1, item_path, text, continued=position > 0)
+    
+    def _prescan(self, data: bytes) -> Optional[str]:
+        """Tell from raw markup whether a content file has no text: 'image', 'empty', or None if it may have text"""
+        has_image = IMAGE_TAG_PATTERN.search(data) is not None
+        # The <title> of an image page is a caption like 'Page 12', not text of the book
+        markup = HEAD_PATTERN.sub(b'', data) if has_image else data
+        if MARKUP_PATTERN.sub(b'', markup).strip():
+            return None
+        return 'image' if has_image else 'empty'
+    
+    def _insert_marks(self, soup: BeautifulSoup, item_marks: List[Tuple[int, str]]) -> List[str]:
+        """Insert chapter marks before their anchors; return the marks belonging at the start of the file"""
+        starts = []
+        for entry, fragment in item_marks:
+            element = None
+            if fragment:
+                element = soup.find(id=fragment) or soup.find(attrs={'name': fragment})
+                if element is None:
+                    self.logger.debug("Table of contents anchor #%s not found, using start of file", fragment)
+            if element is None:
+                starts.append(CHAPTER_MARK.format(entry))
+            else:
+                element.insert_before(CHAPTER_MARK.format(entry))
+        return starts
+    
+    def _iter_chapters(self, items: Iterable[TextSegment], titles: List[str],
+                       first_entry: Optional[int]) -> Iterator[TextSegment]:
+        """Regroup the marked text of spine items into one segment per chapter"""
+        entry = first_entry
+        label = titles[entry] if entry is not None else None
+        lines: List[str] = []
+        chars = 0
+        # Part of the current chapter was already yielded, so the rest continues it
+        continued = False
+        
+        def chapter_segment(final: bool) -> TextSegment:
+            text = '\n'.join(lines)
+            text = text if continued else text.lstrip('\n')
+            return TextSegment('chapter', entry + 1 if entry is not None else 0, label,
+                               text.rstrip('\n') if final else text, continued)
+        
+        for item in items:
+            # Long chapters are yielded in pieces rather than held whole in memory
+            if chars >= STREAM_TEXT_CHARS and any(lines):
+                yield chapter_segment(False)
+                lines = []
+                chars = 0
+                continued = True
+            
+            # Content files within a chapter stay separated by a blank line, as in the TXT output
+            if (lines or continued) and not item.continued:
+                lines.append('')
+            for line in item.text.split('\n'):
+                match = CHAPTER_MARK_PATTERN.fullmatch(line)
+                if match is None:
+                    if label is None:
+                        label = item.label
+                    lines.append(line)
+                    chars += len(line) + 1
+                    continue
+                
+                # A new entry starts; entries with no text of their own (e.g. a part
+                # title followed directly by its first chapter) give way to the next
+                if any(lines):
+                    yield chapter_segment(True)
+                lines = []
+                chars = 0
+                continued = False
+                entry = int(match.group(1))
+                label = titles[entry]
+        
+        if any(lines):
+            yield chapter_segment(True)
+    
+    def _chapter_marks(self, entries: List[TocEntry], spine_items: List[str],
+                       selected: List[int]) -> Tuple[Dict[int, List[Tuple[int, str]]], Optional[int]]:
+        """Map table-of-contents entries to spine positions; also find the entry open when the selection starts"""
+        positions = {posixpath.normpath(unquote(item_path)): i for i, item_path in enumerate(spine_items)}
+        marks: Dict[int, List[Tuple[int, str]]] = {}
+        first_entry = None
+        first_position = -1
+        start = selected[0] if selected else 0
+        
+        for entry, (item_path, fragment, _) in enumerate(entries):
+            position = positions.get(item_path)
+            if position is None:
+                continue
+            marks.setdefault(position, []).append((entry, fragment))
+            if first_position <= position < start:
+                first_position = position
+                first_entry = entry
+        
+        return marks, first_entry
+    
+    def _parse_toc(self, zip_file: zipfile.ZipFile, opf_path: str) -> List[TocEntry]:
+        """Parse the nav document (EPUB 3) or NCX (EPUB 2) into entries in table-of-contents order"""
+        try:
+            root = ET.fromstring(zip_file.read(opf_path))
+            opf_dir = posixpath.dirname(opf_path)
+            
+            # Find the nav document and the NCX in the manifest
+            nav_path = None
+            ncx_path = None
+            manifest = {}
+            for item in root.findall('.//opf:item', self.namespaces):
+                href = item.get('href')
+                if not href:
+                    continue
+                item_path = posixpath.normpath(posixpath.join(opf_dir, unquote(href)))
+                manifest[item.get('id')] = item_path
+                if 'nav' in (item.get('properties') or '').split():
+                    nav_path = item_path
+                elif item.get('media-type') == NCX_MEDIA_TYPE:
+                    ncx_path = item_path
+            
+            spine = root.find('.//opf:spine', self.namespaces)
+            if spine is not None and spine.get('toc') in manifest:
+                ncx_path = manifest[spine.get('toc')]
+            
+            entries = self._parse_nav(zip_file, nav_path) if nav_path else []
+            if not entries and ncx_path:
+                entries = self._parse_ncx(zip_file, ncx_path)
+            if not entries:
+                self.logger.warning("No table of contents found in %s, splitting by content file", opf_path)
+            return entries
+            
+        except Exception as e:
+            self.logger.warning(f"Error parsing table of contents: {str(e)}")
+            return []
+    
+    def _parse_nav(self, zip_file: zipfile.ZipFile, nav_path: str) -> List[TocEntry]:
+        """Parse the toc nav element of an EPUB 3 navigation document"""
+        soup = BeautifulSoup(decode_markup(zip_file.read(nav_path)), 'html.parser')
+        navs = soup.find_all('nav')
+        toc = next((nav for nav in navs if 'toc' in (nav.get('epub:type') or '').split()), navs[0] if navs else None)
+        if toc is None:
+            return []
+        return [self._toc_entry(nav_path, link['href'], link.get_text(' ', strip=True))
+                for link in toc.find_all('a', href=True)]
+    
+    def _parse_ncx(self, zip_file: zipfile.ZipFile, ncx_path: str) -> List[TocEntry]:
+        """Parse the navPoints of an EPUB 2 NCX, nested ones included, in document order"""
+        root = ET.fromstring(zip_file.read(ncx_path))
+        entries = []
+        for nav_point in root.iter(f"{{{self.namespaces['ncx']}}}navPoint"):
+            content = nav_point.find('ncx:content', self.namespaces)
+            if content is None or not content.get('src'):
+                continue
+            label = nav_point.find('ncx:navLabel/ncx:text', self.namespaces)
+            title = label.text if label is not None and label.text else ''
+            entries.append(self._toc_entry(ncx_path, content.get('src'), title))
+        return entries
+    
+    def _toc_entry(self, toc_path: str, href: str, title: str) -> TocEntry:
+        """Resolve a table-of-contents link relative to the file it appears in"""
+        href, _, fragment = href.partition('#')
+        item_path = posixpath.normpath(posixpath.join(posixpath.dirname(toc_path), unquote(href))) if href else toc_path
+        title = ' '.join(title.split()) or item_path
+        return item_path, unquote(fragment), title
+    
+    def probe(self, epub_path: str) -> dict:
+        """
+        Inspect an EPUB without extracting it
+        
+        Only the container, the OPF and up to PROBE_SAMPLE_ITEMS spine items
+        are read; the text size of the rest is extrapolated from their
+        uncompressed sizes.
+        
+        Args:
+            epub_path: Path to EPUB file
+            
+        Returns:
+            dict: 'type', 'pages' (spine length), 'encrypted', 'has_text_layer',
+                  'estimated_chars', 'metadata' and 'error'
+        """
+        info = {
+            'type': 'epub',
+            'pages': 0,
+            'encrypted': False,
+            'has_text_layer': False,
+            'estimated_chars': 0,
+            'metadata': self.get_metadata(epub_path),
+            'error': ''
+        }
+        
+        try:
+            with zipfile.ZipFile(epub_path, 'r') as zip_file:
+                names = set(zip_file.namelist())
+                info['encrypted'] = bool(self._drm_scheme(zip_file))
+                
+                opf_path = self._find_opf_path(zip_file)
+                spine_items = self._parse_opf_spine(zip_file, opf_path) if opf_path else []
+                spine_items = [item_path for item_path in spine_items if item_path in names]
+                info['pages'] = len(spine_items)
+                if not spine_items or info['encrypted']:
+                    return info
+                
+                total_bytes = sum(zip_file.getinfo(item_path).file_size for item_path in spine_items)
+                sample_bytes = 0
+                sample_chars = 0
+                count = min(PROBE_SAMPLE_ITEMS, len(spine_items))
+                for k in range(count):
+                    item_path = spine_items[len(spine_items) * (k + 1) // (count + 1)]
+                    data = zip_file.read(item_path)
+                    text = BeautifulSoup(decode_markup(data), 'html.parser').get_text(separator='\n', strip=True)
+                    sample_bytes += len(data)
+                    sample_chars += len(self._clean_text(text))
+                
+                if sample_bytes:
+                    info['estimated_chars'] = sample_chars * total_bytes // sample_bytes
+                info['has_text_layer'] = sample_chars > 0
+                
+        except Exception as e:
+            self.logger.warning(f"Error probing {epub_path}: {str(e)}")
+            info['error'] = str(e)
+        
+        return info
+    
+    def _drm_scheme(self, zip_file: zipfile.ZipFile) -> str:
+        """Name the DRM protecting an EPUB's content, or '' if its content is readable"""
+        names = set(zip_file.namelist())
+        for marker, scheme in DRM_MARKERS.items():
+            if marker in names:
+                return scheme
+        if 'META-INF/encryption.xml' in names and self._has_content_encryption(zip_file):
+            return 'encrypted content'
+        return ''
+    
+    def _has_content_encryption(self, zip_file: zipfile.ZipFile) -> bool:
+        """Check whether encryption.xml encrypts anything beyond obfuscated fonts"""
+        root = ET.fromstring(zip_file.read('META-INF/encryption.xml'))
+        for method in root.iter():
+            if method.tag.endswith('EncryptionMethod') and method.get('Algorithm') not in FONT_OBFUSCATION_ALGORITHMS:
+                return True
+        return False
     
     def _find_opf_path(self, zip_file: zipfile.ZipFile) -> Optional[str]:
         """Find the OPF file path in the EPUB"""
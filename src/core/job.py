@@ -0,0 +1,232 @@
+"""
+Per-call conversion options and statistics
+"""
+
+import os
+from contextlib import nullcontext
+from pathlib import Path
+from typing import ContextManager, Dict, List, NamedTuple, Optional, TextIO, Union
+
+from utils import app_logger
+from utils.resources import get_rss_bytes
+from .metrics import JobMetrics
+from .profiling import DocumentProfiler
+from .results import ResultTable
+from .search_index import SearchIndex, SegmentSpan
+from .selection import PageRange
+
+
+class ConversionOptions(NamedTuple):
+    """
+    Options of one conversion call
+
+    Immutable, so a single instance can be shared by any number of threads
+    and pickled to worker processes; use _replace() to derive variants.
+    """
+
+    preserve_structure: bool = True
+    skip_existing: bool = True
+    pdf_layout: bool = False
+    strip_boilerplate: bool = False
+    low_memory: bool = False
+    deduplicate: bool = True
+    output_encoding: str = 'utf-8'
+    # Pages of a PDF, or spine items of an EPUB, to extract (None for all)
+    page_range: Optional[PageRange] = None
+    # Stop extracting a document after this many characters (None for no limit)
+    max_chars: Optional[int] = None
+    # Split EPUB text at the chapters of the table of contents instead of at content files
+    epub_chapters: bool = False
+    # Worker processes used by convert_directory and convert_batch (1 converts in this process)
+    max_workers: int = 1
+    # Profiling mode, one of core.profiling.PROFILE_MODES ('' for none)
+    profile: str = ''
+    # Keep the profiles of this many slowest documents
+    profile_top: int = 5
+    # Also keep the profile of every document taking at least this many seconds (0 to disable)
+    profile_threshold: float = 0.0
+    # Output format, one of core.chunker.OUTPUT_FORMATS
+    output_format: str = 'txt'
+    # Characters per JSONL chunk, characters repeated between consecutive chunks,
+    # and whether chunks end at sentence boundaries where possible
+    chunk_size: int = 2000
+    chunk_overlap: int = 200
+    chunk_sentences: bool = True
+    # PDF pages per file of split output
+    split_pages: int = 1
+    # Full-text search index to add converted documents to ('' for none)
+    index_path: str = ''
+    # Tokenizer of a new search index, one of core.search_index.TOKENIZERS
+    index_tokenizer: str = 'unicode61'
+
+
+class ConversionJob:
+    """
+    State of one convert_file, convert_directory or convert_batch call
+
+    Each call works on its own job, so calls on a shared converter never
+    touch each other's counters. A job belongs to one call at a time.
+    """
+
+    def __init__(self, options: Optional[ConversionOptions] = None, total_files: int = 0):
+        self.options = options or ConversionOptions()
+        # Batch counters not tied to a single file
+        self.stats = {
+            'total_files': total_files,
+            'boilerplate_bytes_removed': 0,
+            'image_pages_skipped': 0,
+            'peak_rss_bytes': get_rss_bytes()
+        }
+        # One record per file, from which totals are derived
+        self.results = ResultTable()
+        # What is running now, for live dashboards (see live_statistics)
+        self.metrics = JobMetrics()
+        # Profiles of the slowest documents, when profiling is on
+        self.profiler = None
+        if self.options.profile:
+            self.profiler = DocumentProfiler(self.options.profile, self.options.profile_top,
+                                             self.options.profile_threshold)
+        # Search index, opened on first use by the thread running the call
+        self.index: Optional[SearchIndex] = None
+        self._index_failed = False
+
+    def profile(self, input_file: Path) -> ContextManager:
+        """
+        Profile the conversion of a document, if profiling is on
+
+        Args:
+            input_file: Input file
+
+        Returns:
+            ContextManager: Context wrapping the document's conversion
+        """
+        if self.profiler is None:
+            return nullcontext()
+        return self.profiler.document(str(input_file))
+
+    def write_profiles(self, output_dir: Path) -> Dict[str, Path]:
+        """
+        Write the kept profiles next to the conversion output
+
+        Args:
+            output_dir: Output folder of the conversion
+
+        Returns:
+            Dict[str, Path]: Profile file of each kept input path
+        """
+        if self.profiler is None:
+            return {}
+        return self.profiler.write(output_dir)
+
+    def index_document(self, input_file: Path, output_file: Path, text: Union[str, TextIO],
+                       spans: List[SegmentSpan]):
+        """
+        Add a converted document to the search index, if indexing is on
+
+        Args:
+            input_file: Input file
+            output_file: TXT output written from text
+            text: Text of the output, or a text file of it positioned at its start
+            spans: Span of each page or spine item in text
+        """
+        if self._open_index():
+            self.index.add_document(str(input_file), str(output_file), text, spans)
+
+    def index_duplicate(self, original: Path, duplicate: Path, output_file: Path):
+        """
+        Index a duplicate input under its own path with its original's entries, if indexing is on
+
+        Args:
+            original: Input file whose output the duplicate shares
+            duplicate: Input file with the same content
+            output_file: Output of the duplicate
+        """
+        if self._open_index():
+            self.index.copy_document(str(original), str(duplicate), str(output_file))
+
+    def _open_index(self) -> bool:
+        """Open the search index on first use; False if indexing is off or the index cannot be opened"""
+        if not self.options.index_path or self._index_failed:
+            return False
+        if self.index is None:
+            try:
+                self.index = SearchIndex(self.options.index_path, self.options.index_tokenizer)
+            except Exception as e:
+                self._index_failed = True
+                app_logger.get_logger().error(f"Could not open search index {self.options.index_path}: {str(e)}")
+                return False
+        return True
+
+    def close(self):
+        """Release resources held for the call, such as the search index connection"""
+        self.metrics.close()
+        if self.index is not None:
+            self.index.close()
+            self.index = None
+
+    def record(self, input_file: Path, status: str, duration: float = 0.0,
+               output_file: Optional[Path] = None, file_stats: Optional[dict] = None):
+        """
+        Record a file's outcome and fold its extraction counters into the batch counters
+
+        Args:
+            input_file: Input file
+            status: One of core.results.STATUSES
+            duration: Seconds spent on the file
+            output_file: Output file, if one was written or kept
+            file_stats: Counters filled in by the processors ('pages', 'backend', 'reason', ...)
+        """
+        file_stats = file_stats or {}
+        self.metrics.finish(input_file)
+        self.stats['boilerplate_bytes_removed'] += file_stats.get('boilerplate_bytes_removed', 0)
+        self.stats['image_pages_skipped'] += file_stats.get('image_pages_skipped', 0)
+        self.stats['peak_rss_bytes'] = max(self.stats['peak_rss_bytes'], file_stats.get('peak_rss_bytes', 0))
+
+        self.results.append(str(input_file), status, duration,
+                            bytes_in=_file_size(input_file),
+                            bytes_out=_output_size(output_file) if output_file else 0,
+                            pages=file_stats.get('pages', 0),
+                            backend=file_stats.get('backend', ''),
+                            reason=file_stats.get('reason', ''))
+
+    def get_statistics(self) -> dict:
+        """
+        Get the statistics of the job
+
+        Returns:
+            dict: Batch counters plus totals derived from the per-file results
+        """
+        statistics = self.stats.copy()
+        statistics.update(self.results.summary())
+        return statistics
+
+    def live_statistics(self) -> dict:
+        """
+        Get throughput, ETA and worker activity of the job while it runs
+
+        Cheap enough to call from another thread about once a second; see
+        core.metrics.JobMetrics.snapshot for the keys.
+
+        Returns:
+            dict: Live statistics
+        """
+        return self.metrics.snapshot(self.results, self.stats['total_files'])
+
+
+def _file_size(file_path: Path) -> int:
+    """Get a file's size, 0 if it cannot be read"""
+    try:
+        return os.stat(file_path).st_size
+    except OSError:
+        return 0
+
+
+def _output_size(output_path: Path) -> int:
+    """Get the size of an output file, or of the files in a split output folder"""
+    if not os.path.isdir(output_path):
+        return _file_size(output_path)
+    try:
+        with os.scandir(output_path) as entries:
+            return sum(_file_size(entry.path) for entry in entries if entry.is_file())
+    except OSError:
+        return 0
@@ -0,0 +1,203 @@
+"""
+Live metrics of a running conversion, for dashboards polling at their own pace
+"""
+
+import queue
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Deque, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from .results import ResultTable
+
+
+# Worker name of files converted in the calling process
+LOCAL_WORKER = 'local'
+
+# Seconds over which the current page rate is measured
+RATE_WINDOW_SECONDS = 10.0
+
+
+class WorkerActivity(NamedTuple):
+    """A file, or a page chunk of a PDF, being converted by a worker"""
+
+    worker: str
+    file_path: str
+    # 0-based chunk number and chunk count of the file
+    part: int
+    parts: int
+    # time.monotonic() when the worker started on it
+    started: float
+    # Counters the processor fills in as it goes ('pages', ...), when readable from
+    # this process; None for worker processes
+    stats: Optional[dict]
+
+
+class JobMetrics:
+    """
+    Live counters of one conversion job
+
+    The conversion only reports when a worker starts or finishes a file (or
+    a PDF chunk), and per-page progress is read from the counters the
+    processors keep anyway, so converting threads pay nothing per page.
+    Rates and the ETA are derived in snapshot(), on the reader's thread, as
+    often as the reader polls.
+    """
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.finished: Optional[float] = None
+        self._lock = threading.Lock()
+        self._active: Dict[Tuple[str, int], WorkerActivity] = {}
+        # Start events of worker processes (see attach_events), and the chunks whose
+        # completion was seen before their start event arrived
+        self._events = None
+        self._done: Set[Tuple[str, int]] = set()
+        # (time, pages) at recent snapshots, for the current page rate
+        self._samples: Deque[Tuple[float, int]] = deque()
+
+    def start(self, file_path: Path, stats: Optional[dict] = None, worker: str = LOCAL_WORKER,
+              part: int = 0, parts: int = 1, started: Optional[float] = None):
+        """
+        Record that a worker started on a file or PDF chunk
+
+        Args:
+            file_path: Input file
+            stats: Counters the processor updates for the file, read for live page counts
+            worker: Name of the worker
+            part: 0-based chunk number
+            parts: Chunk count of the file
+            started: time.monotonic() of the start (default: now)
+        """
+        key = (str(file_path), part)
+        activity = WorkerActivity(worker, str(file_path), part, parts,
+                                  started if started is not None else time.monotonic(), stats)
+        with self._lock:
+            if key in self._done:
+                self._done.discard(key)
+                return
+            # A worker runs one thing at a time, so a new start ends its previous one
+            for other in [other for other, active in self._active.items() if active.worker == worker]:
+                del self._active[other]
+            self._active[key] = activity
+
+    def finish(self, file_path: Path, part: Optional[int] = None):
+        """
+        Record that a file, or one chunk of it, is done
+
+        Args:
+            file_path: Input file
+            part: 0-based chunk number (None for every chunk of the file)
+        """
+        path = str(file_path)
+        with self._lock:
+            if part is None:
+                for key in [key for key in self._active if key[0] == path]:
+                    del self._active[key]
+                return
+            if self._active.pop((path, part), None) is None and self._events is not None:
+                # The worker's start event is still on its way
+                self._done.add((path, part))
+
+    def attach_events(self, events):
+        """
+        Read start events of worker processes from a queue
+
+        Args:
+            events: multiprocessing.Queue receiving (pid, file path, part, parts,
+                    time.time() of the start) tuples, or None to stop reading
+        """
+        with self._lock:
+            self._events = events
+            if events is None:
+                self._done.clear()
+
+    def close(self):
+        """Record that the conversion is over"""
+        self.attach_events(None)
+        with self._lock:
+            self._active.clear()
+            self.finished = time.monotonic()
+
+    def active(self) -> List[WorkerActivity]:
+        """
+        Get what each worker is converting
+
+        Returns:
+            List[WorkerActivity]: Running files and chunks, longest running first
+        """
+        self.read_events()
+        with self._lock:
+            return sorted(self._active.values(), key=lambda activity: activity.started)
+
+    def snapshot(self, results: ResultTable, total_files: int) -> dict:
+        """
+        Derive the live statistics of the job
+
+        Args:
+            results: Per-file results recorded so far
+            total_files: Files of the job
+
+        Returns:
+            dict: 'elapsed', 'total_files', 'done_files', 'successful', 'failed',
+                  'protected', 'skipped', 'duplicates', 'pages', 'files_per_second'
+                  (average), 'pages_per_second' (over the last RATE_WINDOW_SECONDS),
+                  'eta_seconds' (None while unknown), 'cache_hit_rate' (share of
+                  finished files whose output was reused: existing outputs skipped
+                  and duplicates of another input) and 'workers' (WorkerActivity
+                  list, see active())
+        """
+        now = self.finished or time.monotonic()
+        workers = self.active()
+        summary = results.summary()
+        done_files = len(results)
+        # Pages of files still running in this process are counted as they are extracted;
+        # those of worker processes when their file is recorded
+        pages = summary['pages'] + sum(activity.stats.get('pages', 0) for activity in workers
+                                       if activity.stats is not None)
+        elapsed = now - self.started
+
+        with self._lock:
+            self._samples.append((now, pages))
+            while len(self._samples) > 2 and self._samples[1][0] <= now - RATE_WINDOW_SECONDS:
+                self._samples.popleft()
+            first_time, first_pages = self._samples[0]
+
+        files_per_second = done_files / elapsed if elapsed > 0 else 0.0
+        eta_seconds = None
+        if self.finished is not None:
+            eta_seconds = 0.0
+        elif done_files and files_per_second > 0:
+            eta_seconds = max(0, total_files - done_files) / files_per_second
+        reused = summary['skipped'] + summary['duplicates']
+
+        return {
+            'elapsed': elapsed,
+            'total_files': total_files,
+            'done_files': done_files,
+            'successful': summary['successful'],
+            'failed': summary['failed'],
+            'protected': summary['protected'],
+            'skipped': summary['skipped'],
+            'duplicates': summary['duplicates'],
+            'pages': pages,
+            'files_per_second': files_per_second,
+            'pages_per_second': (pages - first_pages) / (now - first_time) if now > first_time else 0.0,
+            'eta_seconds': eta_seconds,
+            'cache_hit_rate': reused / done_files if done_files else 0.0,
+            'workers': workers
+        }
+
+    def read_events(self):
+        """Apply the start events worker processes have sent so far"""
+        events = self._events
+        if events is None:
+            return
+        offset = time.monotonic() - time.time()
+        while True:
+            try:
+                pid, file_path, part, parts, started = events.get_nowait()
+            except (queue.Empty, OSError, ValueError):
+                return
+            self.start(file_path, None, f"pid {pid}", part, parts, started + offset)
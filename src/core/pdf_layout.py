@@ -0,0 +1,156 @@
+"""
+Layout-aware text extraction for PDF pages with multiple columns
+"""
+
+import re
+from bisect import bisect_left
+from itertools import accumulate
+from operator import itemgetter
+from typing import List, Optional
+
+
+# Horizontal resolution of the occupancy histogram, in PDF points
+BUCKET_WIDTH = 2.0
+
+# Narrowest vertical strip of whitespace treated as a column gutter, in points
+MIN_GUTTER_WIDTH = 10.0
+
+# A strip still counts as a gutter if at most this fraction of lines cross it
+# (full-width titles and headers cross the gutter of a two-column page)
+GUTTER_TOLERANCE = 0.1
+
+# Pages with fewer lines than this are never split into columns
+MIN_COLUMN_LINES = 6
+
+# Words whose tops differ by no more than this are on the same line, in points
+LINE_TOLERANCE = 3.0
+
+
+def extract_layout_text(page) -> str:
+    """
+    Extract text from a pdfplumber page in reading order
+
+    Words are grouped into lines, column gutters are found with a coverage
+    histogram over the page width, and each run of lines between full-width
+    lines is emitted column by column.
+
+    Args:
+        page: pdfplumber page object
+
+    Returns:
+        str: Page text in reading order
+    """
+    words = page.extract_words(y_tolerance=LINE_TOLERANCE)
+    if not words:
+        return ""
+
+    lines = _group_lines(words)
+    gutters = _find_gutters(lines, float(page.width))
+    return '\n'.join(_order_lines(lines, gutters))
+
+
+def _group_lines(words: List[dict]) -> List[List[dict]]:
+    """Group words into lines by their top coordinate"""
+    words = sorted(words, key=itemgetter('top'))
+    lines = []
+    current = [words[0]]
+    line_top = words[0]['top']
+
+    for word in words[1:]:
+        if word['top'] - line_top <= LINE_TOLERANCE:
+            current.append(word)
+        else:
+            lines.append(current)
+            current = [word]
+            line_top = word['top']
+    lines.append(current)
+
+    for line in lines:
+        line.sort(key=itemgetter('x0'))
+    return lines
+
+
+def _find_gutters(lines: List[List[dict]], page_width: float) -> List[float]:
+    """Find x positions of column gutters shared by most lines on the page"""
+    if len(lines) < MIN_COLUMN_LINES:
+        return []
+
+    bucket_count = int(page_width / BUCKET_WIDTH) + 2
+    last_bucket = bucket_count - 1
+
+    # Difference array: one increment per word, prefix sum gives line coverage
+    diff = [0] * (bucket_count + 1)
+    for line in lines:
+        for word in line:
+            start = min(max(int(word['x0'] / BUCKET_WIDTH), 0), last_bucket)
+            end = min(max(int(word['x1'] / BUCKET_WIDTH), 0), last_bucket)
+            diff[start] += 1
+            diff[end + 1] -= 1
+    coverage = accumulate(diff[:bucket_count])
+
+    threshold = int(len(lines) * GUTTER_TOLERANCE)
+    occupied = bytes(1 if count > threshold else 0 for count in coverage)
+
+    left = occupied.find(1)
+    right = occupied.rfind(1)
+    if left < 0 or right <= left:
+        return []
+
+    min_buckets = max(1, int(MIN_GUTTER_WIDTH / BUCKET_WIDTH))
+    gap_pattern = re.compile(b'\\x00{%d,}' % min_buckets)
+
+    gutters = []
+    for match in gap_pattern.finditer(occupied, left, right):
+        gutters.append((match.start() + match.end()) / 2 * BUCKET_WIDTH)
+    return gutters
+
+
+def _split_line(line: List[dict], gutters: List[float]) -> Optional[List[tuple]]:
+    """Split a line into (column, words) fragments, or None for full-width lines"""
+    fragments = []
+    current = []
+    current_column = None
+
+    for word in line:
+        start = bisect_left(gutters, word['x0'])
+        if bisect_left(gutters, word['x1']) != start:
+            return None
+        if start != current_column and current:
+            fragments.append((current_column, current))
+            current = []
+        current_column = start
+        current.append(word)
+    if current:
+        fragments.append((current_column, current))
+    return fragments
+
+
+def _line_text(words: List[dict]) -> str:
+    """Join the words of a line"""
+    return ' '.join(word['text'] for word in words)
+
+
+def _order_lines(lines: List[List[dict]], gutters: List[float]) -> List[str]:
+    """Order lines column by column between full-width lines"""
+    if not gutters:
+        return [_line_text(line) for line in lines]
+
+    ordered = []
+    columns = [[] for _ in range(len(gutters) + 1)]
+
+    def flush_columns():
+        for column in columns:
+            ordered.extend(column)
+            column.clear()
+
+    for line in lines:
+        fragments = _split_line(line, gutters)
+        if fragments is None:
+            flush_columns()
+            ordered.append(_line_text(line))
+            continue
+        for column, words in fragments:
+            columns[column].append(_line_text(words))
+
+    flush_columns()
+    return ordered
@@ -4,11 +4,29 @@ PDF processor for extracting text content from PDF files
 
 import PyPDF2
 import pdfplumber
+import sys
+from pdfminer.pdfdocument import PDFEncryptionError
+from pdfminer.pdfpage import PDFPage
+from pdfminer.pdftypes import resolve1
+from pdfplumber.page import Page
 from pathlib import Path
-from typing import Optional, Callable
+from typing import Optional, Callable, Iterator, List
 import logging
 
 from utils import app_logger
+from utils.resources import get_rss_bytes
+from .boilerplate import BoilerplateFilter
+from .pdf_layout import extract_layout_text
+from .results import REASON_ENCRYPTED
+from .selection import PageRange, limit_chars, range_indexes
+from .text_segment import TextSegment
+
+
+# Pages sampled by probe() to detect a text layer and estimate text size
+PROBE_SAMPLE_PAGES = 3
+
+# Characters a sampled page needs before the PDF counts as having a text layer
+TEXT_LAYER_MIN_CHARS = 20
 
 
 class PdfProcessor:
@@ -33,111 +51,264 @@ class PdfProcessor:
             except ImportError:
                 raise ImportError("No PDF processing library found. Please install pdfplumber or PyPDF2.")
     
-    def extract_text(self, pdf_path: str, progress_callback: Optional[Callable[[int, str], None]] = None) -> str:
+    def extract_text(self, pdf_path: str, progress_callback: Optional[Callable[[int, str], None]] = None,
+                     layout: bool = False, strip_boilerplate: bool = False,
+                     low_memory: bool = False, stats: Optional[dict] = None,
+                     page_range: Optional[PageRange] = None, max_chars: Optional[int] = None) -> str:
         """
         Extract text content from PDF file
         
         Args:
             pdf_path: Path to PDF file
             progress_callback: Optional progress callback
+            layout: Use layout-aware extraction (column and reading-order detection)
+            strip_boilerplate: Remove headers, footers and page numbers repeated across pages
+            low_memory: Create pages one at a time and release each page's caches
+                        once it is extracted to bound peak memory
+            stats: Optional statistics dict updated with extraction counters,
+                   'pages' processed, the 'backend' used, a 'reason' if the
+                   file could not be read at all (core.results.REASONS), and the
+                   'pdfplumber_error' and 'pdfplumber_failed_page' if PyPDF2 had
+                   to take over part way through
+            page_range: Optional 1-based (first, last) pages to extract; others are not parsed
+            max_chars: Optional character budget; extraction stops once it is reached
             
         Returns:
             str: Extracted text content
         """
         try:
-            if progress_callback:
-                progress_callback(20, "Opening PDF file...")
-            
-            # Try pdfplumber first (better text extraction)
-            text_content = self._extract_with_pdfplumber(pdf_path, progress_callback)
-            
-            if not text_content:
-                if progress_callback:
-                    progress_callback(30, "Trying alternative extraction method...")
-                # Fallback to PyPDF2
-                text_content = self._extract_with_pypdf2(pdf_path, progress_callback)
+            segments = self.iter_segments(pdf_path, progress_callback, layout, strip_boilerplate,
+                                          low_memory, stats, page_range, max_chars)
+            text_content = '\n\n'.join(segment.text for segment in segments)
             
             if not text_content:
                 self.logger.warning(f"No text content extracted from {pdf_path}")
                 return ""
             
-            self.logger.info(f"Successfully extracted {len(text_content)} characters from {pdf_path}")
+            self.logger.debug("Successfully extracted %d characters from %s", len(text_content), pdf_path)
             return text_content
             
         except Exception as e:
             self.logger.error(f"Error extracting text from PDF {pdf_path}: {str(e)}")
             return ""
     
-    def _extract_with_pdfplumber(self, pdf_path: str, progress_callback: Optional[Callable[[int, str], None]] = None) -> str:
-        """Extract text using pdfplumber (preferred method)"""
+    def iter_segments(self, pdf_path: str, progress_callback: Optional[Callable[[int, str], None]] = None,
+                      layout: bool = False, strip_boilerplate: bool = False,
+                      low_memory: bool = False, stats: Optional[dict] = None,
+                      page_range: Optional[PageRange] = None,
+                      max_chars: Optional[int] = None) -> Iterator[TextSegment]:
+        """
+        Stream the text of a PDF file one page at a time
+        
+        Takes the same options as extract_text.
+        
+        Returns:
+            Iterator[TextSegment]: Cleaned text of each non-empty page, in page order
+        """
+        if progress_callback:
+            progress_callback(20, "Opening PDF file...")
+        
+        pages = self._iter_pages(pdf_path, progress_callback, layout, low_memory, stats, page_range)
+        
+        if not strip_boilerplate:
+            yield from limit_chars(pages, max_chars)
+            return
+        
+        boilerplate = BoilerplateFilter()
+        filtered = (segment for segment in boilerplate.filter_pages(pages) if segment.text.strip())
+        yield from limit_chars(filtered, max_chars)
+        
+        if boilerplate.lines_removed:
+            self.logger.info(f"Removed {boilerplate.lines_removed} header/footer lines "
+                             f"({boilerplate.bytes_removed} bytes) from {pdf_path}")
+        if stats is not None:
+            stats['boilerplate_bytes_removed'] = (stats.get('boilerplate_bytes_removed', 0)
+                                                  + boilerplate.bytes_removed)
+    
+    def _iter_pages(self, pdf_path: str, progress_callback: Optional[Callable[[int, str], None]] = None,
+                    layout: bool = False, low_memory: bool = False,
+                    stats: Optional[dict] = None, page_range: Optional[PageRange] = None) -> Iterator[TextSegment]:
+        """Yield cleaned page segments, falling back to PyPDF2 where pdfplumber fails or yields nothing"""
+        stats = stats if stats is not None else {}
+        produced = False
+        
+        # Try pdfplumber first (better text extraction)
+        for segment in self._iter_pdfplumber_pages(pdf_path, progress_callback, layout, low_memory, stats,
+                                                   page_range):
+            produced = True
+            yield segment
+        
+        if produced and stats.get('pdfplumber_failed_page'):
+            # Keep the pages already extracted and read the rest of the range with PyPDF2
+            if progress_callback:
+                progress_callback(80, "Continuing with alternative extraction method...")
+            last_page = page_range[1] if page_range else None
+            yield from self._iter_pypdf2_pages(pdf_path, progress_callback,
+                                               (stats['pdfplumber_failed_page'], last_page), stats)
+            stats['backend'] = 'pdfplumber+PyPDF2'
+        # A password-protected file fails as it is opened; PyPDF2 would fail the same way
+        elif not produced and not stats.get('reason'):
+            stats['pages'] = 0
+            if progress_callback:
+                progress_callback(30, "Trying alternative extraction method...")
+            # Fallback to PyPDF2
+            yield from self._iter_pypdf2_pages(pdf_path, progress_callback, page_range, stats)
+    
+    def _iter_pdfplumber_pages(self, pdf_path: str, progress_callback: Optional[Callable[[int, str], None]] = None,
+                               layout: bool = False, low_memory: bool = False,
+                               stats: Optional[dict] = None,
+                               page_range: Optional[PageRange] = None) -> Iterator[TextSegment]:
+        """Extract page segments using pdfplumber (preferred method)"""
+        # Pages outside the range are never given a Page object, so their content is not parsed
+        selected = range(page_range[0], (page_range[1] or sys.maxsize) + 1) if page_range else None
+        next_page = page_range[0] if page_range else 1
+        
         try:
-            text_content = []
-            
-            with pdfplumber.open(pdf_path) as pdf:
-                total_pages = len(pdf.pages)
+            with pdfplumber.open(pdf_path, pages=selected) as pdf:
+                if low_memory:
+                    # pdf.pages keeps every Page it creates for the life of the document
+                    total_pages = len(range_indexes(page_range, self._count_pages(pdf)))
+                    pages = self._iter_lazy_pages(pdf, selected)
+                else:
+                    total_pages = len(pdf.pages)
+                    pages = pdf.pages
                 
                 if progress_callback:
                     progress_callback(30, f"Processing {total_pages} pages with pdfplumber...")
                 
-                for page_num, page in enumerate(pdf.pages):
-                    try:
-                        page_text = page.extract_text()
-                        if page_text:
-                            # Clean the text
-                            page_text = self._clean_text(page_text)
-                            if page_text.strip():
-                                text_content.append(page_text)
-                        
-                        if progress_callback and total_pages > 0:
-                            progress = 30 + int((page_num / total_pages) * 50)
-                            progress_callback(progress, f"Processing page {page_num + 1}/{total_pages}")
-                    
-                    except Exception as e:
-                        self.logger.warning(f"Error processing page {page_num + 1}: {str(e)}")
-                        continue
+                for position, page in enumerate(pages):
+                    page_text = self._extract_pdfplumber_page(page, position, total_pages,
+                                                              layout, progress_callback)
+                    if low_memory:
+                        self._release_page(page)
+                    self._record_memory(stats)
+                    self._count_page(stats, 'pdfplumber')
+                    next_page = page.page_number + 1
+                    if page_text.strip():
+                        yield TextSegment('page', page.page_number, str(page.page_number), page_text)
             
-            return '\n\n'.join(text_content)
+        except Exception as e:
+            if self._is_encryption_error(e):
+                self.logger.warning(f"{pdf_path} is encrypted and cannot be opened without a password, skipping")
+                if stats is not None:
+                    stats['reason'] = REASON_ENCRYPTED
+                return
+            self.logger.warning(f"pdfplumber extraction failed for {pdf_path} at page {next_page}: {str(e)}")
+            if stats is not None:
+                stats['pdfplumber_error'] = str(e)
+                stats['pdfplumber_failed_page'] = next_page
+    
+    def _is_encryption_error(self, error: Exception) -> bool:
+        """Check whether opening a PDF failed because it needs a password or uses unsupported encryption"""
+        # pdfplumber wraps pdfminer's exceptions in its own
+        return any(isinstance(e, PDFEncryptionError) for e in (error, *error.args))
+    
+    def _extract_pdfplumber_page(self, page, position: int, total_pages: int, layout: bool,
+                                 progress_callback: Optional[Callable[[int, str], None]] = None) -> str:
+        """Extract and clean the text of one pdfplumber page (position counts selected pages)"""
+        try:
+            if layout:
+                page_text = extract_layout_text(page)
+            else:
+                page_text = page.extract_text()
+            # Clean the text
+            page_text = self._clean_text(page_text)
             
+            if progress_callback and total_pages > 0:
+                progress = 30 + int((position / total_pages) * 50)
+                progress_callback(progress, f"Processing page {position + 1}/{total_pages}")
+            
+            self.logger.debug("Extracted page %d: %d characters", page.page_number, len(page_text))
+            return page_text
+        
         except Exception as e:
-            self.logger.warning(f"pdfplumber extraction failed for {pdf_path}: {str(e)}")
+            self.logger.warning("Error processing page %d: %s", page.page_number, e)
             return ""
     
-    def _extract_with_pypdf2(self, pdf_path: str, progress_callback: Optional[Callable[[int, str], None]] = None) -> str:
-        """Extract text using PyPDF2 (fallback method)"""
+    def _release_page(self, page):
+        """Drop the parsed objects cached on a pdfplumber page"""
+        try:
+            if hasattr(page, 'close'):
+                page.close()
+            else:
+                page.flush_cache()
+        except Exception as e:
+            self.logger.debug("Could not release page cache: %s", e)
+    
+    def _iter_lazy_pages(self, pdf, selected: Optional[range]) -> Iterator[Page]:
+        """Create the selected pdfplumber pages one at a time, walking the page tree as they are needed"""
+        doctop = 0
+        for page_number, page_obj in enumerate(PDFPage.create_pages(pdf.doc), 1):
+            if selected is not None and page_number not in selected:
+                if page_number >= selected.stop:
+                    return
+                continue
+            page = Page(pdf, page_obj, page_number=page_number, initial_doctop=doctop)
+            doctop += page.height
+            yield page
+    
+    def _count_pages(self, pdf) -> int:
+        """Read the page count from the page tree root without creating any pages"""
+        try:
+            return int(resolve1(resolve1(pdf.doc.catalog['Pages'])['Count']))
+        except Exception as e:
+            self.logger.debug("Could not read the page count: %s", e)
+            return 0
+    
+    def _record_memory(self, stats: Optional[dict]):
+        """Track the highest RSS seen while extracting"""
+        if stats is not None:
+            stats['peak_rss_bytes'] = max(stats.get('peak_rss_bytes', 0), get_rss_bytes())
+    
+    def _count_page(self, stats: Optional[dict], backend: str):
+        """Count a processed page and the library that processed it"""
+        if stats is not None:
+            stats['pages'] = stats.get('pages', 0) + 1
+            stats['backend'] = backend
+    
+    def _iter_pypdf2_pages(self, pdf_path: str, progress_callback: Optional[Callable[[int, str], None]] = None,
+                           page_range: Optional[PageRange] = None,
+                           stats: Optional[dict] = None) -> Iterator[TextSegment]:
+        """Extract page segments using PyPDF2 (fallback method)"""
         try:
-            text_content = []
-            
             with open(pdf_path, 'rb') as file:
                 pdf_reader = PyPDF2.PdfReader(file)
-                total_pages = len(pdf_reader.pages)
+                
+                # Encrypted PDFs with an empty user password can still be read
+                if pdf_reader.is_encrypted and not pdf_reader.decrypt(''):
+                    self.logger.warning(f"{pdf_path} is encrypted and cannot be opened without a password, skipping")
+                    if stats is not None:
+                        stats['reason'] = REASON_ENCRYPTED
+                    return
+                
+                selected = range_indexes(page_range, len(pdf_reader.pages))
+                total_pages = len(selected)
                 
                 if progress_callback:
                     progress_callback(30, f"Processing {total_pages} pages with PyPDF2...")
                 
-                for page_num in range(total_pages):
+                for position, page_num in enumerate(selected):
+                    page_text = ""
+                    self._count_page(stats, 'PyPDF2')
                     try:
                         page = pdf_reader.pages[page_num]
                         page_text = page.extract_text()
-                        
-                        if page_text:
-                            # Clean the text
-                            page_text = self._clean_text(page_text)
-                            if page_text.strip():
-                                text_content.append(page_text)
+                        # Clean the text
+                        page_text = self._clean_text(page_text)
                         
                         if progress_callback and total_pages > 0:
-                            progress = 30 + int((page_num / total_pages) * 50)
-                            progress_callback(progress, f"Processing page {page_num + 1}/{total_pages}")
+                            progress = 30 + int((position / total_pages) * 50)
+                            progress_callback(progress, f"Processing page {position + 1}/{total_pages}")
                     
                     except Exception as e:
-                        self.logger.warning(f"Error processing page {page_num + 1}: {str(e)}")
+                        self.logger.warning("Error processing page %d: %s", page_num + 1, e)
                         continue
-            
-            return '\n\n'.join(text_content)
+                    
+                    if page_text.strip():
+                        yield TextSegment('page', page_num + 1, str(page_num + 1), page_text)
             
         except Exception as e:
             self.logger.warning(f"PyPDF2 extraction failed for {pdf_path}: {str(e)}")
-            return ""
     
     def _clean_text(self, text: str) -> str:
         """Clean extracted text"""
@@ -167,42 +338,108 @@ class PdfProcessor:
         Returns:
             dict: PDF metadata
         """
-        metadata = {
-            'title': '',
-            'author': '',
-            'subject': '',
-            'creator': '',
-            'producer': '',
-            'creation_date': '',
-            'modification_date': '',
-            'pages': 0
+        metadata = self._empty_metadata()
+        
+        try:
+            with open(pdf_path, 'rb') as file:
+                self._read_metadata(PyPDF2.PdfReader(file), metadata)
+                
+        except Exception as e:
+            self.logger.warning(f"Error extracting metadata from {pdf_path}: {str(e)}")
+        
+        return metadata
+    
+    def probe(self, pdf_path: str) -> dict:
+        """
+        Inspect a PDF without extracting it
+        
+        Only the cross-reference table, the document info and up to
+        PROBE_SAMPLE_PAGES sample pages are read.
+        
+        Args:
+            pdf_path: Path to PDF file
+            
+        Returns:
+            dict: 'type', 'pages', 'encrypted' (a password is required),
+                  'has_text_layer', 'estimated_chars', 'metadata' and 'error'
+        """
+        info = {
+            'type': 'pdf',
+            'pages': 0,
+            'encrypted': False,
+            'has_text_layer': False,
+            'estimated_chars': 0,
+            'metadata': self._empty_metadata(),
+            'error': ''
         }
         
         try:
             with open(pdf_path, 'rb') as file:
                 pdf_reader = PyPDF2.PdfReader(file)
                 
-                # Page count
-                metadata['pages'] = len(pdf_reader.pages)
+                # Encrypted PDFs with an empty user password can still be read
+                if pdf_reader.is_encrypted and not pdf_reader.decrypt(''):
+                    info['encrypted'] = True
+                    return info
                 
-                # Document metadata
-                if pdf_reader.metadata:
-                    metadata['title'] = str(pdf_reader.metadata.get('/Title', ''))
-                    metadata['author'] = str(pdf_reader.metadata.get('/Author', ''))
-                    metadata['subject'] = str(pdf_reader.metadata.get('/Subject', ''))
-                    metadata['creator'] = str(pdf_reader.metadata.get('/Creator', ''))
-                    metadata['producer'] = str(pdf_reader.metadata.get('/Producer', ''))
-                    
-                    # Dates
-                    creation_date = pdf_reader.metadata.get('/CreationDate')
-                    if creation_date:
-                        metadata['creation_date'] = str(creation_date)
-                    
-                    mod_date = pdf_reader.metadata.get('/ModDate')
-                    if mod_date:
-                        metadata['modification_date'] = str(mod_date)
+                self._read_metadata(pdf_reader, info['metadata'])
+                total_pages = info['metadata']['pages']
+                info['pages'] = total_pages
+                
+                sample_chars = []
+                for page_num in self._sample_page_numbers(total_pages):
+                    try:
+                        sample_chars.append(len(self._clean_text(pdf_reader.pages[page_num].extract_text())))
+                    except Exception as e:
+                        self.logger.debug("Could not sample page %d of %s: %s", page_num + 1, pdf_path, e)
+                        sample_chars.append(0)
+                
+                if sample_chars:
+                    info['has_text_layer'] = max(sample_chars) >= TEXT_LAYER_MIN_CHARS
+                    info['estimated_chars'] = sum(sample_chars) * total_pages // len(sample_chars)
                 
         except Exception as e:
-            self.logger.warning(f"Error extracting metadata from {pdf_path}: {str(e)}")
+            self.logger.warning(f"Error probing {pdf_path}: {str(e)}")
+            info['error'] = str(e)
         
-        return metadata
+        return info
+    
+    def _sample_page_numbers(self, total_pages: int) -> List[int]:
+        """Pick 0-based pages spread evenly through the document, skipping the cover when possible"""
+        count = min(PROBE_SAMPLE_PAGES, total_pages)
+        return sorted({total_pages * (k + 1) // (count + 1) for k in range(count)})
+    
+    def _empty_metadata(self) -> dict:
+        """Create a metadata dict with every field empty"""
+        return {
+            'title': '',
+            'author': '',
+            'subject': '',
+            'creator': '',
+            'producer': '',
+            'creation_date': '',
+            'modification_date': '',
+            'pages': 0
+        }
+    
+    def _read_metadata(self, pdf_reader: PyPDF2.PdfReader, metadata: dict):
+        """Fill a metadata dict from an open PdfReader"""
+        # Page count
+        metadata['pages'] = len(pdf_reader.pages)
+        
+        # Document metadata
+        if pdf_reader.metadata:
+            metadata['title'] = str(pdf_reader.metadata.get('/Title', ''))
+            metadata['author'] = str(pdf_reader.metadata.get('/Author', ''))
+            metadata['subject'] = str(pdf_reader.metadata.get('/Subject', ''))
+            metadata['creator'] = str(pdf_reader.metadata.get('/Creator', ''))
+            metadata['producer'] = str(pdf_reader.metadata.get('/Producer', ''))
+            
+            # Dates
+            creation_date = pdf_reader.metadata.get('/CreationDate')
+            if creation_date:
+                metadata['creation_date'] = str(creation_date)
+            
+            mod_date = pdf_reader.metadata.get('/ModDate')
+            if mod_date:
+                metadata['modification_date'] = str(mod_date)
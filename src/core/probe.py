@@ -0,0 +1,206 @@
+"""
+Fast triage of input documents into a conversion plan
+"""
+
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple, Union
+
+from utils import app_logger
+from .epub_processor import EpubProcessor
+from .pdf_processor import PdfProcessor
+
+
+SUPPORTED_EXTENSIONS = ('.epub', '.pdf')
+
+# Version of the plan layout written by build_plan
+PLAN_VERSION = 1
+
+# Routes a probed file can be given
+ROUTE_EXTRACT = 'extract'
+ROUTE_OCR = 'ocr'
+ROUTE_SKIP = 'skip'
+
+
+class DocumentProber:
+    """Inspects EPUB and PDF files without extracting them"""
+
+    def __init__(self, max_workers: int = 4):
+        """
+        Args:
+            max_workers: Number of files probed at once
+        """
+        self.logger = app_logger.get_logger()
+        self.epub_processor = EpubProcessor()
+        self.pdf_processor = PdfProcessor()
+        self.max_workers = max(1, max_workers)
+
+    def probe_file(self, file_path: Union[str, Path]) -> dict:
+        """
+        Probe a single file
+
+        Args:
+            file_path: Path to an EPUB or PDF file
+
+        Returns:
+            dict: Probe record with 'path', 'type', 'size_bytes', 'pages' (page
+                  count or spine length), 'encrypted', 'has_text_layer',
+                  'estimated_chars', 'title', 'author', 'route', 'reason',
+                  'error' and 'probe_seconds'
+        """
+        start = time.perf_counter()
+        file_path = str(file_path)
+        file_ext = Path(file_path).suffix.lower()
+
+        if file_ext == '.epub':
+            info = self.epub_processor.probe(file_path)
+        elif file_ext == '.pdf':
+            info = self.pdf_processor.probe(file_path)
+        else:
+            info = {'type': file_ext.lstrip('.'), 'pages': 0, 'encrypted': False, 'has_text_layer': False,
+                    'estimated_chars': 0, 'metadata': {}, 'error': f"Unsupported file type: {file_ext}"}
+
+        try:
+            size_bytes = os.stat(file_path).st_size
+        except OSError as e:
+            size_bytes = 0
+            info['error'] = info['error'] or str(e)
+
+        route, reason = self._route(info)
+        return {
+            'path': file_path,
+            'type': info['type'],
+            'size_bytes': size_bytes,
+            'pages': info['pages'],
+            'encrypted': info['encrypted'],
+            'has_text_layer': info['has_text_layer'],
+            'estimated_chars': info['estimated_chars'],
+            'title': info['metadata'].get('title', ''),
+            'author': info['metadata'].get('author', ''),
+            'route': route,
+            'reason': reason,
+            'error': info['error'],
+            'probe_seconds': round(time.perf_counter() - start, 4)
+        }
+
+    def probe_files(self, files: Iterable[Union[str, Path]]) -> List[dict]:
+        """
+        Probe files in parallel
+
+        Args:
+            files: Paths to EPUB or PDF files
+
+        Returns:
+            List[dict]: Probe records, in the order of the input
+        """
+        files = list(files)
+        if len(files) < 2 or self.max_workers == 1:
+            return [self.probe_file(file_path) for file_path in files]
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(files)),
+                                thread_name_prefix='probe-worker') as executor:
+            return list(executor.map(self.probe_file, files))
+
+    def build_plan(self, input_path: Union[str, Path]) -> dict:
+        """
+        Probe a file or every supported file under a folder and build a plan
+
+        Files are listed largest estimated text first, the order in which a
+        scheduler should start them.
+
+        Args:
+            input_path: EPUB/PDF file or folder
+
+        Returns:
+            dict: Plan with 'version', 'created', 'input', 'summary' and 'files'
+        """
+        input_path = Path(input_path)
+        if input_path.is_file():
+            files = [input_path]
+        else:
+            files = sorted(file_path for file_path in input_path.rglob('*')
+                           if file_path.suffix.lower() in SUPPORTED_EXTENSIONS and file_path.is_file())
+
+        start = time.perf_counter()
+        records = self.probe_files(files)
+        records.sort(key=lambda record: (-record['estimated_chars'], -record['size_bytes'], record['path']))
+
+        routes: Dict[str, int] = {ROUTE_EXTRACT: 0, ROUTE_OCR: 0, ROUTE_SKIP: 0}
+        for record in records:
+            routes[record['route']] += 1
+
+        elapsed = time.perf_counter() - start
+        self.logger.info(f"Probed {len(records)} files in {elapsed:.2f}s: {routes[ROUTE_EXTRACT]} to extract, "
+                         f"{routes[ROUTE_OCR]} image-only, {routes[ROUTE_SKIP]} skipped")
+
+        return {
+            'version': PLAN_VERSION,
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'input': str(input_path),
+            'summary': {
+                'total_files': len(records),
+                'total_bytes': sum(record['size_bytes'] for record in records),
+                'total_pages': sum(record['pages'] for record in records),
+                'estimated_chars': sum(record['estimated_chars'] for record in records),
+                'routes': routes,
+                'probe_seconds': round(elapsed, 3)
+            },
+            'files': records
+        }
+
+    def write_plan(self, plan: dict, plan_path: Union[str, Path]) -> bool:
+        """
+        Save a plan as JSON
+
+        Args:
+            plan: Plan from build_plan
+            plan_path: Output file path
+
+        Returns:
+            bool: True if successful
+        """
+        try:
+            with open(plan_path, 'w', encoding='utf-8') as f:
+                json.dump(plan, f, indent=2, ensure_ascii=False)
+                f.write('\n')
+            self.logger.info(f"Plan written to {plan_path}")
+            return True
+        except Exception as e:
+            self.logger.error(f"Error writing plan {plan_path}: {str(e)}")
+            return False
+
+    def _route(self, info: dict) -> Tuple[str, str]:
+        """Decide how a probed file should be handled, and why"""
+        if info['error']:
+            return ROUTE_SKIP, 'unreadable'
+        if info['encrypted']:
+            return ROUTE_SKIP, 'encrypted'
+        if not info['pages']:
+            return ROUTE_SKIP, 'empty'
+        if not info['has_text_layer']:
+            return ROUTE_OCR, 'no text layer'
+        return ROUTE_EXTRACT, ''
+
+
+def load_plan(plan_path: Union[str, Path]) -> dict:
+    """
+    Load a plan written by DocumentProber.write_plan
+
+    Args:
+        plan_path: Plan file path
+
+    Returns:
+        dict: Plan
+
+    Raises:
+        ValueError: If the file is not a plan of a supported version
+    """
+    with open(plan_path, 'r', encoding='utf-8') as f:
+        plan = json.load(f)
+    if not isinstance(plan, dict) or plan.get('version') != PLAN_VERSION or 'files' not in plan:
+        raise ValueError(f"Not a conversion plan (version {PLAN_VERSION}): {plan_path}")
+    return plan
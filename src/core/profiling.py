@@ -0,0 +1,294 @@
+"""
+Per-document profiling of slow conversions
+"""
+
+import cProfile
+import hashlib
+import heapq
+import json
+import marshal
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from utils import app_logger
+
+
+# Profiling modes: statistical stack sampling (cheap enough to leave on) or
+# deterministic cProfile (exact call counts, but slows extraction down several times)
+PROFILE_SAMPLE = 'sample'
+PROFILE_CPROFILE = 'cprofile'
+PROFILE_MODES = (PROFILE_SAMPLE, PROFILE_CPROFILE)
+
+# Seconds between stack samples
+SAMPLE_INTERVAL = 0.01
+
+# Folder, next to the conversion report, that profiles are written to
+PROFILES_DIR = 'profiles'
+
+# (function name, file, first line) of a sampled frame
+FrameKey = Tuple[str, str, int]
+
+
+class StackSampler:
+    """
+    Samples the Python stacks of registered threads from one background thread
+
+    The sampling thread only runs while at least one thread is registered and
+    only records the threads it was asked to watch, so concurrent conversions
+    on other threads are unaffected.
+    """
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._tracked: Dict[int, Counter] = {}
+        self._thread: Optional[threading.Thread] = None
+
+    @contextmanager
+    def track(self) -> Iterator[Counter]:
+        """
+        Sample the calling thread until the block exits
+
+        Returns:
+            Iterator[Counter]: Sample counts by stack (tuples of code objects, outermost first)
+        """
+        ident = threading.get_ident()
+        samples = Counter()
+        with self._lock:
+            self._tracked[ident] = samples
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+                self._thread.start()
+        try:
+            yield samples
+        finally:
+            with self._lock:
+                self._tracked.pop(ident, None)
+
+    def _run(self):
+        """Sample the registered threads until none are left"""
+        while True:
+            with self._lock:
+                if not self._tracked:
+                    self._thread = None
+                    return
+                tracked = list(self._tracked.items())
+
+            frames = sys._current_frames()
+            for ident, samples in tracked:
+                frame = frames.get(ident)
+                stack = []
+                while frame is not None:
+                    stack.append(frame.f_code)
+                    frame = frame.f_back
+                if stack:
+                    stack.reverse()
+                    samples[tuple(stack)] += 1
+            del frames
+
+            time.sleep(self.interval)
+
+
+# Sampler shared by every conversion in this process
+_sampler = StackSampler()
+
+
+@contextmanager
+def capture(mode: str) -> Iterator[dict]:
+    """
+    Profile the calling thread until the block exits
+
+    Args:
+        mode: One of PROFILE_MODES
+
+    Returns:
+        Iterator[dict]: Dict that receives the profile data when the block exits:
+                        stack sample counts (sample) or raw profiler statistics (cprofile);
+                        plain tuples and numbers, so it can be returned from a worker process
+    """
+    result = {}
+    if mode == PROFILE_CPROFILE:
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError as e:
+            # Only one deterministic profiler can be active at a time on newer Pythons
+            app_logger.get_logger().warning(f"cProfile unavailable on this thread: {str(e)}")
+            yield result
+            return
+        try:
+            yield result
+        finally:
+            profiler.disable()
+            profiler.create_stats()
+            result.update(profiler.stats)
+    else:
+        with _sampler.track() as samples:
+            yield result
+        for stack, count in samples.items():
+            result[tuple((code.co_name, code.co_filename, code.co_firstlineno) for code in stack)] = count
+
+
+def merge_profile(mode: str, total: dict, data: dict):
+    """
+    Add the profile of one part of a document (e.g. a PDF page chunk) to another
+
+    Args:
+        mode: One of PROFILE_MODES
+        total: Profile data updated in place
+        data: Profile data to add
+    """
+    if mode != PROFILE_CPROFILE:
+        for stack, count in data.items():
+            total[stack] = total.get(stack, 0) + count
+        return
+
+    for func, (cc, nc, tt, ct, callers) in data.items():
+        if func not in total:
+            total[func] = (cc, nc, tt, ct, dict(callers))
+            continue
+        t_cc, t_nc, t_tt, t_ct, t_callers = total[func]
+        for caller, value in callers.items():
+            if caller in t_callers:
+                previous = t_callers[caller]
+                value = tuple(a + b for a, b in zip(previous, value)) if isinstance(value, tuple) else previous + value
+            t_callers[caller] = value
+        total[func] = (t_cc + cc, t_nc + nc, t_tt + tt, t_ct + ct, t_callers)
+
+
+class DocumentProfiler:
+    """Keeps the profiles of the slowest documents of a conversion and writes them out"""
+
+    def __init__(self, mode: str, top: int = 0, threshold: float = 0.0, interval: float = SAMPLE_INTERVAL):
+        """
+        Args:
+            mode: One of PROFILE_MODES
+            top: Keep the profiles of this many slowest documents
+            threshold: Also keep every document that took at least this many seconds (0 to disable)
+            interval: Seconds between stack samples (sample mode)
+        """
+        self.logger = app_logger.get_logger()
+        self.mode = mode
+        self.top = max(0, top)
+        self.threshold = threshold
+        self.interval = interval
+
+        self._lock = threading.Lock()
+        # Min-heap of (seconds, path) of the slowest documents, and every kept profile
+        self._slowest: List[Tuple[float, str]] = []
+        self._kept: Dict[str, Tuple[float, dict]] = {}
+
+    @contextmanager
+    def document(self, input_path: str) -> Iterator[None]:
+        """
+        Profile the conversion of a document on the calling thread
+
+        Args:
+            input_path: Input file path
+        """
+        start = time.perf_counter()
+        with capture(self.mode) as data:
+            yield
+        self.offer(input_path, time.perf_counter() - start, data)
+
+    def offer(self, input_path: str, seconds: float, data: dict):
+        """
+        Keep a document's profile if it is among the slowest or over the threshold
+
+        Args:
+            input_path: Input file path
+            seconds: Time the document took
+            data: Profile data from capture()
+        """
+        if not data:
+            return
+        with self._lock:
+            keep = self.threshold > 0 and seconds >= self.threshold
+            if self.top:
+                if len(self._slowest) < self.top:
+                    heapq.heappush(self._slowest, (seconds, input_path))
+                    keep = True
+                elif seconds > self._slowest[0][0]:
+                    _, evicted = heapq.heapreplace(self._slowest, (seconds, input_path))
+                    keep = True
+                    # Profiles over the threshold are kept whatever their rank
+                    if not (self.threshold > 0 and self._kept.get(evicted, (0.0,))[0] >= self.threshold):
+                        self._kept.pop(evicted, None)
+            if keep:
+                self._kept[input_path] = (seconds, data)
+
+    def write(self, output_dir: Path) -> Dict[str, Path]:
+        """
+        Write the kept profiles to the profiles folder of output_dir
+
+        Files are named after the input file plus a hash of its full path, as
+        .speedscope.json (sample; open at https://www.speedscope.app) or .prof
+        (cprofile; open with pstats or snakeviz).
+
+        Args:
+            output_dir: Folder of the conversion report
+
+        Returns:
+            Dict[str, Path]: Profile file of each kept input path, slowest first
+        """
+        with self._lock:
+            kept = sorted(self._kept.items(), key=lambda item: -item[1][0])
+        if not kept:
+            return {}
+
+        profiles_dir = Path(output_dir) / PROFILES_DIR
+        written = {}
+        try:
+            profiles_dir.mkdir(parents=True, exist_ok=True)
+            for input_path, (seconds, data) in kept:
+                key = hashlib.sha1(input_path.encode('utf-8')).hexdigest()[:8]
+                if self.mode == PROFILE_CPROFILE:
+                    profile_file = profiles_dir / f"{Path(input_path).name}-{key}.prof"
+                    with open(profile_file, 'wb') as f:
+                        marshal.dump(data, f)
+                else:
+                    profile_file = profiles_dir / f"{Path(input_path).name}-{key}.speedscope.json"
+                    with open(profile_file, 'w', encoding='utf-8') as f:
+                        json.dump(self._speedscope(input_path, data), f)
+                written[input_path] = profile_file
+                self.logger.info(f"Profile of {input_path} ({seconds:.2f}s) saved to {profile_file}")
+        except Exception as e:
+            self.logger.error(f"Error writing profiles to {profiles_dir}: {str(e)}")
+        return written
+
+    def _speedscope(self, input_path: str, data: dict) -> dict:
+        """Convert stack sample counts to a speedscope sampled profile"""
+        frames: List[dict] = []
+        frame_index: Dict[FrameKey, int] = {}
+        samples = []
+        weights = []
+        for stack, count in data.items():
+            indexes = []
+            for frame in stack:
+                if frame not in frame_index:
+                    frame_index[frame] = len(frames)
+                    frames.append({'name': frame[0], 'file': frame[1], 'line': frame[2]})
+                indexes.append(frame_index[frame])
+            samples.append(indexes)
+            weights.append(round(count * self.interval, 6))
+
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'name': input_path,
+            'exporter': 'epub-pdf-to-txt-converter',
+            'shared': {'frames': frames},
+            'profiles': [{
+                'type': 'sampled',
+                'name': input_path,
+                'unit': 'seconds',
+                'startValue': 0,
+                'endValue': round(sum(weights), 6),
+                'samples': samples,
+                'weights': weights
+            }]
+        }
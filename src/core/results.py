@@ -0,0 +1,198 @@
+"""
+Compact per-file conversion results
+"""
+
+import heapq
+from array import array
+from typing import Iterator, List, Optional
+
+
+# Outcome of a file, stored as its index in STATUSES
+STATUS_CONVERTED = 'converted'
+STATUS_SKIPPED = 'skipped'
+STATUS_DUPLICATE = 'duplicate'
+STATUS_FAILED = 'failed'
+STATUSES = (STATUS_CONVERTED, STATUS_SKIPPED, STATUS_DUPLICATE, STATUS_FAILED)
+
+# Extraction library that produced a file's text, stored as its index in BACKENDS
+BACKENDS = ('', 'pdfplumber', 'PyPDF2', 'epub')
+
+# Why a file was not extracted, stored as its index in REASONS: a PDF needing a
+# password, or an EPUB whose content is DRM-encrypted
+REASON_ENCRYPTED = 'encrypted'
+REASON_DRM = 'drm'
+REASONS = ('', REASON_ENCRYPTED, REASON_DRM)
+
+
+class FileResult:
+    """Outcome of converting one file"""
+
+    __slots__ = ('path', 'status', 'duration', 'bytes_in', 'bytes_out', 'pages', 'backend', 'reason')
+
+    def __init__(self, path: str, status: str, duration: float = 0.0, bytes_in: int = 0,
+                 bytes_out: int = 0, pages: int = 0, backend: str = '', reason: str = ''):
+        self.path = path
+        self.status = status
+        self.duration = duration
+        self.bytes_in = bytes_in
+        self.bytes_out = bytes_out
+        self.pages = pages
+        self.backend = backend
+        self.reason = reason
+
+    def __repr__(self) -> str:
+        return (f"FileResult({self.path!r}, {self.status!r}, duration={self.duration:.3f}, "
+                f"bytes_in={self.bytes_in}, bytes_out={self.bytes_out}, pages={self.pages}, "
+                f"backend={self.backend!r}, reason={self.reason!r})")
+
+
+class ResultTable:
+    """
+    Append-only table of per-file results
+
+    Each field is kept in its own typed array, about 27 bytes per file plus
+    the path string (paths[row]), so million-file batches stay small. Tables
+    pickle as plain arrays and lists and can be merged, so worker processes
+    can return their own table to the parent.
+    """
+
+    def __init__(self):
+        self.paths: List[str] = []
+        self.statuses = array('B')
+        self.durations = array('f')
+        self.bytes_in = array('Q')
+        self.bytes_out = array('Q')
+        self.pages = array('I')
+        self.backends = array('B')
+        self.reasons = array('B')
+
+    def __len__(self) -> int:
+        return len(self.statuses)
+
+    def __iter__(self) -> Iterator[FileResult]:
+        for row in range(len(self)):
+            yield self.get(row)
+
+    def append(self, path: str, status: str, duration: float = 0.0, bytes_in: int = 0,
+               bytes_out: int = 0, pages: int = 0, backend: str = '', reason: str = '') -> int:
+        """
+        Record the outcome of a file
+
+        Args:
+            path: Input file path
+            status: One of STATUSES
+            duration: Seconds spent on the file
+            bytes_in: Input file size
+            bytes_out: Output file size (all files of a split output folder)
+            pages: Pages or spine items extracted
+            backend: One of BACKENDS
+            reason: One of REASONS
+
+        Returns:
+            int: Row number of the record
+        """
+        self.paths.append(str(path))
+        self.statuses.append(STATUSES.index(status))
+        self.durations.append(duration)
+        self.bytes_in.append(bytes_in)
+        self.bytes_out.append(bytes_out)
+        self.pages.append(pages)
+        self.backends.append(BACKENDS.index(backend) if backend in BACKENDS else 0)
+        self.reasons.append(REASONS.index(reason) if reason in REASONS else 0)
+        return len(self.statuses) - 1
+
+    def get(self, row: int) -> FileResult:
+        """
+        Get one record
+
+        Args:
+            row: Row number
+
+        Returns:
+            FileResult: The record
+        """
+        return FileResult(self.paths[row], STATUSES[self.statuses[row]],
+                          self.durations[row], self.bytes_in[row], self.bytes_out[row],
+                          self.pages[row], BACKENDS[self.backends[row]], REASONS[self.reasons[row]])
+
+    def merge(self, other: 'ResultTable'):
+        """
+        Append every record of another table, e.g. one returned by a worker process
+
+        Args:
+            other: Table to merge in
+        """
+        self.paths.extend(other.paths)
+        self.statuses.extend(other.statuses)
+        self.durations.extend(other.durations)
+        self.bytes_in.extend(other.bytes_in)
+        self.bytes_out.extend(other.bytes_out)
+        self.pages.extend(other.pages)
+        self.backends.extend(other.backends)
+        self.reasons.extend(other.reasons)
+
+    def count(self, status: str) -> int:
+        """
+        Count records with a status
+
+        Args:
+            status: One of STATUSES
+
+        Returns:
+            int: Number of records
+        """
+        return self.statuses.count(STATUSES.index(status))
+
+    def summary(self) -> dict:
+        """
+        Derive batch statistics from the records
+
+        Skipped files and duplicates count as successful, as their output exists.
+
+        Returns:
+            dict: 'successful', 'failed', 'protected' (failed as encrypted or
+                  DRM-protected), 'skipped', 'duplicates', 'pages', 'bytes_in',
+                  'bytes_out' and 'seconds'
+        """
+        skipped = self.count(STATUS_SKIPPED)
+        duplicates = self.count(STATUS_DUPLICATE)
+        return {
+            'successful': self.count(STATUS_CONVERTED) + skipped + duplicates,
+            'failed': self.count(STATUS_FAILED),
+            'protected': len(self.reasons) - self.reasons.count(0),
+            'skipped': skipped,
+            'duplicates': duplicates,
+            'pages': sum(self.pages),
+            'bytes_in': sum(self.bytes_in),
+            'bytes_out': sum(self.bytes_out),
+            'seconds': round(sum(self.durations), 3)
+        }
+
+    def slowest(self, limit: int) -> List[FileResult]:
+        """
+        Get the records that took longest
+
+        Args:
+            limit: Maximum number of records
+
+        Returns:
+            List[FileResult]: Records, slowest first
+        """
+        rows = heapq.nlargest(limit, range(len(self)), key=self.durations.__getitem__)
+        return [self.get(row) for row in rows]
+
+    def find(self, path: str) -> Optional[FileResult]:
+        """
+        Get the latest record of a file
+
+        Args:
+            path: Input file path
+
+        Returns:
+            Optional[FileResult]: The record, or None if the file has none
+        """
+        path = str(path)
+        for row in range(len(self) - 1, -1, -1):
+            if self.paths[row] == path:
+                return self.get(row)
+        return None
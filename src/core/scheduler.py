@@ -0,0 +1,171 @@
+"""
+Size-aware scheduling of directory batches across worker processes
+"""
+
+import math
+import os
+import tempfile
+import time
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from utils import app_logger
+from utils.resources import get_rss_bytes
+from .job import ConversionOptions
+from .profiling import capture
+from .search_index import SegmentSpan, spool_segments
+from .selection import PageRange
+
+
+# Jobs are split until none exceeds this fraction of one worker's fair share of the batch
+MAX_JOB_SHARE = 0.5
+
+# Fewest pages a PDF chunk may have; smaller chunks cost more in reopening than they gain
+MIN_CHUNK_PAGES = 25
+
+
+class ExtractionJob(NamedTuple):
+    """A file, or a page range of a PDF, to extract on a worker"""
+
+    file_path: Path
+    # Pages of this chunk, or None for the whole file (within the options' page_range)
+    page_range: Optional[PageRange]
+    # Estimated work (characters from a probe plan, otherwise bytes)
+    cost: int
+    # 0-based chunk number and chunk count of the file
+    part: int = 0
+    parts: int = 1
+
+
+def estimate_costs(files: List[Path], plan: Optional[dict] = None) -> Dict[Path, int]:
+    """
+    Estimate the relative extraction cost of files
+
+    Probe estimates are used when a plan covers every file; otherwise file
+    sizes are, so costs within one batch are always in the same unit.
+
+    Args:
+        files: Files to convert
+        plan: Optional probe plan from DocumentProber.build_plan
+
+    Returns:
+        Dict[Path, int]: Cost of each file
+    """
+    if plan:
+        estimates = {os.path.abspath(record['path']): record['estimated_chars'] for record in plan.get('files', [])}
+        costs = {file_path: estimates.get(os.path.abspath(file_path)) for file_path in files}
+        if all(cost is not None for cost in costs.values()):
+            return {file_path: max(1, cost) for file_path, cost in costs.items()}
+        app_logger.get_logger().info("Plan does not cover every file, scheduling by file size")
+
+    costs = {}
+    for file_path in files:
+        try:
+            costs[file_path] = max(1, os.stat(file_path).st_size)
+        except OSError:
+            costs[file_path] = 1
+    return costs
+
+
+def plan_jobs(costs: Dict[Path, int], max_workers: int, page_counts: Dict[Path, int]) -> List[ExtractionJob]:
+    """
+    Order files longest first and split PDFs that would dominate the batch
+
+    Handing the longest jobs out first (LPT scheduling) keeps workers from
+    idling behind one large file at the end of a batch.
+
+    Args:
+        costs: Estimated cost of each file
+        max_workers: Number of worker processes
+        page_counts: Page count of each PDF that may be split
+
+    Returns:
+        List[ExtractionJob]: Jobs, most expensive first
+    """
+    total_cost = sum(costs.values())
+    max_job_cost = max(1, int(total_cost / max(1, max_workers) * MAX_JOB_SHARE))
+
+    jobs = []
+    for file_path, cost in costs.items():
+        pages = page_counts.get(file_path, 0)
+        parts = min(math.ceil(cost / max_job_cost), pages // MIN_CHUNK_PAGES) if max_workers > 1 else 1
+
+        if parts < 2:
+            jobs.append(ExtractionJob(file_path, None, cost))
+            continue
+
+        for part in range(parts):
+            first = pages * part // parts + 1
+            last = pages * (part + 1) // parts
+            jobs.append(ExtractionJob(file_path, (first, last), cost * (last - first + 1) // pages, part, parts))
+
+    jobs.sort(key=lambda job: (-job.cost, str(job.file_path), job.part))
+    return jobs
+
+
+# Converter reused by every job a worker process runs
+_worker_converter = None
+
+# Queue the worker reports the start of each job to (see core.metrics.JobMetrics.attach_events)
+_worker_events = None
+
+
+def init_worker(log_queue, level: int, events=None):
+    """
+    Process pool initializer: log to the parent's queue and report job starts to events
+
+    Args:
+        log_queue: Queue from app_logger.get_process_queue in the parent
+        level: Logging level of the parent
+        events: Optional multiprocessing.Queue receiving a tuple as each job starts
+    """
+    global _worker_events
+    app_logger.configure_worker(log_queue, level)
+    _worker_events = events
+
+
+def run_extraction_job(options: ConversionOptions, job: ExtractionJob, spool_dir: str) -> Tuple[str, dict]:
+    """
+    Extract one job's text to a spool file (runs in a worker process)
+
+    The text is written as it is extracted, so neither the worker nor the
+    parent holds a whole document, or page chunk, in memory.
+
+    Args:
+        options: Options of the conversion
+        job: Job to run
+        spool_dir: Folder the spool file is created in
+
+    Returns:
+        Tuple[str, dict]: Path of the UTF-8 spool file holding the joined text,
+                          and statistics counters of the job ('pages', 'backend',
+                          'seconds', ...; 'profile' when profiling, 'spans' of
+                          the segments in the spool file)
+    """
+    global _worker_converter
+    if _worker_converter is None:
+        from .converter import DocumentToTxtConverter
+        _worker_converter = DocumentToTxtConverter()
+
+    if job.page_range is not None:
+        options = options._replace(page_range=job.page_range)
+
+    if _worker_events is not None:
+        _worker_events.put((os.getpid(), str(job.file_path), job.part, job.parts, time.time()))
+
+    start = time.perf_counter()
+    stats = {}
+    spans: List[SegmentSpan] = []
+    spool_fd, spool_path = tempfile.mkstemp(suffix='.txt', dir=spool_dir)
+    with open(spool_fd, 'w', encoding='utf-8', newline='') as spool, \
+            capture(options.profile) if options.profile else nullcontext() as profile:
+        segments = _worker_converter.iter_segments(str(job.file_path), stats=stats, options=options)
+        for _ in spool_segments(segments, spool, spans):
+            pass
+    if profile is not None:
+        stats['profile'] = profile
+    stats['spans'] = spans
+    stats['peak_rss_bytes'] = max(stats.get('peak_rss_bytes', 0), get_rss_bytes())
+    stats['seconds'] = time.perf_counter() - start
+    return spool_path, stats
@@ -0,0 +1,314 @@
+"""
+Full-text search index of converted documents (SQLite FTS5)
+"""
+
+import sqlite3
+import time
+from pathlib import Path
+from typing import Iterable, Iterator, List, NamedTuple, TextIO, Tuple, Union
+
+from utils import app_logger
+from .text_segment import CONTINUATION_SEPARATOR, SegmentSpan, TextSegment, iter_joined
+
+# FTS5 tokenizers: 'unicode61' indexes words; 'trigram' matches any substring of
+# three or more characters, which suits Chinese and Japanese text without spaces
+TOKENIZERS = ('unicode61', 'trigram')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    output TEXT NOT NULL,
+    indexed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS spans (
+    id INTEGER PRIMARY KEY,
+    document_id INTEGER NOT NULL REFERENCES documents(id),
+    kind TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    label TEXT NOT NULL,
+    start INTEGER NOT NULL,
+    end INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS spans_document ON spans(document_id);
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class SearchHit(NamedTuple):
+    """A segment matching a query"""
+
+    # Input document and its output (TXT file, JSONL file or split output folder)
+    path: str
+    output: str
+    # 'page', 'item' or 'chapter', its 1-based number, and its label
+    kind: str
+    index: int
+    label: str
+    # Character offsets of the segment in the text of the TXT output, with '\n' line ends;
+    # for JSONL and split output, in the text a TXT conversion would write (see index.json 'offset')
+    start: int
+    end: int
+    # Matching text with the query terms in [brackets]
+    snippet: str
+    # BM25 rank, lower is better
+    rank: float
+
+
+def join_segments(segments: Iterable[TextSegment]) -> Tuple[str, List[SegmentSpan]]:
+    """
+    Join segments into the text written to the TXT output, recording where each one lies
+
+    Args:
+        segments: Extracted segments in reading order
+
+    Returns:
+        Tuple[str, List[SegmentSpan]]: Joined text and the span of each segment
+    """
+    spans: List[SegmentSpan] = []
+    text = ''.join(iter_joined(segments, spans))
+    return text, spans
+
+
+def spool_segments(segments: Iterable[TextSegment], spool: TextIO,
+                   spans: List[SegmentSpan]) -> Iterator[TextSegment]:
+    """
+    Pass segments through, writing the text of their TXT output to a file on the way
+
+    Lets a document be indexed after its output is written without holding
+    its text in memory.
+
+    Args:
+        segments: Extracted segments in reading order
+        spool: Writable text file receiving the joined text
+        spans: List the span of each segment is appended to
+
+    Returns:
+        Iterator[TextSegment]: The segments, unchanged
+    """
+    offset = 0
+    for position, segment in enumerate(segments):
+        if position:
+            spool.write(segment.separator)
+            offset += len(segment.separator)
+        spans.append((segment.kind, segment.index, segment.label, offset, offset + len(segment.text)))
+        spool.write(segment.text)
+        offset += len(segment.text)
+        yield segment
+
+
+def iter_span_texts(text: Union[str, TextIO], spans: List[SegmentSpan]) -> Iterator[str]:
+    """
+    Get the text of each span of joined text
+
+    Args:
+        text: Joined text, or a text file of it positioned at its start
+        spans: Span of each segment in text, in order
+
+    Returns:
+        Iterator[str]: Text of each span; a file is read one span at a time
+    """
+    position = 0
+    for kind, index, label, start, end in spans:
+        if isinstance(text, str):
+            yield text[start:end]
+            continue
+        text.read(start - position)
+        yield text.read(end - start)
+        position = end
+
+
+def split_segments(text: Union[str, TextIO], spans: List[SegmentSpan]) -> Iterator[TextSegment]:
+    """
+    Rebuild the segments of joined text from their spans (the reverse of join_segments)
+
+    Args:
+        text: Joined text, or a text file of it positioned at its start
+        spans: Span of each segment in text
+
+    Returns:
+        Iterator[TextSegment]: Segments in reading order; a file is read one segment at a time
+    """
+    previous_end = None
+    for (kind, index, label, start, end), segment_text in zip(spans, iter_span_texts(text, spans)):
+        # Only a segment continuing the previous one follows it after a single line break
+        continued = previous_end is not None and start - previous_end == len(CONTINUATION_SEPARATOR)
+        yield TextSegment(kind, index, label, segment_text, continued)
+        previous_end = end
+
+
+class SearchIndex:
+    """
+    SQLite FTS5 index of converted text, one row per page or spine item
+
+    A connection belongs to the thread that opened it; each conversion call
+    opens its own, and concurrent writers wait on SQLite's file lock.
+    """
+
+    def __init__(self, index_path: str, tokenizer: str = 'unicode61'):
+        """
+        Args:
+            index_path: Index database file, created if missing
+            tokenizer: One of TOKENIZERS, used when the index is created
+        """
+        self.logger = app_logger.get_logger()
+        self.index_path = Path(index_path)
+        if tokenizer not in TOKENIZERS:
+            raise ValueError(f"Unknown tokenizer: {tokenizer}")
+
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(str(self.index_path), timeout=30)
+        self._connection.executescript(_SCHEMA)
+
+        # The tokenizer is fixed when the index is created
+        row = self._connection.execute("SELECT value FROM settings WHERE key = 'tokenizer'").fetchone()
+        self.tokenizer = row[0] if row else tokenizer
+        tokenize = 'unicode61 remove_diacritics 2' if self.tokenizer == 'unicode61' else self.tokenizer
+        with self._connection:
+            self._connection.execute("INSERT OR IGNORE INTO settings (key, value) VALUES ('tokenizer', ?)",
+                                     (self.tokenizer,))
+            self._connection.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS segment_text "
+                                     f"USING fts5(text, tokenize='{tokenize}')")
+
+    def add_document(self, input_path: str, output_path: str, text: Union[str, TextIO],
+                     spans: List[SegmentSpan]) -> bool:
+        """
+        Index a document's text, replacing any earlier version of it
+
+        Args:
+            input_path: Input document
+            output_path: TXT output the spans refer to
+            text: Text of the TXT output, or a text file of it positioned at its start
+            spans: Span of each segment in text
+
+        Returns:
+            bool: True if the document was indexed
+        """
+        try:
+            with self._connection:
+                self._delete(input_path)
+                cursor = self._connection.execute(
+                    "INSERT INTO documents (path, output, indexed_at) VALUES (?, ?, ?)",
+                    (str(input_path), str(output_path), time.time()))
+                document_id = cursor.lastrowid
+
+                for (kind, index, label, start, end), span_text in zip(spans, iter_span_texts(text, spans)):
+                    cursor = self._connection.execute(
+                        "INSERT INTO spans (document_id, kind, seq, label, start, end) VALUES (?, ?, ?, ?, ?, ?)",
+                        (document_id, kind, index, label, start, end))
+                    self._connection.execute("INSERT INTO segment_text (rowid, text) VALUES (?, ?)",
+                                             (cursor.lastrowid, span_text))
+
+            self.logger.debug("Indexed %d segments of %s", len(spans), input_path)
+            return True
+
+        except Exception as e:
+            self.logger.error(f"Error indexing {input_path}: {str(e)}")
+            return False
+
+    def copy_document(self, source_path: str, input_path: str, output_path: str) -> bool:
+        """
+        Index a document with the entries of an identical one, replacing any earlier version of it
+
+        Args:
+            source_path: Indexed input document with the same content
+            input_path: Input document
+            output_path: TXT output of input_path
+
+        Returns:
+            bool: True if the document was indexed, False if source_path is not indexed
+        """
+        try:
+            with self._connection:
+                row = self._connection.execute("SELECT id FROM documents WHERE path = ?",
+                                               (str(source_path),)).fetchone()
+                if row is None:
+                    return False
+                self._delete(input_path)
+                cursor = self._connection.execute(
+                    "INSERT INTO documents (path, output, indexed_at) VALUES (?, ?, ?)",
+                    (str(input_path), str(output_path), time.time()))
+                document_id = cursor.lastrowid
+
+                spans = self._connection.execute(
+                    "SELECT spans.kind, spans.seq, spans.label, spans.start, spans.end, segment_text.text "
+                    "FROM spans JOIN segment_text ON segment_text.rowid = spans.id "
+                    "WHERE spans.document_id = ? ORDER BY spans.id", (row[0],))
+                for kind, index, label, start, end, span_text in spans:
+                    cursor = self._connection.execute(
+                        "INSERT INTO spans (document_id, kind, seq, label, start, end) VALUES (?, ?, ?, ?, ?, ?)",
+                        (document_id, kind, index, label, start, end))
+                    self._connection.execute("INSERT INTO segment_text (rowid, text) VALUES (?, ?)",
+                                             (cursor.lastrowid, span_text))
+
+            self.logger.debug("Indexed %s as a copy of %s", input_path, source_path)
+            return True
+
+        except Exception as e:
+            self.logger.error(f"Error indexing {input_path}: {str(e)}")
+            return False
+
+    def remove_document(self, input_path: str):
+        """
+        Remove a document from the index
+
+        Args:
+            input_path: Input document
+        """
+        with self._connection:
+            self._delete(input_path)
+
+    def search(self, query: str, limit: int = 20) -> List[SearchHit]:
+        """
+        Find the segments best matching a query
+
+        Args:
+            query: FTS5 query, e.g. 'whale', '"white whale"', 'ahab AND whale' or 'captain*'
+            limit: Maximum number of hits
+
+        Returns:
+            List[SearchHit]: Hits, best first
+
+        Raises:
+            ValueError: If the query is not valid FTS5 syntax
+        """
+        try:
+            rows = self._connection.execute(
+                "SELECT documents.path, documents.output, spans.kind, spans.seq, spans.label, "
+                "spans.start, spans.end, snippet(segment_text, 0, '[', ']', '...', 16), segment_text.rank "
+                "FROM segment_text "
+                "JOIN spans ON spans.id = segment_text.rowid "
+                "JOIN documents ON documents.id = spans.document_id "
+                "WHERE segment_text MATCH ? ORDER BY segment_text.rank LIMIT ?",
+                (query, limit)).fetchall()
+        except sqlite3.OperationalError as e:
+            raise ValueError(f"Invalid search query {query!r}: {str(e)}")
+        return [SearchHit(*row) for row in rows]
+
+    def get_statistics(self) -> dict:
+        """
+        Get the size of the index
+
+        Returns:
+            dict: 'documents' and 'segments' indexed
+        """
+        documents = self._connection.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+        segments = self._connection.execute("SELECT COUNT(*) FROM spans").fetchone()[0]
+        return {'documents': documents, 'segments': segments}
+
+    def close(self):
+        """Close the database connection"""
+        self._connection.close()
+
+    def _delete(self, input_path: str):
+        """Delete a document's rows (inside a transaction)"""
+        row = self._connection.execute("SELECT id FROM documents WHERE path = ?", (str(input_path),)).fetchone()
+        if row is None:
+            return
+        self._connection.execute("DELETE FROM segment_text WHERE rowid IN "
+                                 "(SELECT id FROM spans WHERE document_id = ?)", (row[0],))
+        self._connection.execute("DELETE FROM spans WHERE document_id = ?", (row[0],))
+        self._connection.execute("DELETE FROM documents WHERE id = ?", (row[0],))
@@ -0,0 +1,114 @@
+"""
+Page/spine range selection and character budgets for partial extraction
+"""
+
+import re
+from typing import Iterable, Iterator, Optional, Tuple
+
+from .text_segment import TextSegment
+
+
+# 1-based, inclusive (first, last); last None means up to the end of the document
+PageRange = Tuple[int, Optional[int]]
+
+_RANGE = re.compile(r'^\s*(\d*)\s*(-?)\s*(\d*)\s*$')
+
+
+def parse_page_range(value: str) -> Optional[PageRange]:
+    """
+    Parse a page range such as '5', '1-10', '20-' or '-3'
+
+    Args:
+        value: Range text; empty selects the whole document
+
+    Returns:
+        Optional[PageRange]: (first, last) range, or None for the whole document
+
+    Raises:
+        ValueError: If the text is not a valid range
+    """
+    if not value or not value.strip():
+        return None
+
+    match = _RANGE.match(value)
+    if not match or not (match.group(1) or match.group(3)):
+        raise ValueError(f"Invalid page range: '{value}'")
+
+    first = int(match.group(1)) if match.group(1) else 1
+    if match.group(2):
+        last = int(match.group(3)) if match.group(3) else None
+    else:
+        last = first
+
+    if first < 1 or (last is not None and last < first):
+        raise ValueError(f"Invalid page range: '{value}'")
+    return first, last
+
+
+def format_page_range(page_range: Optional[PageRange]) -> str:
+    """
+    Format a page range the way parse_page_range reads it
+
+    Args:
+        page_range: (first, last) range, or None
+
+    Returns:
+        str: Range text, empty for the whole document
+    """
+    if page_range is None:
+        return ''
+    first, last = page_range
+    if last == first:
+        return str(first)
+    return f"{first}-{last if last is not None else ''}"
+
+
+def range_indexes(page_range: Optional[PageRange], count: int) -> range:
+    """
+    Get the 0-based indexes a range selects from a document
+
+    Args:
+        page_range: (first, last) range, or None for all
+        count: Number of pages or spine items in the document
+
+    Returns:
+        range: Selected 0-based indexes, empty if the range lies past the end
+    """
+    if page_range is None:
+        return range(count)
+    first, last = page_range
+    stop = count if last is None else min(last, count)
+    return range(min(first - 1, stop), stop)
+
+
+def limit_chars(segments: Iterable[TextSegment], max_chars: Optional[int]) -> Iterator[TextSegment]:
+    """
+    Stop a segment stream once it has produced max_chars characters of text
+
+    Only segment text counts towards the budget, not the separators later
+    placed between segments. The segment crossing the budget is truncated,
+    and the source is closed right away so nothing beyond it is parsed.
+
+    Args:
+        segments: Text segments in reading order
+        max_chars: Character budget; None or 0 for no limit
+
+    Returns:
+        Iterator[TextSegment]: Segments within the budget
+    """
+    if not max_chars:
+        yield from segments
+        return
+
+    remaining = max_chars
+    try:
+        for segment in segments:
+            if len(segment.text) >= remaining:
+                yield segment._replace(text=segment.text[:remaining])
+                return
+            remaining -= len(segment.text)
+            yield segment
+    finally:
+        close = getattr(segments, 'close', None)
+        if close is not None:
+            close()
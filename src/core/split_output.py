@@ -0,0 +1,258 @@
+"""
+Split output: one TXT file per page range, content file or chapter, with an index
+"""
+
+import json
+import os
+import queue
+import shutil
+import threading
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional
+
+from utils.encoding import normalize_encoding, write_text_file
+from .text_segment import SEGMENT_SEPARATOR, TextSegment
+
+
+# PDF pages written to each part file by default
+DEFAULT_SPLIT_PAGES = 1
+
+# Index written in each document's folder
+SPLIT_INDEX_FILE = 'index.json'
+
+# Pieces of part text waiting for the writer thread; extraction pauses when writing falls this far behind
+WRITE_QUEUE_SIZE = 64
+
+_END = object()
+_PART_END = object()
+
+
+def iter_parts(segments: Iterable[TextSegment], pages: int = DEFAULT_SPLIT_PAGES) -> Iterator[List[TextSegment]]:
+    """
+    Group a stream of segments into the parts written as separate files
+
+    PDF pages are grouped into fixed ranges of pages (1-10, 11-20, ...), so a
+    page's file does not depend on which pages had text. EPUB content files
+    and chapters get a part each, however many segments they were streamed in.
+
+    Args:
+        segments: Extracted segments in reading order
+        pages: PDF pages per part
+
+    Returns:
+        Iterator[List[TextSegment]]: Segments of each part, in reading order
+    """
+    pages = max(1, pages)
+    part: List[TextSegment] = []
+    window = None
+
+    for segment in segments:
+        if not segment.text:
+            continue
+        segment_window = _part_window(segment, pages)
+        if part and _starts_part(segment, segment_window, window):
+            yield part
+            part = []
+        part.append(segment)
+        window = segment_window
+
+    if part:
+        yield part
+
+
+def part_file_name(part: List[TextSegment]) -> str:
+    """
+    Get the file name of a part, e.g. 'page-0011-0020.txt' or 'chapter-0003.txt'
+
+    Args:
+        part: Segments of the part
+
+    Returns:
+        str: File name
+    """
+    return _file_name(part[0].kind, part[0].index, part[-1].index)
+
+
+def _part_window(segment: TextSegment, pages: int) -> Optional[int]:
+    """Get the fixed page range of a PDF page (None for EPUB content files and chapters)"""
+    return (segment.index - 1) // pages if segment.kind == 'page' else None
+
+
+def _starts_part(segment: TextSegment, segment_window: Optional[int], window: Optional[int]) -> bool:
+    """Check if a segment begins a new part after a segment of the given page range"""
+    return not segment.continued and (segment_window is None or segment_window != window)
+
+
+def _file_name(kind: str, first: int, last: int) -> str:
+    """Get the file name of a part of the given kind and first and last index"""
+    if first == last:
+        return f"{kind}-{first:04d}.txt"
+    return f"{kind}-{first:04d}-{last:04d}.txt"
+
+
+class _PartWriter:
+    """Background thread writing part files while extraction continues"""
+
+    def __init__(self, folder: Path, encoding: str):
+        self.folder = folder
+        self.encoding = encoding
+        self.parts: List[dict] = []
+        self.error: Optional[Exception] = None
+        self._closed = False
+        self._queue = queue.Queue(maxsize=WRITE_QUEUE_SIZE)
+        self._thread = threading.Thread(target=self._run, name='split-writer', daemon=True)
+        self._thread.start()
+
+    def start(self, record: dict):
+        """Queue the start of a part; its record may be updated until end() is called"""
+        self._queue.put(record)
+
+    def write(self, text: str):
+        """Queue a piece of the current part, waiting while the writer is WRITE_QUEUE_SIZE pieces behind"""
+        self._queue.put(text)
+
+    def end(self):
+        """Queue the end of the current part"""
+        self._queue.put(_PART_END)
+
+    def close(self):
+        """Wait until every queued part has been written"""
+        self._queue.put(_END)
+        self._thread.join()
+
+    def _run(self):
+        """Write queued parts in order until the end marker"""
+        while True:
+            item = self._queue.get()
+            if item is _END:
+                return
+            if self.error is not None or not isinstance(item, dict):
+                # Keep draining so the extracting thread never blocks on a full queue
+                continue
+
+            try:
+                # The file is named after the part's last index, known only once the part ends
+                temp_path = self.folder / f".part-{len(self.parts):06d}"
+                write_text_file(temp_path, self._iter_part_text(), self.encoding)
+                if self._closed:
+                    return
+                path = self.folder / item['file']
+                os.replace(temp_path, path)
+                item['bytes'] = path.stat().st_size
+                self.parts.append(item)
+            except Exception as e:
+                self.error = e
+
+    def _iter_part_text(self) -> Iterator[str]:
+        """Yield the queued pieces of the current part until it ends"""
+        while True:
+            item = self._queue.get()
+            if item is _PART_END:
+                return
+            if item is _END:
+                # Extraction stopped in the middle of the part
+                self._closed = True
+                return
+            yield item
+
+
+def write_split(output_dir: Path, source: str, segments: Iterable[TextSegment], encoding: str = 'utf-8',
+                pages: int = DEFAULT_SPLIT_PAGES) -> int:
+    """
+    Write a document as a folder of part files and an index of them
+
+    Each segment's text is handed to a writer thread as it is extracted, so
+    writing overlaps with extraction and no part, however long, is held in
+    memory. The folder is assembled under a temporary name and replaces
+    output_dir once complete; nothing is written if the document has no text.
+
+    SPLIT_INDEX_FILE lists 'source', 'encoding', 'separator', 'chars' and
+    'parts'. Each part records its 'file', 'kind', 'first' and 'last' page,
+    content file or chapter, 'labels', 'offset' and 'chars' (its position in
+    the text of the single TXT output, which joins the parts with the
+    separator) and 'bytes' (its file size).
+
+    Args:
+        output_dir: Folder to write
+        source: Input document path recorded in the index
+        segments: Extracted segments in reading order
+        encoding: Output encoding of the part files
+        pages: PDF pages per part
+
+    Returns:
+        int: Number of part files written
+
+    Raises:
+        OSError: If a part file cannot be written
+    """
+    pages = max(1, pages)
+    temp_dir = output_dir.with_name(output_dir.name + '.part')
+    if temp_dir.exists():
+        shutil.rmtree(temp_dir)
+    temp_dir.mkdir(parents=True)
+
+    try:
+        writer = _PartWriter(temp_dir, encoding)
+        offset = 0
+        record: Optional[dict] = None
+        window = None
+        try:
+            for segment in segments:
+                if not segment.text:
+                    continue
+                segment_window = _part_window(segment, pages)
+                if record is None or _starts_part(segment, segment_window, window):
+                    if record is not None:
+                        writer.end()
+                        offset += record['chars'] + len(SEGMENT_SEPARATOR)
+                    record = {
+                        'file': '',
+                        'kind': segment.kind,
+                        'first': segment.index,
+                        'last': segment.index,
+                        'labels': [],
+                        'offset': offset,
+                        'chars': 0
+                    }
+                    writer.start(record)
+                else:
+                    writer.write(segment.separator)
+                    record['chars'] += len(segment.separator)
+
+                writer.write(segment.text)
+                record['chars'] += len(segment.text)
+                record['last'] = segment.index
+                record['file'] = _file_name(record['kind'], record['first'], record['last'])
+                if segment.label not in record['labels']:
+                    record['labels'].append(segment.label)
+                window = segment_window
+
+            if record is not None:
+                writer.end()
+                offset += record['chars']
+        finally:
+            writer.close()
+
+        if writer.error is not None:
+            raise writer.error
+        if not writer.parts:
+            return 0
+
+        index = {
+            'source': source,
+            'encoding': normalize_encoding(encoding) or 'utf-8',
+            'separator': SEGMENT_SEPARATOR,
+            'chars': offset,
+            'parts': writer.parts
+        }
+        with open(temp_dir / SPLIT_INDEX_FILE, 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False, indent=2)
+
+        if output_dir.exists():
+            shutil.rmtree(output_dir)
+        os.replace(temp_dir, output_dir)
+        return len(writer.parts)
+
+    finally:
+        if temp_dir.exists():
+            shutil.rmtree(temp_dir)
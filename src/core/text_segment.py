@@ -0,0 +1,71 @@
+"""
+Unit of streamed text produced by the document processors
+"""
+
+from typing import Iterable, Iterator, List, NamedTuple, Tuple
+
+
+# Separator between segments in the TXT output
+SEGMENT_SEPARATOR = '\n\n'
+
+# Separator before a segment that continues the previous one
+CONTINUATION_SEPARATOR = '\n'
+
+# Where a segment's text lies in the TXT output: (kind, index, label, start, end)
+SegmentSpan = Tuple[str, int, str, int, int]
+
+
+class TextSegment(NamedTuple):
+    """A piece of extracted text and where in the document it came from"""
+
+    # 'page' for PDF pages, 'item' for EPUB spine items, 'chapter' for EPUB
+    # table-of-contents chapters
+    kind: str
+    # 1-based page number, spine position or chapter number (0 for text before the first chapter)
+    index: int
+    # Page number, path of the content file inside the EPUB, or chapter title
+    label: str
+    # Cleaned text
+    text: str
+    # The text goes on from the previous segment of the same content file, which
+    # was too large to emit at once
+    continued: bool = False
+
+    @property
+    def separator(self) -> str:
+        """Text placed between this segment and the one before it"""
+        return CONTINUATION_SEPARATOR if self.continued else SEGMENT_SEPARATOR
+
+
+def iter_joined(segments: Iterable[TextSegment], spans: List[SegmentSpan]) -> Iterator[str]:
+    """
+    Yield the pieces of the TXT output of segments, recording where each segment lies
+
+    Args:
+        segments: Extracted segments in reading order
+        spans: List the span of each segment is appended to
+
+    Returns:
+        Iterator[str]: Separators and segment texts, in order
+    """
+    offset = 0
+    for position, segment in enumerate(segments):
+        if position:
+            yield segment.separator
+            offset += len(segment.separator)
+        spans.append((segment.kind, segment.index, segment.label, offset, offset + len(segment.text)))
+        yield segment.text
+        offset += len(segment.text)
+
+
+def join_text(segments: Iterable[TextSegment]) -> str:
+    """
+    Join segments into the text of the TXT output
+
+    Args:
+        segments: Extracted segments in reading order
+
+    Returns:
+        str: Joined text
+    """
+    return ''.join(iter_joined(segments, []))
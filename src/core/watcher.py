@@ -0,0 +1,216 @@
+"""
+Watch-folder mode: convert EPUB/PDF files as they appear in an inbox folder
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Tuple
+
+from utils import app_logger
+from .converter import DocumentToTxtConverter
+from .job import ConversionJob
+
+
+SUPPORTED_EXTENSIONS = ('.epub', '.pdf')
+
+# Seconds between directory scans
+DEFAULT_POLL_INTERVAL = 1.0
+
+# Seconds a file's size and mtime must stay unchanged before it is converted
+DEFAULT_SETTLE_TIME = 2.0
+
+# Failed conversions of an unchanged file are retried this many times, waiting
+# RETRY_DELAY seconds before the first retry and twice as long before each next one;
+# encrypted and DRM-protected files are not retried
+MAX_RETRIES = 3
+RETRY_DELAY = 30.0
+
+# (size, mtime in nanoseconds) of a file at scan time
+FileSignature = Tuple[int, int]
+
+
+class FolderWatcher:
+    """Polls an input folder and converts new or changed files in a worker pool"""
+
+    def __init__(self, converter_factory: Callable[[], DocumentToTxtConverter], input_dir: str, output_dir: str,
+                 poll_interval: float = DEFAULT_POLL_INTERVAL, settle_time: float = DEFAULT_SETTLE_TIME,
+                 max_workers: int = 2, preserve_structure: bool = True, skip_existing: bool = True):
+        """
+        Args:
+            converter_factory: Creates the configured converter shared by the worker threads
+            input_dir: Folder to watch (recursively)
+            output_dir: Output folder
+            poll_interval: Seconds between scans
+            settle_time: Seconds a file must stay unchanged before conversion
+            max_workers: Number of concurrent conversions
+            preserve_structure: Mirror the input folder hierarchy in the output
+            skip_existing: On startup, skip files whose output is newer than the input
+        """
+        self.logger = app_logger.get_logger()
+        self.converter = converter_factory()
+        # The watcher decides what needs converting
+        self.job_options = self.converter.get_options(skip_existing=False)
+        self.input_dir = Path(input_dir)
+        self.output_dir = Path(output_dir)
+        self.poll_interval = poll_interval
+        self.settle_time = settle_time
+        self.max_workers = max(1, max_workers)
+        self.preserve_structure = preserve_structure
+        self.skip_existing = skip_existing
+
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+
+        # Signature each file had when it was last converted (or found up to date)
+        self._done: Dict[str, FileSignature] = {}
+        # Signature a file had when first seen in its current state, and when
+        self._pending: Dict[str, Tuple[FileSignature, float]] = {}
+        # Files currently being converted, with the signature they had when submitted
+        self._in_flight: Dict[str, FileSignature] = {}
+        # Signature of each file whose conversion failed, failures so far, and when to retry
+        self._failed: Dict[str, Tuple[FileSignature, int, float]] = {}
+
+        # Statistics
+        self.stats = {'converted': 0, 'failed': 0}
+
+    def run(self):
+        """Watch the folder until stop() is called or the process is interrupted"""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.logger.info(f"Watching {self.input_dir} (every {self.poll_interval}s, "
+                         f"{self.max_workers} workers), output to {self.output_dir}")
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='watch-worker') as executor:
+            if self.skip_existing:
+                self._mark_up_to_date(self.scan())
+
+            try:
+                while not self._stop_event.is_set():
+                    for path, signature in self._ready_files(self.scan(), time.monotonic()):
+                        with self._lock:
+                            self._in_flight[path] = signature
+                        future = executor.submit(self._convert, path)
+                        future.add_done_callback(lambda done, path=path: self._finish(path, done))
+
+                    self._stop_event.wait(self.poll_interval)
+            except KeyboardInterrupt:
+                self.logger.info("Interrupted, waiting for running conversions to finish...")
+
+        self.logger.info(f"Stopped watching {self.input_dir}: {self.stats['converted']} converted, "
+                         f"{self.stats['failed']} failed")
+
+    def stop(self):
+        """Ask the watch loop to exit after in-flight conversions finish"""
+        self._stop_event.set()
+
+    def scan(self) -> Dict[str, FileSignature]:
+        """
+        Take a snapshot of supported files under the input folder
+
+        Returns:
+            Dict[str, FileSignature]: File path to (size, mtime_ns)
+        """
+        snapshot = {}
+        directories = [str(self.input_dir)]
+
+        while directories:
+            directory = directories.pop()
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                directories.append(entry.path)
+                            elif entry.name.lower().endswith(SUPPORTED_EXTENSIONS):
+                                stat = entry.stat()
+                                snapshot[entry.path] = (stat.st_size, stat.st_mtime_ns)
+                        except OSError:
+                            # File vanished between listing and stat
+                            continue
+            except OSError as e:
+                self.logger.warning(f"Could not scan {directory}: {str(e)}")
+
+        return snapshot
+
+    def _ready_files(self, snapshot: Dict[str, FileSignature], now: float):
+        """Yield (path, signature) of files that are new, changed or due for a retry, and have stopped changing"""
+        for path in list(self._pending):
+            if path not in snapshot:
+                del self._pending[path]
+
+        for path, signature in snapshot.items():
+            with self._lock:
+                if path in self._in_flight or self._done.get(path) == signature:
+                    continue
+                failed = self._failed.get(path)
+                if failed is not None and failed[0] == signature and (failed[1] > MAX_RETRIES or now < failed[2]):
+                    continue
+
+            pending = self._pending.get(path)
+            if pending is None or pending[0] != signature:
+                # New, or still being written: restart the settle timer
+                self._pending[path] = (signature, now)
+            elif now - pending[1] >= self.settle_time and signature[0] > 0:
+                del self._pending[path]
+                yield path, signature
+
+    def _mark_up_to_date(self, snapshot: Dict[str, FileSignature]):
+        """Record files whose output is already newer than the input"""
+        for path, signature in snapshot.items():
+            output_name = self.converter.get_output_name(Path(path), self.job_options)
+            output_file = self._output_dir_for(Path(path)) / output_name
+            try:
+                if output_file.stat().st_mtime_ns >= signature[1]:
+                    self._done[path] = signature
+            except OSError:
+                continue
+
+    def _output_dir_for(self, file_path: Path) -> Path:
+        """Get the output directory of a watched file"""
+        if self.preserve_structure:
+            return self.output_dir / file_path.relative_to(self.input_dir).parent
+        return self.output_dir
+
+    def _convert(self, path: str) -> Tuple[bool, str]:
+        """Convert one file (runs on a worker thread); returns success and why it was not extracted"""
+        start = time.monotonic()
+        job = ConversionJob(self.job_options)
+        success = self.converter.convert_file(path, str(self._output_dir_for(Path(path))), job=job)
+        if success:
+            self.logger.info(f"Converted {path} in {time.monotonic() - start:.2f}s")
+        record = job.results.find(path)
+        return success, record.reason if record is not None else ''
+
+    def _finish(self, path: str, future: Future):
+        """Record the outcome of a conversion"""
+        try:
+            success, reason = future.result()
+        except Exception as e:
+            self.logger.error(f"Error converting {path}: {str(e)}")
+            success, reason = False, ''
+
+        with self._lock:
+            signature = self._in_flight.pop(path)
+            if success:
+                self._done[path] = signature
+                self._failed.pop(path, None)
+                self.stats['converted'] += 1
+                return
+
+            # A file that failed, e.g. because it was still being copied, is retried with
+            # growing delays until it converts, changes again, or runs out of retries
+            self.stats['failed'] += 1
+            if reason:
+                # Encryption or DRM will not go away by waiting
+                self._failed[path] = (signature, MAX_RETRIES + 1, time.monotonic())
+                self.logger.warning(f"Not retrying {path} ({reason}) until it changes")
+                return
+            previous = self._failed.get(path)
+            failures = previous[1] + 1 if previous is not None and previous[0] == signature else 1
+            self._failed[path] = (signature, failures, time.monotonic() + RETRY_DELAY * 2 ** (failures - 1))
+            if failures > MAX_RETRIES:
+                self.logger.warning(f"Giving up on {path} after {failures} failed conversions, until it changes")
+            else:
+                self.logger.info(f"Will retry {path} in {RETRY_DELAY * 2 ** (failures - 1):.0f}s")
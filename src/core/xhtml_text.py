@@ -0,0 +1,140 @@
+"""
+Streaming text extraction from large XHTML content files
+"""
+
+from html.parser import HTMLParser
+from typing import Dict, Iterable, Iterator, List
+
+
+# Characters of cleaned text collected before a chunk is emitted
+STREAM_TEXT_CHARS = 1024 * 1024
+
+# Elements whose content is not text of the document
+NON_TEXT_ELEMENTS = ('script', 'style')
+
+
+class XhtmlTextParser(HTMLParser):
+    """
+    Incremental parser collecting the cleaned text lines of an XHTML document
+
+    The result matches BeautifulSoup's get_text(separator='\\n', strip=True)
+    followed by line cleaning, but no tree is built: text is kept only until
+    it is taken with take_lines().
+    """
+
+    def __init__(self, anchors: Dict[str, str] = None):
+        """
+        Args:
+            anchors: Line to emit before the first element with each id (or name)
+        """
+        super().__init__(convert_charrefs=True)
+        self.anchors = dict(anchors or {})
+        self.chars = 0
+        self._lines: List[str] = []
+        self._data: List[str] = []
+        self._skipping = None
+
+    def handle_starttag(self, tag, attrs):
+        self._flush()
+        if tag in NON_TEXT_ELEMENTS:
+            self._skipping = tag
+        if self.anchors:
+            for name, value in attrs:
+                if name in ('id', 'name') and value in self.anchors:
+                    self.add_line(self.anchors.pop(value))
+                    break
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        self._skipping = None
+
+    def handle_endtag(self, tag):
+        if tag == self._skipping:
+            self._data = []
+            self._skipping = None
+        self._flush()
+
+    def handle_data(self, data):
+        # A text node can arrive in several calls when it spans fed chunks
+        if self._skipping is None:
+            self._data.append(data)
+
+    def handle_comment(self, data):
+        self._flush()
+
+    def handle_decl(self, decl):
+        self._flush()
+
+    def handle_pi(self, data):
+        self._flush()
+
+    def unknown_decl(self, data):
+        self._flush()
+        if data.startswith('CDATA['):
+            self._add_text(data[len('CDATA['):])
+
+    def close(self):
+        super().close()
+        self._flush()
+
+    def add_line(self, line: str):
+        """Add a line to the collected text as it is"""
+        self._lines.append(line)
+        self.chars += len(line) + 1
+
+    def take_lines(self) -> List[str]:
+        """Remove and return the lines collected so far"""
+        lines = self._lines
+        self._lines = []
+        self.chars = 0
+        return lines
+
+    def _flush(self):
+        """Finish the text node being collected"""
+        if self._data:
+            text = ''.join(self._data)
+            self._data = []
+            self._add_text(text)
+
+    def _add_text(self, text: str):
+        """Add the non-empty cleaned lines of a text node"""
+        for line in text.split('\n'):
+            line = ' '.join(line.split())
+            if line:
+                self.add_line(line)
+
+
+def iter_text_chunks(chunks: Iterable[str], anchors: Dict[str, str] = None, starts: List[str] = None,
+                     chunk_chars: int = STREAM_TEXT_CHARS) -> Iterator[str]:
+    """
+    Parse an XHTML document fed in pieces, yielding its cleaned text in chunks
+
+    Memory use follows chunk_chars and the size of the pieces, not the size
+    of the document. Chunks end at line boundaries.
+
+    Args:
+        chunks: Decoded document text in pieces
+        anchors: Line to emit before the first element with each id (or name);
+                 lines of anchors never found are emitted at the end
+        starts: Lines to emit before the document's text
+        chunk_chars: Characters of cleaned text per chunk (the last may be shorter,
+                     and a chunk may be longer by one piece's worth of text)
+
+    Returns:
+        Iterator[str]: Cleaned text chunks, lines joined with '\\n'
+    """
+    parser = XhtmlTextParser(anchors)
+    for line in starts or []:
+        parser.add_line(line)
+
+    for chunk in chunks:
+        parser.feed(chunk)
+        if parser.chars >= chunk_chars:
+            yield '\n'.join(parser.take_lines())
+
+    parser.close()
+    for line in parser.anchors.values():
+        parser.add_line(line)
+    lines = parser.take_lines()
+    if lines:
+        yield '\n'.join(lines)
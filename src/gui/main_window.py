@@ -4,21 +4,29 @@ Main window GUI for EPUB/PDF to TXT Converter
 
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
+import glob
 import threading
+import time
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 import sys
 import os
 
 # Add the src directory to the path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
+from core.batch_inputs import INPUT_LIST_PREFIX
 from core.converter import DocumentToTxtConverter
+from core.job import ConversionJob
 from config.settings import Settings
 from localization.lang_manager import LanguageManager
 from utils import app_logger
 
 
+# Milliseconds between refreshes of the live statistics while converting
+STATS_REFRESH_MS = 1000
+
+
 class MainWindow:
     """Main application window"""
     
@@ -34,6 +42,11 @@ class MainWindow:
         self.progress_bar = None
         self.convert_button = None
         self.status_label = None
+        self.stats_var = tk.StringVar()
+        
+        # Job of the running conversion, read by the live statistics panel
+        self.current_job = None
+        self.converting = False
         
         # File selection variables
         self.input_path_var = tk.StringVar()
@@ -54,7 +67,7 @@ class MainWindow:
     def _setup_ui(self):
         """Setup the user interface"""
         self.root.title("EPUB/PDF to TXT Converter v1.0.0")
-        self.root.geometry("600x500")
+        self.root.geometry("640x780")
         self.root.resizable(True, True)
         
         # Configure grid weights for responsiveness
@@ -78,6 +91,9 @@ class MainWindow:
         # Progress frame
         self._create_progress_frame(main_frame)
         
+        # Live statistics frame
+        self._create_stats_frame(main_frame)
+        
         # Control buttons frame
         self._create_control_frame(main_frame)
         
@@ -133,12 +149,46 @@ class MainWindow:
         )
         self.browse_input_btn.grid(row=0, column=2, padx=(5, 0), pady=(0, 5))
         
+        # Batch input list: folders, files, glob patterns and file lists converted in one run
+        self.batch_label = ttk.Label(self.file_frame, text="Batch:")
+        self.batch_label.grid(row=1, column=0, sticky=(tk.W, tk.N), pady=(0, 5))
+        
+        self.inputs_listbox = tk.Listbox(self.file_frame, height=4, selectmode=tk.EXTENDED)
+        self.inputs_listbox.grid(row=1, column=1, sticky=(tk.W, tk.E), padx=(5, 5), pady=(0, 5))
+        
+        batch_buttons = ttk.Frame(self.file_frame)
+        batch_buttons.grid(row=1, column=2, sticky=tk.N, padx=(5, 0), pady=(0, 5))
+        
+        self.add_input_btn = ttk.Button(
+            batch_buttons,
+            text="Add",
+            command=self._add_input,
+            width=10
+        )
+        self.add_input_btn.grid(row=0, column=0, pady=(0, 2))
+        
+        self.add_input_list_btn = ttk.Button(
+            batch_buttons,
+            text="Add List",
+            command=self._add_input_list,
+            width=10
+        )
+        self.add_input_list_btn.grid(row=1, column=0, pady=(0, 2))
+        
+        self.remove_input_btn = ttk.Button(
+            batch_buttons,
+            text="Remove",
+            command=self._remove_inputs,
+            width=10
+        )
+        self.remove_input_btn.grid(row=2, column=0)
+        
         # Output selection
         self.output_label = ttk.Label(self.file_frame, text="Output:")
-        self.output_label.grid(row=1, column=0, sticky=tk.W)
+        self.output_label.grid(row=2, column=0, sticky=tk.W)
         
         output_entry = ttk.Entry(self.file_frame, textvariable=self.output_path_var, width=50)
-        output_entry.grid(row=1, column=1, sticky=(tk.W, tk.E), padx=(5, 5))
+        output_entry.grid(row=2, column=1, sticky=(tk.W, tk.E), padx=(5, 5))
         
         self.browse_output_btn = ttk.Button(
             self.file_frame, 
@@ -146,7 +196,7 @@ class MainWindow:
             command=self._browse_output,
             width=10
         )
-        self.browse_output_btn.grid(row=1, column=2, padx=(5, 0))
+        self.browse_output_btn.grid(row=2, column=2, padx=(5, 0))
     
     def _create_options_frame(self, parent):
         """Create conversion options frame"""
@@ -169,7 +219,25 @@ class MainWindow:
             text="Skip existing files",
             variable=self.skip_existing_var
         )
-        self.skip_existing_cb.grid(row=1, column=0, sticky=tk.W)
+        self.skip_existing_cb.grid(row=1, column=0, sticky=tk.W, pady=(0, 5))
+        
+        # Layout-aware PDF extraction option
+        self.pdf_layout_var = tk.BooleanVar(value=self.settings.get_pdf_layout())
+        self.pdf_layout_cb = ttk.Checkbutton(
+            self.options_frame,
+            text="Layout-aware PDF extraction (multi-column)",
+            variable=self.pdf_layout_var
+        )
+        self.pdf_layout_cb.grid(row=2, column=0, sticky=tk.W, pady=(0, 5))
+        
+        # Repeated header/footer removal option
+        self.strip_boilerplate_var = tk.BooleanVar(value=self.settings.get_strip_boilerplate())
+        self.strip_boilerplate_cb = ttk.Checkbutton(
+            self.options_frame,
+            text="Remove repeated headers, footers and page numbers (PDF)",
+            variable=self.strip_boilerplate_var
+        )
+        self.strip_boilerplate_cb.grid(row=3, column=0, sticky=tk.W)
     
     def _create_progress_frame(self, parent):
         """Create progress display frame"""
@@ -193,10 +261,38 @@ class MainWindow:
         )
         self.progress_label.grid(row=1, column=0, sticky=tk.W)
     
+    def _create_stats_frame(self, parent):
+        """Create live statistics frame"""
+        self.stats_frame = ttk.LabelFrame(parent, text="Live Statistics", padding="5")
+        self.stats_frame.grid(row=4, column=0, columnspan=2, sticky=(tk.W, tk.E, tk.N, tk.S), pady=(0, 10))
+        self.stats_frame.columnconfigure(0, weight=1)
+        parent.rowconfigure(4, weight=1)
+        
+        # Throughput, ETA and outcomes
+        self.stats_label = ttk.Label(
+            self.stats_frame,
+            textvariable=self.stats_var,
+            justify=tk.LEFT
+        )
+        self.stats_label.grid(row=0, column=0, sticky=tk.W, pady=(0, 5))
+        
+        # What each worker is converting, longest running first
+        self.workers_tree = ttk.Treeview(
+            self.stats_frame,
+            columns=('worker', 'file', 'pages', 'time'),
+            show='headings',
+            height=4
+        )
+        self.workers_tree.column('worker', width=90, stretch=False)
+        self.workers_tree.column('file', width=300)
+        self.workers_tree.column('pages', width=60, stretch=False, anchor=tk.E)
+        self.workers_tree.column('time', width=70, stretch=False, anchor=tk.E)
+        self.workers_tree.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+    
     def _create_control_frame(self, parent):
         """Create control buttons frame"""
         control_frame = ttk.Frame(parent)
-        control_frame.grid(row=4, column=0, columnspan=2, pady=(0, 10))
+        control_frame.grid(row=5, column=0, columnspan=2, pady=(0, 10))
         
         # Convert button
         self.convert_button = ttk.Button(
@@ -228,7 +324,7 @@ class MainWindow:
     def _create_status_frame(self, parent):
         """Create status bar frame"""
         status_frame = ttk.Frame(parent)
-        status_frame.grid(row=5, column=0, columnspan=2, sticky=(tk.W, tk.E))
+        status_frame.grid(row=6, column=0, columnspan=2, sticky=(tk.W, tk.E))
         status_frame.columnconfigure(0, weight=1)
         
         # Status label
@@ -257,14 +353,23 @@ class MainWindow:
         # Update frame labels
         self.file_frame.config(text=self.lang_manager.get_text('file_selection'))
         self.options_frame.config(text=self.lang_manager.get_text('options'))
+        self.stats_frame.config(text=self.lang_manager.get_text('live_stats'))
+        
+        # Update worker table headings
+        for column in ('worker', 'file', 'pages', 'time'):
+            self.workers_tree.heading(column, text=self.lang_manager.get_text(f'stats_{column}'))
         
         # Update labels
         self.input_label.config(text=self.lang_manager.get_text('input') + ":")
+        self.batch_label.config(text=self.lang_manager.get_text('batch_inputs') + ":")
         self.output_label.config(text=self.lang_manager.get_text('output') + ":")
         
         # Update buttons
         self.browse_input_btn.config(text=self.lang_manager.get_text('browse'))
         self.browse_output_btn.config(text=self.lang_manager.get_text('browse'))
+        self.add_input_btn.config(text=self.lang_manager.get_text('add_input'))
+        self.add_input_list_btn.config(text=self.lang_manager.get_text('add_input_list'))
+        self.remove_input_btn.config(text=self.lang_manager.get_text('remove_input'))
         self.convert_button.config(text=self.lang_manager.get_text('convert'))
         self.clear_button.config(text=self.lang_manager.get_text('clear'))
         self.exit_button.config(text=self.lang_manager.get_text('exit'))
@@ -272,10 +377,13 @@ class MainWindow:
         # Update checkboxes
         self.preserve_structure_cb.config(text=self.lang_manager.get_text('preserve_structure'))
         self.skip_existing_cb.config(text=self.lang_manager.get_text('skip_existing'))
+        self.pdf_layout_cb.config(text=self.lang_manager.get_text('pdf_layout'))
+        self.strip_boilerplate_cb.config(text=self.lang_manager.get_text('strip_boilerplate'))
         
         # Update status
         self.status_label.config(text=self.lang_manager.get_text('ready'))
         self.progress_var.set(self.lang_manager.get_text('ready'))
+        self._refresh_stats()
     
     def _browse_input(self):
         """Browse for input file or folder"""
@@ -306,6 +414,40 @@ class MainWindow:
             if dirname:
                 self.input_path_var.set(dirname)
     
+    def _add_input(self):
+        """Add the input path (a folder, file or glob pattern) to the batch list"""
+        input_path = self.input_path_var.get().strip()
+        if not input_path:
+            self._browse_input()
+            input_path = self.input_path_var.get().strip()
+        if input_path and input_path not in self.inputs_listbox.get(0, tk.END):
+            self.inputs_listbox.insert(tk.END, input_path)
+            self.input_path_var.set("")
+    
+    def _add_input_list(self):
+        """Add a file list (one folder, file or glob pattern per line) to the batch list"""
+        filename = filedialog.askopenfilename(
+            title=self.lang_manager.get_text('select_input_list'),
+            filetypes=[
+                (self.lang_manager.get_text('input_list_files'), '*.txt;*.lst'),
+                (self.lang_manager.get_text('all_files'), '*.*')
+            ]
+        )
+        if filename:
+            self.inputs_listbox.insert(tk.END, INPUT_LIST_PREFIX + filename)
+    
+    def _remove_inputs(self):
+        """Remove the selected entries from the batch list"""
+        for index in reversed(self.inputs_listbox.curselection()):
+            self.inputs_listbox.delete(index)
+    
+    def _get_inputs(self) -> List[str]:
+        """Get the inputs to convert: the batch list, or the input path if the list is empty"""
+        inputs = list(self.inputs_listbox.get(0, tk.END))
+        if not inputs and self.input_path_var.get().strip():
+            inputs = [self.input_path_var.get().strip()]
+        return inputs
+    
     def _browse_output(self):
         """Browse for output folder"""
         dirname = filedialog.askdirectory(
@@ -317,21 +459,29 @@ class MainWindow:
     def _clear_inputs(self):
         """Clear all input fields"""
         self.input_path_var.set("")
+        self.inputs_listbox.delete(0, tk.END)
         self.output_path_var.set("")
         self.progress_bar['value'] = 0
         self.progress_var.set(self.lang_manager.get_text('ready'))
         self.status_label.config(text=self.lang_manager.get_text('ready'))
+        if not self.converting:
+            self.current_job = None
+            self._refresh_stats()
     
     def _load_settings(self):
         """Load settings into UI"""
         self.preserve_structure_var.set(self.settings.get_preserve_structure())
         self.skip_existing_var.set(self.settings.get_skip_existing())
+        self.pdf_layout_var.set(self.settings.get_pdf_layout())
+        self.strip_boilerplate_var.set(self.settings.get_strip_boilerplate())
         
         # Load last used paths
         last_input = self.settings.get_last_input_path()
         last_output = self.settings.get_last_output_path()
         if last_input:
             self.input_path_var.set(last_input)
+        for input_path in self.settings.get_last_inputs():
+            self.inputs_listbox.insert(tk.END, input_path)
         if last_output:
             self.output_path_var.set(last_output)
     
@@ -339,16 +489,19 @@ class MainWindow:
         """Save current settings"""
         self.settings.set_preserve_structure(self.preserve_structure_var.get())
         self.settings.set_skip_existing(self.skip_existing_var.get())
+        self.settings.set_pdf_layout(self.pdf_layout_var.get())
+        self.settings.set_strip_boilerplate(self.strip_boilerplate_var.get())
         self.settings.set_last_input_path(self.input_path_var.get())
+        self.settings.set_last_inputs(list(self.inputs_listbox.get(0, tk.END)))
         self.settings.set_last_output_path(self.output_path_var.get())
         self.settings.save()
     
     def _start_conversion(self):
         """Start the conversion process"""
-        input_path = self.input_path_var.get().strip()
+        inputs = self._get_inputs()
         output_path = self.output_path_var.get().strip()
         
-        if not input_path:
+        if not inputs:
             messagebox.showerror(
                 self.lang_manager.get_text('error'),
                 self.lang_manager.get_text('select_input_path')
@@ -362,10 +515,15 @@ class MainWindow:
             )
             return
         
-        if not Path(input_path).exists():
+        # Glob patterns are checked when they are expanded
+        missing = [input_path for input_path in inputs
+                   if not glob.has_magic(input_path)
+                   and not Path(input_path[len(INPUT_LIST_PREFIX):] if input_path.startswith(INPUT_LIST_PREFIX)
+                                else input_path).exists()]
+        if missing:
             messagebox.showerror(
                 self.lang_manager.get_text('error'),
-                self.lang_manager.get_text('input_not_exist')
+                f"{self.lang_manager.get_text('input_not_exist')}: {missing[0]}"
             )
             return
         
@@ -375,27 +533,53 @@ class MainWindow:
         # Disable convert button during conversion
         self.convert_button.config(state='disabled')
         
+        # Read the options here: Tk variables may only be used on the Tk thread
+        job = self.converter.new_job(
+            preserve_structure=self.preserve_structure_var.get(),
+            skip_existing=self.skip_existing_var.get(),
+            pdf_layout=self.pdf_layout_var.get(),
+            strip_boilerplate=self.strip_boilerplate_var.get(),
+            low_memory=self.settings.get_low_memory(),
+            deduplicate=self.settings.get_deduplicate(),
+            output_encoding=self.settings.get_output_encoding(),
+            page_range=self.settings.get_parsed_page_range(),
+            max_chars=self.settings.get_max_chars() or None,
+            epub_chapters=self.settings.get_epub_chapters(),
+            max_workers=self.settings.get_effective_max_workers(),
+            profile=self.settings.get_profile(),
+            profile_top=self.settings.get_profile_top(),
+            profile_threshold=self.settings.get_profile_threshold(),
+            index_path=self.settings.get_index_path(),
+            index_tokenizer=self.settings.get_index_tokenizer(),
+            output_format=self.settings.get_output_format(),
+            chunk_size=self.settings.get_chunk_size(),
+            chunk_overlap=self.settings.get_chunk_overlap(),
+            chunk_sentences=self.settings.get_chunk_sentences(),
+            split_pages=self.settings.get_split_pages()
+        )
+        
         # Start conversion in separate thread
-        thread = threading.Thread(target=self._convert_files, args=(input_path, output_path))
+        self.current_job = job
+        self.converting = True
+        thread = threading.Thread(target=self._convert_files, args=(job, inputs, output_path))
         thread.daemon = True
         thread.start()
+        
+        # Poll the job's live statistics at a fixed rate; the conversion itself never waits on the GUI
+        self.root.after(STATS_REFRESH_MS, self._poll_stats)
     
-    def _convert_files(self, input_path: str, output_path: str):
+    def _convert_files(self, job: ConversionJob, inputs: List[str], output_path: str):
         """Convert files in background thread"""
         try:
             # Progress callback
             def progress_callback(progress: int, message: str):
                 self.root.after(0, self._update_progress, progress, message)
             
-            # Update converter settings
-            self.converter.preserve_structure = self.preserve_structure_var.get()
-            self.converter.skip_existing = self.skip_existing_var.get()
-            
-            # Convert files
-            if Path(input_path).is_file():
-                success = self.converter.convert_file(input_path, output_path, progress_callback)
+            # Convert files: a single file on its own, anything else as one batch
+            if len(inputs) == 1 and Path(inputs[0]).is_file():
+                success = self.converter.convert_file(inputs[0], output_path, progress_callback, job=job)
             else:
-                success = self.converter.convert_directory(input_path, output_path, progress_callback)
+                success = self.converter.convert_batch(inputs, output_path, progress_callback, job=job)
             
             # Show completion message
             if success:
@@ -414,9 +598,52 @@ class MainWindow:
         self.status_label.config(text=message)
         self.root.update_idletasks()
     
+    def _poll_stats(self):
+        """Refresh the live statistics, and schedule the next refresh while converting"""
+        self._refresh_stats()
+        if self.converting:
+            self.root.after(STATS_REFRESH_MS, self._poll_stats)
+    
+    def _refresh_stats(self):
+        """Show the live statistics of the current job"""
+        self.workers_tree.delete(*self.workers_tree.get_children())
+        if self.current_job is None:
+            self.stats_var.set("")
+            return
+        
+        stats = self.current_job.live_statistics()
+        eta = stats['eta_seconds']
+        self.stats_var.set("\n".join([
+            self.lang_manager.get_text('stats_throughput').format(
+                done=stats['done_files'], total=stats['total_files'], files_rate=stats['files_per_second'],
+                pages=stats['pages'], pages_rate=stats['pages_per_second']),
+            self.lang_manager.get_text('stats_eta').format(
+                elapsed=self._format_duration(stats['elapsed']),
+                eta=self._format_duration(eta) if eta is not None else "--"),
+            self.lang_manager.get_text('stats_outcomes').format(
+                failed=stats['failed'], protected=stats['protected'], cache=stats['cache_hit_rate'])
+        ]))
+        
+        now = time.monotonic()
+        for activity in stats['workers']:
+            name = Path(activity.file_path).name
+            if activity.parts > 1:
+                name += f" ({activity.part + 1}/{activity.parts})"
+            pages = activity.stats.get('pages', 0) if activity.stats is not None else ""
+            self.workers_tree.insert('', tk.END, values=(activity.worker, name, pages,
+                                                         self._format_duration(now - activity.started)))
+    
+    def _format_duration(self, seconds: float) -> str:
+        """Format seconds as H:MM:SS"""
+        minutes, seconds = divmod(int(seconds), 60)
+        hours, minutes = divmod(minutes, 60)
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    
     def _conversion_complete(self, success: bool):
         """Handle conversion completion"""
         self.convert_button.config(state='normal')
+        self.converting = False
+        self._refresh_stats()
         
         if success:
             self.progress_bar['value'] = 100
@@ -439,6 +666,8 @@ class MainWindow:
     def _conversion_error(self, error_message: str):
         """Handle conversion error"""
         self.convert_button.config(state='normal')
+        self.converting = False
+        self._refresh_stats()
         self.progress_var.set(self.lang_manager.get_text('conversion_failed'))
         self.status_label.config(text=self.lang_manager.get_text('conversion_failed'))
         
@@ -93,6 +93,12 @@ class LanguageManager:
             'select_input_path': 'Please select an input file or folder',
             'select_output_path': 'Please select an output folder',
             'input_not_exist': 'Input path does not exist',
+            'batch_inputs': 'Batch',
+            'add_input': 'Add',
+            'add_input_list': 'Add List',
+            'remove_input': 'Remove',
+            'select_input_list': 'Select Input List',
+            'input_list_files': 'Input Lists',
             
             # File types
             'all_supported': 'All Supported Files',
@@ -104,6 +110,8 @@ class LanguageManager:
             'options': 'Options',
             'preserve_structure': 'Preserve folder structure',
             'skip_existing': 'Skip existing files',
+            'pdf_layout': 'Layout-aware PDF extraction (multi-column)',
+            'strip_boilerplate': 'Remove repeated headers, footers and page numbers (PDF)',
             
             # Conversion
             'convert': 'Convert',
@@ -131,6 +139,14 @@ class LanguageManager:
             'files_successful': 'Files successful',
             'files_failed': 'Files failed',
             'total_files': 'Total files',
+            'live_stats': 'Live Statistics',
+            'stats_throughput': 'Files: {done}/{total} ({files_rate:.2f}/s)    Pages: {pages} ({pages_rate:.1f}/s)',
+            'stats_eta': 'Elapsed: {elapsed}    Remaining: {eta}',
+            'stats_outcomes': 'Failed: {failed} ({protected} protected)    Cache hit rate: {cache:.0%}',
+            'stats_worker': 'Worker',
+            'stats_file': 'File',
+            'stats_pages': 'Pages',
+            'stats_time': 'Time',
             
             # Errors
             'file_not_found': 'File not found',
@@ -167,6 +183,12 @@ class LanguageManager:
             'select_input_path': '請選擇輸入檔案或資料夾',
             'select_output_path': '請選擇輸出資料夾',
             'input_not_exist': '輸入路徑不存在',
+            'batch_inputs': '批次',
+            'add_input': '加入',
+            'add_input_list': '加入清單',
+            'remove_input': '移除',
+            'select_input_list': '選擇輸入清單',
+            'input_list_files': '輸入清單',
             
             # File types
             'all_supported': '所有支援的檔案',
@@ -178,6 +200,8 @@ class LanguageManager:
             'options': '選項',
             'preserve_structure': '保留資料夾結構',
             'skip_existing': '跳過現有檔案',
+            'pdf_layout': '版面感知 PDF 提取（多欄）',
+            'strip_boilerplate': '移除重複的頁首、頁尾與頁碼（PDF）',
             
             # Conversion
             'convert': '轉換',
@@ -205,6 +229,14 @@ class LanguageManager:
             'files_successful': '成功檔案',
             'files_failed': '失敗檔案',
             'total_files': '總檔案數',
+            'live_stats': '即時統計',
+            'stats_throughput': '檔案：{done}/{total}（每秒 {files_rate:.2f} 個）    頁數：{pages}（每秒 {pages_rate:.1f} 頁）',
+            'stats_eta': '已用時間：{elapsed}    預估剩餘：{eta}',
+            'stats_outcomes': '失敗：{failed}（受保護 {protected} 個）    快取命中率：{cache:.0%}',
+            'stats_worker': '工作程序',
+            'stats_file': '檔案',
+            'stats_pages': '頁數',
+            'stats_time': '時間',
             
             # Errors
             'file_not_found': '檔案未找到',
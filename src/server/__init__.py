@@ -0,0 +1,7 @@
+"""
+Local HTTP conversion service for EPUB & PDF to TXT Converter
+"""
+
+from .http_server import ConversionServer
+
+__all__ = ['ConversionServer']
@@ -0,0 +1,326 @@
+"""
+Local HTTP server streaming extracted text back to the client
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from core.converter import DocumentToTxtConverter
+from utils import app_logger
+
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+# Largest accepted upload, in bytes
+MAX_UPLOAD_BYTES = 512 * 1024 * 1024
+
+# Seconds a request may wait for a free worker before getting 503
+WORKER_WAIT_TIMEOUT = 30.0
+
+UPLOAD_CHUNK_BYTES = 64 * 1024
+
+SUPPORTED_TYPES = ('epub', 'pdf')
+
+
+class ConversionServer:
+    """
+    HTTP server that keeps one converter loaded and limits concurrent extractions
+
+    Requests are handled on threads of this process sharing the converter, so
+    concurrency is thread-limited: start-up cost is paid once and I/O overlaps,
+    but CPU-bound extraction of several documents does not run in parallel.
+    """
+
+    def __init__(self, converter: DocumentToTxtConverter, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                 max_workers: int = 4, allowed_roots: Optional[List[str]] = None,
+                 max_upload_bytes: int = MAX_UPLOAD_BYTES):
+        """
+        Args:
+            converter: Configured converter shared by all requests
+            host: Interface to bind; keep the loopback default unless the port is firewalled
+            port: TCP port
+            max_workers: Maximum number of documents extracted at once (threads)
+            allowed_roots: Folders whose files may be converted by path; path requests
+                           are refused when empty
+            max_upload_bytes: Largest accepted upload
+        """
+        self.logger = app_logger.get_logger()
+        self.converter = converter
+        self.max_workers = max(1, max_workers)
+        self.allowed_roots = [Path(root).resolve() for root in (allowed_roots or [])]
+        self.max_upload_bytes = max_upload_bytes
+
+        self._workers = threading.BoundedSemaphore(self.max_workers)
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+
+        # Metrics
+        self.metrics = {
+            'requests': 0,
+            'active_conversions': 0,
+            'documents_converted': 0,
+            'documents_failed': 0,
+            'bytes_streamed': 0,
+            'conversion_seconds': 0.0
+        }
+
+        self.httpd = ThreadingHTTPServer((host, port), _ConversionRequestHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.conversion_server = self
+
+    @property
+    def address(self) -> str:
+        """Base URL the server listens on"""
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def serve_forever(self):
+        """Serve requests until shutdown() is called or the process is interrupted"""
+        self.logger.info(f"Conversion service listening on {self.address} "
+                         f"(up to {self.max_workers} concurrent extractions)")
+        try:
+            self.httpd.serve_forever()
+        except KeyboardInterrupt:
+            self.logger.info("Interrupted, stopping conversion service")
+        finally:
+            self.httpd.server_close()
+
+    def shutdown(self):
+        """Stop serve_forever() from another thread"""
+        self.httpd.shutdown()
+
+    def acquire_worker(self) -> bool:
+        """Wait for a free worker slot; False if none freed up in time"""
+        return self._workers.acquire(timeout=WORKER_WAIT_TIMEOUT)
+
+    def release_worker(self):
+        """Return a worker slot"""
+        self._workers.release()
+
+    def count(self, key: str, amount=1):
+        """Add to a metric"""
+        with self._lock:
+            self.metrics[key] += amount
+
+    def snapshot_metrics(self) -> dict:
+        """Get a copy of the metrics with uptime"""
+        with self._lock:
+            metrics = dict(self.metrics)
+        metrics['uptime_seconds'] = round(time.monotonic() - self._started, 3)
+        metrics['workers'] = self.max_workers
+        return metrics
+
+    def is_allowed_path(self, path: Path) -> bool:
+        """Check that a requested path lies inside one of the allowed roots"""
+        resolved = path.resolve()
+        for root in self.allowed_roots:
+            if resolved == root or root in resolved.parents:
+                return True
+        return False
+
+
+class _ConversionRequestHandler(BaseHTTPRequestHandler):
+    """Request handler for the conversion service"""
+
+    # Chunked transfer encoding needs HTTP/1.1
+    protocol_version = 'HTTP/1.1'
+    server_version = 'EpubPdfToTxt/1.0'
+
+    @property
+    def service(self) -> ConversionServer:
+        return self.server.conversion_server
+
+    def log_message(self, format, *args):
+        self.service.logger.debug("%s - " + format, self.address_string(), *args)
+
+    def do_GET(self):
+        route = urlparse(self.path).path
+        if route == '/health':
+            self._send_json(200, {'status': 'ok'})
+        elif route == '/metrics':
+            self._send_json(200, self.service.snapshot_metrics())
+        else:
+            self._send_json(404, {'error': f"Unknown endpoint: {route}"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != '/convert':
+            self._send_json(404, {'error': f"Unknown endpoint: {url.path}"})
+            return
+
+        self.service.count('requests')
+        query = parse_qs(url.query)
+        upload_path = None
+
+        try:
+            if 'path' in query:
+                if not self._discard_body():
+                    return
+                input_path = Path(query['path'][0])
+                if not self.service.allowed_roots or not self.service.is_allowed_path(input_path):
+                    self._send_json(403, {'error': "Path is outside the allowed roots"})
+                    return
+                if not input_path.is_file():
+                    self._send_json(404, {'error': f"File not found: {input_path}"})
+                    return
+            else:
+                upload_path = self._receive_upload(query)
+                if upload_path is None:
+                    return
+                input_path = upload_path
+
+            if input_path.suffix.lower().lstrip('.') not in SUPPORTED_TYPES:
+                self._send_json(415, {'error': f"Unsupported file type: {input_path.suffix}"})
+                return
+
+            if not self.service.acquire_worker():
+                self._send_json(503, {'error': "All workers are busy"})
+                return
+            try:
+                self._stream_conversion(input_path)
+            finally:
+                self.service.release_worker()
+
+        finally:
+            if upload_path is not None:
+                self._discard_upload(upload_path)
+
+    def _receive_upload(self, query: dict) -> Optional[Path]:
+        """Save the request body to a temporary file with the right extension"""
+        file_type = query.get('type', [''])[0].lower()
+        if not file_type:
+            filename = query.get('filename', [self.headers.get('X-Filename', '')])[0]
+            file_type = Path(filename).suffix.lower().lstrip('.')
+        if file_type not in SUPPORTED_TYPES:
+            self._send_json(415, {'error': "Give the document type with ?type=epub|pdf or a filename"})
+            return None
+
+        try:
+            length = int(self.headers.get('Content-Length', ''))
+        except ValueError:
+            self._send_json(411, {'error': "Content-Length is required for uploads"})
+            return None
+        if length > self.service.max_upload_bytes:
+            self._send_json(413, {'error': f"Upload exceeds {self.service.max_upload_bytes} bytes"})
+            return None
+
+        upload = tempfile.NamedTemporaryFile(suffix=f".{file_type}", delete=False)
+        remaining = length
+        try:
+            with upload:
+                while remaining > 0:
+                    chunk = self.rfile.read(min(UPLOAD_CHUNK_BYTES, remaining))
+                    if not chunk:
+                        break
+                    upload.write(chunk)
+                    remaining -= len(chunk)
+        except Exception as e:
+            self.service.logger.warning(f"Error receiving upload: {str(e)}")
+            self._discard_upload(upload.name)
+            self.close_connection = True
+            return None
+
+        if remaining > 0:
+            # The client closed its side early; a truncated document must not be converted
+            self._discard_upload(upload.name)
+            self._send_json(400, {'error': f"Upload ended after {length - remaining} of {length} bytes"})
+            return None
+
+        return Path(upload.name)
+
+    def _discard_body(self) -> bool:
+        """Read and drop a request body that is not used, so the connection can take another request"""
+        try:
+            remaining = int(self.headers.get('Content-Length', '') or 0)
+        except ValueError:
+            self._send_json(400, {'error': "Invalid Content-Length"})
+            return False
+        if remaining > self.service.max_upload_bytes:
+            self._send_json(413, {'error': f"Request body exceeds {self.service.max_upload_bytes} bytes"})
+            return False
+
+        while remaining > 0:
+            chunk = self.rfile.read(min(UPLOAD_CHUNK_BYTES, remaining))
+            if not chunk:
+                self.close_connection = True
+                break
+            remaining -= len(chunk)
+        return True
+
+    def _discard_upload(self, upload_path):
+        """Delete a temporary upload file"""
+        try:
+            os.unlink(upload_path)
+        except OSError:
+            pass
+
+    def _stream_conversion(self, input_path: Path):
+        """Send extracted text as chunks while the document is being processed"""
+        service = self.service
+        start = time.monotonic()
+        service.count('active_conversions')
+        segments = service.converter.iter_segments(str(input_path))
+
+        try:
+            # Pull the first segment before committing to a 200 response
+            first = next(segments, None)
+            if first is None:
+                service.count('documents_failed')
+                self._send_json(422, {'error': "No text content could be extracted"})
+                return
+
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; charset=utf-8')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+
+            streamed = self._write_chunk(first.text.encode('utf-8'))
+            for segment in segments:
+                streamed += self._write_chunk((segment.separator + segment.text).encode('utf-8'))
+            self.wfile.write(b"0\r\n\r\n")
+
+            service.count('documents_converted')
+            service.count('bytes_streamed', streamed)
+            service.logger.info(f"Streamed {streamed} bytes from {input_path} "
+                                f"in {time.monotonic() - start:.3f}s")
+
+        except (BrokenPipeError, ConnectionResetError):
+            service.logger.warning(f"Client disconnected while streaming {input_path}")
+            self.close_connection = True
+
+        except Exception as e:
+            service.count('documents_failed')
+            service.logger.error(f"Error streaming {input_path}: {str(e)}")
+            self.close_connection = True
+
+        finally:
+            segments.close()
+            service.count('active_conversions', -1)
+            service.count('conversion_seconds', time.monotonic() - start)
+
+    def _write_chunk(self, data: bytes) -> int:
+        """Write one chunk of a chunked response"""
+        if data:
+            self.wfile.write(b"%X\r\n%s\r\n" % (len(data), data))
+            self.wfile.flush()
+        return len(data)
+
+    def _send_json(self, status: int, payload: dict):
+        """Send a complete JSON response"""
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        if status >= 400:
+            # An unread request body would corrupt the next request on this connection
+            self.close_connection = True
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
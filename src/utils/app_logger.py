@@ -1,12 +1,38 @@
 """
 Application logger configuration
+
+Records are handed to a queue and written to the console and log file by a
+background thread, so converting threads never wait on handler locks or disk
+writes. Worker processes log through a multiprocessing queue drained by the
+same handlers (see get_process_queue and configure_worker).
 """
 
+import atexit
 import logging
+import logging.handlers
+import multiprocessing
+import queue
 import sys
+import threading
 from pathlib import Path
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
+
+
+# Folder log files are written to, relative to the working directory
+LOG_DIR = 'logs'
+
+# Size at which the log file is rotated, and how many rotated files are kept
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
+
+
+class _LocalQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler for records consumed in this process"""
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Enqueue records as they are, so messages are formatted on the listener thread"""
+        return record
 
 
 class AppLogger:
@@ -22,18 +48,33 @@ class AppLogger:
     
     def __init__(self):
         if self._logger is None:
-            self._setup_logger()
+            self._handlers: List[logging.Handler] = []
+            self._listeners: List[logging.handlers.QueueListener] = []
+            self._process_queue = None
+            self._setup_lock = threading.Lock()
+            # Handlers are created on first use, so worker processes that import
+            # this module never open a log file of their own (see configure_worker)
+            self._configured = False
+            
+            # Create logger
+            self._logger = logging.getLogger('epub_pdf_converter')
+            self._logger.setLevel(logging.DEBUG)
     
     def _setup_logger(self):
-        """Setup the application logger"""
-        # Create logger
-        self._logger = logging.getLogger('epub_pdf_converter')
-        self._logger.setLevel(logging.DEBUG)
-        
-        # Prevent duplicate handlers
-        if self._logger.handlers:
-            return
-        
+        """Setup the handlers of the application logger"""
+        with self._setup_lock:
+            if self._configured:
+                return
+            self._configured = True
+            
+            # Prevent duplicate handlers
+            if self._logger.handlers:
+                return
+            
+            self._setup_handlers()
+    
+    def _setup_handlers(self):
+        """Create the console and file handlers and the listener thread writing to them"""
         # Create formatters
         console_formatter = logging.Formatter(
             '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
@@ -49,32 +90,93 @@ class AppLogger:
         console_handler = logging.StreamHandler(sys.stdout)
         console_handler.setLevel(logging.INFO)
         console_handler.setFormatter(console_formatter)
-        self._logger.addHandler(console_handler)
+        self._handlers.append(console_handler)
         
         # File handler
+        log_file = None
+        file_error = None
         try:
             # Create logs directory if it doesn't exist
-            logs_dir = Path('logs')
-            logs_dir.mkdir(exist_ok=True)
+            logs_dir = Path(LOG_DIR)
+            logs_dir.mkdir(parents=True, exist_ok=True)
             
-            # Create log file with timestamp
+            # Create log file with timestamp, rotated when it reaches LOG_MAX_BYTES
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             log_file = logs_dir / f'epub_converter_{timestamp}.log'
             
-            file_handler = logging.FileHandler(log_file, encoding='utf-8')
+            file_handler = logging.handlers.RotatingFileHandler(log_file, maxBytes=LOG_MAX_BYTES,
+                                                                backupCount=LOG_BACKUP_COUNT, encoding='utf-8')
             file_handler.setLevel(logging.DEBUG)
             file_handler.setFormatter(file_formatter)
-            self._logger.addHandler(file_handler)
-            
-            self._logger.info(f"Log file created: {log_file}")
-            
+            self._handlers.append(file_handler)
+        
         except Exception as e:
-            self._logger.warning(f"Could not create file logger: {str(e)}")
+            file_error = e
+        
+        # Every record goes through a queue to the listener thread that owns the handlers
+        log_queue = queue.SimpleQueue()
+        self._logger.addHandler(_LocalQueueHandler(log_queue))
+        self._start_listener(log_queue)
+        atexit.register(self.stop)
+        
+        if file_error is None:
+            self._logger.info("Log file created: %s", log_file)
+        else:
+            self._logger.warning("Could not create file logger: %s", file_error)
+    
+    def _start_listener(self, log_queue):
+        """Start a background thread writing records from a queue to the handlers"""
+        listener = logging.handlers.QueueListener(log_queue, *self._handlers, respect_handler_level=True)
+        listener.start()
+        self._listeners.append(listener)
     
     def get_logger(self) -> logging.Logger:
         """Get the application logger"""
+        if not self._configured:
+            self._setup_logger()
         return self._logger
     
+    def get_process_queue(self):
+        """
+        Get the queue worker processes log to, creating it on first use
+        
+        Returns:
+            multiprocessing.Queue: Queue drained into this process's handlers
+        """
+        self.get_logger()
+        if self._process_queue is None:
+            self._process_queue = multiprocessing.Queue(-1)
+            self._start_listener(self._process_queue)
+        return self._process_queue
+    
+    def configure_worker(self, log_queue, level: int):
+        """
+        Send this process's records to a parent's queue (runs in a worker process)
+        
+        Args:
+            log_queue: Queue from get_process_queue in the parent
+            level: Logging level of the parent
+        """
+        with self._setup_lock:
+            self._configured = True
+        for handler in list(self._logger.handlers):
+            self._logger.removeHandler(handler)
+        # Records are pickled, so QueueHandler formats their message before enqueueing
+        self._logger.addHandler(logging.handlers.QueueHandler(log_queue))
+        self._logger.setLevel(level)
+    
+    def flush(self):
+        """Wait until every record logged so far has been written"""
+        for listener in self._listeners:
+            # Stopping drains the queue up to its sentinel; the thread is then restarted
+            listener.stop()
+            listener.start()
+    
+    def stop(self):
+        """Write out queued records and stop the listener threads"""
+        while self._listeners:
+            self._listeners.pop().stop()
+    
     def set_level(self, level: str):
         """Set logging level"""
         level_map = {
@@ -85,6 +187,7 @@ class AppLogger:
             'CRITICAL': logging.CRITICAL
         }
         
+        self.get_logger()
         if level.upper() in level_map:
             self._logger.setLevel(level_map[level.upper()])
             self._logger.info(f"Log level set to {level.upper()}")
@@ -104,3 +207,18 @@ def get_logger() -> logging.Logger:
 def set_log_level(level: str):
     """Set the logging level"""
     _app_logger.set_level(level)
+
+
+def flush():
+    """Wait until every record logged so far has been written"""
+    _app_logger.flush()
+
+
+def get_process_queue():
+    """Get the queue worker processes log to (pass it to configure_worker)"""
+    return _app_logger.get_process_queue()
+
+
+def configure_worker(log_queue, level: int):
+    """Process pool initializer sending a worker's records to its parent's queue"""
+    _app_logger.configure_worker(log_queue, level)
@@ -0,0 +1,206 @@
+"""
+Character encoding detection and encoded output helpers
+"""
+
+import codecs
+import os
+import re
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator, Optional, Union
+
+from utils import app_logger
+
+
+# Bytes searched for an XML declaration or meta charset
+DECLARATION_SCAN_BYTES = 4096
+
+# Characters written per call when streaming text to a file
+WRITE_CHUNK_CHARS = 1024 * 1024
+
+# Bytes read per call when decoding a document from a stream
+READ_CHUNK_BYTES = 256 * 1024
+
+# Declared charsets decoded with the superset codec publishers actually use
+DECODE_SUPERSETS = {
+    'big5': 'cp950',
+    'gb2312': 'gb18030',
+    'gbk': 'gb18030',
+    'shift_jis': 'cp932',
+    'euc_kr': 'cp949',
+    'ascii': 'utf-8',
+    'iso8859-1': 'cp1252'
+}
+
+# Strict-decode candidates tried when nothing is declared and no detector is installed
+FALLBACK_ENCODINGS = ('cp950', 'gb18030', 'cp932', 'cp949')
+
+_XML_DECLARATION = re.compile(rb'^\s*<\?xml[^>]*?encoding\s*=\s*["\']([A-Za-z0-9._:-]+)["\']')
+_META_CHARSET = re.compile(rb'<meta[^>]*?charset\s*=\s*["\']?\s*([A-Za-z0-9._:-]+)', re.IGNORECASE)
+
+_BOMS = (
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16')
+)
+
+
+def normalize_encoding(encoding: str) -> Optional[str]:
+    """
+    Get the canonical Python codec name of an encoding label
+
+    Args:
+        encoding: Encoding label, e.g. 'UTF-8' or 'Big5'
+
+    Returns:
+        Optional[str]: Canonical codec name, or None if unknown
+    """
+    try:
+        return codecs.lookup(encoding.strip()).name
+    except (LookupError, AttributeError):
+        return None
+
+
+def detect_markup_encoding(data: bytes, partial: bool = False) -> str:
+    """
+    Detect the encoding of an XHTML/HTML/XML document
+
+    A byte order mark wins, then the XML declaration, then a meta charset;
+    undeclared documents that are not valid UTF-8 go to a heuristic detector.
+
+    Args:
+        data: Raw document bytes
+        partial: data is only the start of the document, and may end inside a character
+
+    Returns:
+        str: Python codec name to decode the document with
+    """
+    for bom, encoding in _BOMS:
+        if data.startswith(bom):
+            return encoding
+
+    head = data[:DECLARATION_SCAN_BYTES]
+    for pattern in (_XML_DECLARATION, _META_CHARSET):
+        match = pattern.search(head)
+        if match:
+            declared = normalize_encoding(match.group(1).decode('ascii'))
+            if declared:
+                return DECODE_SUPERSETS.get(declared, declared)
+
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(data, final=not partial)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+
+    return _guess_encoding(data)
+
+
+def _guess_encoding(data: bytes) -> str:
+    """Guess the encoding of undeclared, non-UTF-8 bytes"""
+    try:
+        from charset_normalizer import from_bytes
+        best = from_bytes(data).best()
+        if best is not None:
+            guessed = normalize_encoding(best.encoding)
+            if guessed:
+                return DECODE_SUPERSETS.get(guessed, guessed)
+    except ImportError:
+        pass
+
+    for encoding in FALLBACK_ENCODINGS:
+        try:
+            data.decode(encoding)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+
+    return 'utf-8'
+
+
+def decode_markup(data: bytes) -> str:
+    """
+    Decode an XHTML/HTML/XML document using its detected encoding
+
+    Args:
+        data: Raw document bytes
+
+    Returns:
+        str: Decoded document; undecodable bytes become U+FFFD
+    """
+    encoding = detect_markup_encoding(data)
+    if encoding != 'utf-8':
+        app_logger.get_logger().debug("Decoding document as %s", encoding)
+    return data.decode(encoding, errors='replace')
+
+
+def iter_decoded_markup(stream: BinaryIO, chunk_size: int = READ_CHUNK_BYTES) -> Iterator[str]:
+    """
+    Decode an XHTML/HTML/XML document from a binary stream a chunk at a time
+
+    The encoding is detected from the first chunk, so an undeclared document
+    is judged by its start only.
+
+    Args:
+        stream: Binary stream positioned at the start of the document
+        chunk_size: Bytes read per chunk
+
+    Returns:
+        Iterator[str]: Decoded text; undecodable bytes become U+FFFD
+    """
+    data = stream.read(chunk_size)
+    encoding = detect_markup_encoding(data, partial=True)
+    if encoding != 'utf-8':
+        app_logger.get_logger().debug("Decoding document as %s", encoding)
+
+    decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+    while data:
+        text = decoder.decode(data)
+        if text:
+            yield text
+        data = stream.read(chunk_size)
+
+    text = decoder.decode(b'', final=True)
+    if text:
+        yield text
+
+
+def write_text_file(path: Union[str, Path], text: Union[str, Iterable[str]], encoding: str = 'utf-8') -> int:
+    """
+    Write text to a file in the given encoding, streaming in bounded chunks
+
+    Characters the encoding cannot represent are written as '?', and line ends
+    are written as '\n' on every platform so character offsets recorded for
+    the text (search index, split index.json) hold in the file. The text is
+    written to a '.part' file that replaces path once complete, so a failure
+    while the pieces are produced never leaves a truncated file at path.
+
+    Args:
+        path: Output file path
+        text: Text, or an iterable of text pieces
+        encoding: Output encoding, e.g. 'utf-8', 'big5' or 'cp950'
+
+    Returns:
+        int: Number of characters written
+    """
+    codec = normalize_encoding(encoding)
+    if codec is None:
+        app_logger.get_logger().warning(f"Unknown output encoding '{encoding}', using utf-8")
+        codec = 'utf-8'
+
+    pieces = [text] if isinstance(text, str) else text
+    written = 0
+    temp_path = Path(str(path) + '.part')
+
+    try:
+        with open(temp_path, 'w', encoding=codec, errors='replace', newline='') as f:
+            for piece in pieces:
+                for start in range(0, len(piece), WRITE_CHUNK_CHARS):
+                    written += f.write(piece[start:start + WRITE_CHUNK_CHARS])
+        os.replace(temp_path, path)
+    finally:
+        if temp_path.exists():
+            temp_path.unlink()
+
+    return written
@@ -0,0 +1,93 @@
+"""
+Conversion report generation
+"""
+
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from utils import app_logger
+
+
+# Report labels for known statistics keys, in display order
+STAT_LABELS = {
+    'total_files': 'Total files',
+    'successful': 'Successful',
+    'failed': 'Failed',
+    'protected': 'Protected (encrypted or DRM, not extracted)',
+    'skipped': 'Skipped',
+    'duplicates': 'Duplicates (output shared, not re-extracted)',
+    'pages': 'Pages / spine items processed',
+    'bytes_in': 'Input bytes',
+    'bytes_out': 'Output bytes',
+    'seconds': 'Conversion time (seconds, summed over files)',
+    'boilerplate_bytes_removed': 'Header/footer bytes removed',
+    'image_pages_skipped': 'Image-only EPUB pages skipped',
+    'peak_rss_bytes': 'Peak memory (RSS bytes)'
+}
+
+
+def generate_conversion_report(stats: dict, files: List[Path], report_path: Path,
+                               duplicate_groups: Optional[List[List[Path]]] = None,
+                               results: Optional[Iterable] = None,
+                               profiles: Optional[Dict[str, Path]] = None) -> bool:
+    """
+    Write a plain-text conversion report
+
+    Args:
+        stats: Conversion statistics
+        files: Files included in the conversion
+        report_path: Path of the report file
+        duplicate_groups: Optional groups of identical input files
+        results: Optional per-file results (core.results.ResultTable); when
+                 given, the file list shows each file's outcome
+        profiles: Optional profile file of each profiled input path
+
+    Returns:
+        bool: True if the report was written
+    """
+    logger = app_logger.get_logger()
+
+    try:
+        with open(report_path, 'w', encoding='utf-8') as f:
+            f.write("EPUB & PDF to TXT Converter - Conversion Report\n")
+            f.write(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+            f.write("\nSummary\n-------\n")
+
+            for key, label in STAT_LABELS.items():
+                if key in stats:
+                    f.write(f"{label}: {stats[key]}\n")
+            for key, value in stats.items():
+                if key not in STAT_LABELS:
+                    f.write(f"{key.replace('_', ' ').capitalize()}: {value}\n")
+
+            f.write("\nFiles\n-----\n")
+            if results is not None:
+                # Written one record at a time so huge batches never build the whole report in memory
+                for result in results:
+                    backend = f", {result.backend}" if result.backend else ""
+                    reason = f" ({result.reason})" if result.reason else ""
+                    f.write(f"[{result.status}] {result.path} - {result.duration:.2f}s, {result.pages} pages, "
+                            f"{result.bytes_in} -> {result.bytes_out} bytes{backend}{reason}\n")
+            else:
+                for file_path in files:
+                    f.write(f"{file_path}\n")
+
+            if duplicate_groups:
+                f.write("\nDuplicate groups\n----------------\n")
+                for index, group in enumerate(duplicate_groups, 1):
+                    f.write(f"Group {index}: {group[0]}\n")
+                    for file_path in group[1:]:
+                        f.write(f"    = {file_path}\n")
+
+            if profiles:
+                f.write("\nProfiles\n--------\n")
+                for input_path, profile_file in profiles.items():
+                    f.write(f"{input_path}: {profile_file}\n")
+
+        logger.info(f"Conversion report saved to {report_path}")
+        return True
+
+    except Exception as e:
+        logger.error(f"Error writing conversion report {report_path}: {str(e)}")
+        return False
@@ -0,0 +1,51 @@
+"""
+Process resource usage helpers
+"""
+
+import os
+import sys
+
+
+def get_rss_bytes() -> int:
+    """
+    Get the current resident set size of this process
+
+    Returns:
+        int: RSS in bytes, or 0 if it cannot be determined
+    """
+    # Linux: current RSS without any third-party dependency
+    try:
+        with open('/proc/self/statm', 'rb') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except Exception:
+        return get_peak_rss_bytes()
+
+
+def get_peak_rss_bytes() -> int:
+    """
+    Get the peak resident set size of this process since it started
+
+    Returns:
+        int: Peak RSS in bytes, or 0 if it cannot be determined
+    """
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+        return peak if sys.platform == 'darwin' else peak * 1024
+    except ImportError:
+        pass
+
+    try:
+        import psutil
+        memory_info = psutil.Process().memory_info()
+        return getattr(memory_info, 'peak_wset', memory_info.rss)
+    except Exception:
+        return 0
@@ -0,0 +1,121 @@
+"""
+Shared pytest setup: the application packages live under src/, as when main.py runs
+"""
+
+import io
+import sys
+import zipfile
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from utils import app_logger  # noqa: E402
+
+
+@pytest.fixture(scope='session', autouse=True)
+def log_dir(tmp_path_factory):
+    """Write the application log of a test run to a temporary folder instead of logs/"""
+    app_logger.LOG_DIR = str(tmp_path_factory.mktemp('logs'))
+    return app_logger.LOG_DIR
+
+
+def pdf_bytes(pages: Sequence[Sequence[str]]) -> bytes:
+    """Build a PDF with one page per list of text lines, in Helvetica; an empty list gives a blank page"""
+    objects: List[bytes] = [b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>", b""]
+    kids = []
+    for lines in pages:
+        stream = "BT\n"
+        for number, line in enumerate(lines):
+            shown = line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+            stream += f"/F1 11 Tf 1 0 0 1 72 {720 - 16 * number} Tm ({shown}) Tj\n"
+        stream += "ET"
+        data = stream.encode('latin-1')
+        objects.append(b"<< /Length %d >>\nstream\n" % len(data) + data + b"\nendstream")
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents %d 0 R "
+                       b"/Resources << /Font << /F1 1 0 R >> >> >>" % len(objects))
+        kids.append(len(objects))
+    objects[1] = (b"<< /Type /Pages /Kids [" + b" ".join(b"%d 0 R" % kid for kid in kids) +
+                  b"] /Count %d >>" % len(kids))
+    objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, len(objects), xref)
+    return bytes(out)
+
+
+def epub_bytes(items: Sequence[Tuple[str, str]], toc: Optional[Sequence[Tuple[str, str]]] = None,
+               extra: Optional[Sequence[Tuple[str, bytes]]] = None) -> bytes:
+    """
+    Build an EPUB from (file name, body markup) content files in reading order
+
+    toc holds (title, href) entries written as an NCX; extra holds further
+    (member name, bytes) members such as META-INF/rights.xml.
+    """
+    manifest = "".join(f'<item id="i{index}" href="{name}" media-type="application/xhtml+xml"/>'
+                       for index, (name, _) in enumerate(items))
+    spine = "".join(f'<itemref idref="i{index}"/>' for index in range(len(items)))
+    spine_attributes = ""
+    members = [("META-INF/container.xml",
+                '<?xml version="1.0"?><container version="1.0" '
+                'xmlns="urn:oasis:names:tc:opendocument:xmlns:container"><rootfiles>'
+                '<rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/>'
+                '</rootfiles></container>')]
+
+    if toc:
+        points = "".join(f'<navPoint id="p{index}"><navLabel><text>{title}</text></navLabel>'
+                         f'<content src="{href}"/></navPoint>' for index, (title, href) in enumerate(toc))
+        manifest += '<item id="ncx" href="toc.ncx" media-type="application/x-dtbncx+xml"/>'
+        spine_attributes = ' toc="ncx"'
+        members.append(("OEBPS/toc.ncx",
+                        '<?xml version="1.0" encoding="utf-8"?><ncx xmlns="http://www.daisy.org/z3986/2005/ncx/" '
+                        f'version="2005-1"><navMap>{points}</navMap></ncx>'))
+
+    members.append(("OEBPS/content.opf",
+                    '<?xml version="1.0" encoding="utf-8"?><package xmlns="http://www.idpf.org/2007/opf" '
+                    'version="3.0"><metadata xmlns:dc="http://purl.org/dc/elements/1.1/">'
+                    f'<dc:title>Test</dc:title></metadata><manifest>{manifest}</manifest>'
+                    f'<spine{spine_attributes}>{spine}</spine></package>'))
+    members.extend((f"OEBPS/{name}",
+                    '<?xml version="1.0" encoding="utf-8"?><html xmlns="http://www.w3.org/1999/xhtml">'
+                    f'<head><title></title></head><body>{body}</body></html>') for name, body in items)
+    members.extend(extra or [])
+
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("mimetype", "application/epub+zip", compress_type=zipfile.ZIP_STORED)
+        for name, data in members:
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def make_pdf(tmp_path):
+    """Write a PDF built by pdf_bytes under tmp_path and return its path"""
+    def make(name: str, pages: Sequence[Sequence[str]]) -> Path:
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(pdf_bytes(pages))
+        return path
+    return make
+
+
+@pytest.fixture
+def make_epub(tmp_path):
+    """Write an EPUB built by epub_bytes under tmp_path and return its path"""
+    def make(name: str, items: Sequence[Tuple[str, str]], toc: Optional[Sequence[Tuple[str, str]]] = None,
+             extra: Optional[Sequence[Tuple[str, bytes]]] = None) -> Path:
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(epub_bytes(items, toc, extra))
+        return path
+    return make
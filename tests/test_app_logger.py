@@ -0,0 +1,43 @@
+"""
+Tests for the queued application logger
+"""
+
+import logging.handlers
+import threading
+from pathlib import Path
+
+from utils import app_logger
+
+
+def _log_file() -> str:
+    handlers = app_logger._app_logger._handlers
+    return next(handler.baseFilename for handler in handlers
+                if isinstance(handler, logging.handlers.RotatingFileHandler))
+
+
+def test_records_are_queued_for_the_listener_thread():
+    logger = app_logger.get_logger()
+
+    assert [type(handler) for handler in logger.handlers] == [app_logger._LocalQueueHandler]
+
+
+def test_flush_writes_records_of_every_thread():
+    logger = app_logger.get_logger()
+    threads = [threading.Thread(target=logger.info, args=(f"queued record from thread {number}",))
+               for number in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    app_logger.flush()
+
+    with open(_log_file(), encoding='utf-8') as f:
+        content = f.read()
+    assert all(f"queued record from thread {number}" in content for number in range(4))
+
+
+def test_test_runs_log_outside_the_repository(log_dir):
+    app_logger.get_logger()
+
+    assert Path(_log_file()).parent == Path(log_dir)
@@ -0,0 +1,69 @@
+"""
+Tests for the asyncio facade
+"""
+
+import asyncio
+
+import pytest
+
+from core.async_converter import AsyncDocumentConverter
+
+CHAPTERS = [(f"c{number}.xhtml", f"<p>Chapter {number} text.</p>") for number in range(1, 21)]
+
+
+def test_convert_file_returns_the_result(make_epub, tmp_path):
+    epub = make_epub('book.epub', CHAPTERS[:2])
+    progress = []
+
+    async def convert():
+        async with AsyncDocumentConverter() as converter:
+            return await converter.convert_file(str(epub), str(tmp_path / 'out'),
+                                                lambda value, message: progress.append(value))
+
+    assert asyncio.run(convert()) is True
+    assert (tmp_path / 'out' / 'book.txt').read_text(encoding='utf-8') == 'Chapter 1 text.\n\nChapter 2 text.'
+    assert progress[-1] == 100
+
+
+def test_missing_file_is_reported_as_failure(tmp_path):
+    async def convert():
+        async with AsyncDocumentConverter() as converter:
+            return await converter.convert_file(str(tmp_path / 'missing.pdf'), str(tmp_path / 'out'))
+
+    assert asyncio.run(convert()) is False
+
+
+def test_extract_text_joins_the_streamed_segments(make_epub):
+    epub = make_epub('book.epub', CHAPTERS[:3])
+
+    async def extract():
+        async with AsyncDocumentConverter() as converter:
+            return await converter.extract_text(str(epub))
+
+    assert asyncio.run(extract()) == 'Chapter 1 text.\n\nChapter 2 text.\n\nChapter 3 text.'
+
+
+def test_cancelled_consumer_stops_the_extraction(make_epub):
+    epub = make_epub('book.epub', CHAPTERS)
+    received = []
+
+    async def consume(converter):
+        async for event in converter.iter_events(str(epub)):
+            if event.kind == 'text':
+                received.append(event.segment.index)
+                await asyncio.sleep(3600)
+
+    async def cancel():
+        async with AsyncDocumentConverter(max_concurrency=1, queue_size=1) as converter:
+            task = asyncio.create_task(consume(converter))
+            while not received:
+                await asyncio.sleep(0.01)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            # The only executor thread is free again once the extraction has wound down
+            return await converter.extract_text(str(epub))
+
+    text = asyncio.run(asyncio.wait_for(cancel(), timeout=30))
+    assert received == [1]
+    assert text.startswith('Chapter 1 text.') and text.endswith('Chapter 20 text.')
@@ -0,0 +1,78 @@
+"""
+Tests for discovering a batch's input files
+"""
+
+from pathlib import Path
+
+from core.batch_inputs import expand_inputs, iter_batch_inputs
+from core.converter import DocumentToTxtConverter
+
+
+def _touch(path: Path) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b'')
+    return path
+
+
+def test_expand_inputs_reads_lists_relative_to_their_folder(tmp_path):
+    lists = tmp_path / 'lists'
+    lists.mkdir()
+    (lists / 'more.txt').write_text('other.pdf\n', encoding='utf-8')
+    (lists / 'main.txt').write_text('# comment\n\nbooks\n@more.txt\n', encoding='utf-8')
+
+    expanded = expand_inputs(['first.epub', '@' + str(lists / 'main.txt'), 'last.pdf'])
+
+    assert expanded == ['first.epub', str(lists / 'books'), str(lists / 'other.pdf'), 'last.pdf']
+
+
+def test_expand_inputs_skips_missing_lists(tmp_path):
+    assert expand_inputs(['@' + str(tmp_path / 'missing.txt'), 'a.pdf']) == ['a.pdf']
+
+
+def test_expand_inputs_reads_each_list_once(tmp_path):
+    (tmp_path / 'self.txt').write_text('a.pdf\n@self.txt\n', encoding='utf-8')
+    (tmp_path / 'ping.txt').write_text('b.pdf\n@pong.txt\n', encoding='utf-8')
+    (tmp_path / 'pong.txt').write_text('c.pdf\n@ping.txt\n', encoding='utf-8')
+
+    expanded = expand_inputs(['@' + str(tmp_path / 'self.txt'), '@' + str(tmp_path / 'ping.txt'),
+                              '@' + str(tmp_path / 'pong.txt')])
+
+    assert expanded == [str(tmp_path / name) for name in ('a.pdf', 'b.pdf', 'c.pdf')]
+
+
+def test_batch_inputs_find_supported_files_once(tmp_path):
+    book = _touch(tmp_path / 'in' / 'sub' / 'book.pdf')
+    _touch(tmp_path / 'in' / 'notes.txt')
+
+    found = list(iter_batch_inputs([str(tmp_path / 'in'), str(book)]))
+
+    assert [item.path for item in found] == [book]
+    assert found[0].root == tmp_path / 'in'
+    assert found[0].prefix == ''
+
+
+def test_batch_inputs_give_each_tree_its_own_prefix(tmp_path):
+    first = _touch(tmp_path / 'a' / 'books' / 'one.pdf')
+    second = _touch(tmp_path / 'b' / 'books' / 'two.epub')
+
+    found = {item.path: item.prefix for item in iter_batch_inputs([str(first.parent), str(second.parent)])}
+
+    assert found == {first: 'books', second: 'books_2'}
+
+
+def test_existing_paths_with_wildcard_characters_are_not_patterns(tmp_path):
+    folder = tmp_path / '[Author] Title'
+    book = _touch(folder / 'book.pdf')
+    single = _touch(tmp_path / 'loose' / '[1] one.epub')
+
+    found = list(iter_batch_inputs([str(folder), str(single)]))
+
+    assert [(item.path, item.root) for item in found] == [(book, folder), (single, single.parent)]
+
+
+def test_directory_with_a_bracketed_name_is_converted(make_pdf, tmp_path):
+    make_pdf('[Author] Title/book.pdf', [["Chapter one."]])
+    converter = DocumentToTxtConverter()
+
+    assert converter.convert_directory(str(tmp_path / '[Author] Title'), str(tmp_path / 'out'))
+    assert (tmp_path / 'out' / 'book.txt').read_text(encoding='utf-8') == 'Chapter one.'
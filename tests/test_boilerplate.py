@@ -0,0 +1,87 @@
+"""
+Tests for header, footer and page-number removal
+"""
+
+from core.boilerplate import MIN_PAGES, BoilerplateFilter
+from core.text_segment import TextSegment
+
+BODY = [
+    "The committee met on Tuesday to review the budget for the coming year.",
+    "Several members asked for a clearer breakdown of the maintenance costs.",
+    "A revised proposal will be circulated before the next regular meeting.",
+    "Questions about the schedule should be sent to the secretary in writing.",
+    "Volunteers are still needed for the spring cleanup of the river path.",
+    "The library extends its opening hours during the examination period.",
+    "Parking near the town hall will be limited while the roof is repaired.",
+    "Residents praised the new bus route that connects the two villages.",
+]
+
+
+def _page(number, *lines):
+    return TextSegment('page', number, f"Page {number}", '\n'.join(lines))
+
+
+def _filtered(pages, **kwargs):
+    return [page.text.split('\n') for page in BoilerplateFilter(**kwargs).filter_pages(pages)]
+
+
+def test_exact_header_and_footer_are_removed():
+    pages = [_page(number, "ANNUAL REPORT 2023", BODY[number % len(BODY)], "Confidential - do not share")
+             for number in range(1, 11)]
+
+    for number, lines in enumerate(_filtered(pages), 1):
+        assert lines == [BODY[number % len(BODY)]]
+
+
+def test_page_numbers_are_removed():
+    pages = [_page(number, BODY[number % len(BODY)], f"Page {number} of 10") for number in range(1, 11)]
+
+    assert all(lines == [BODY[number % len(BODY)]] for number, lines in enumerate(_filtered(pages), 1))
+
+
+def test_running_header_with_varying_title_is_removed():
+    titles = ["Introduction", "Early history", "The river trade", "Growth of the town", "Modern times"]
+    pages = [_page(number, f"The Story of Millbrook - {titles[number % len(titles)]} - {number}",
+                   BODY[number % len(BODY)])
+             for number in range(1, 13)]
+
+    assert all(lines == [BODY[number % len(BODY)]] for number, lines in enumerate(_filtered(pages), 1))
+
+
+def test_body_lines_are_kept():
+    pages = [_page(number, BODY[number % len(BODY)], BODY[(number + 3) % len(BODY)]) for number in range(1, 11)]
+
+    assert _filtered(pages) == [page.text.split('\n') for page in pages]
+
+
+def test_too_few_pages_are_left_alone():
+    pages = [_page(number, "ANNUAL REPORT 2023", BODY[number]) for number in range(1, MIN_PAGES)]
+
+    assert _filtered(pages) == [page.text.split('\n') for page in pages]
+
+
+def test_filter_streams_with_small_window():
+    pages = [_page(number, "ANNUAL REPORT 2023", BODY[number % len(BODY)]) for number in range(1, 41)]
+    boilerplate = BoilerplateFilter(window_size=4)
+
+    output = list(boilerplate.filter_pages(iter(pages)))
+    assert [page.index for page in output] == list(range(1, 41))
+    assert all(page.text == BODY[page.index % len(BODY)] for page in output)
+    assert boilerplate.lines_removed == 40
+
+
+def test_roman_page_numbers_after_page_are_removed():
+    pages = [_page(number, BODY[number % len(BODY)], f"Page {roman}")
+             for number, roman in enumerate(["i", "ii", "iii", "iv", "v", "vi", "vii", "viii"], 1)]
+
+    assert all(lines == [BODY[number % len(BODY)]] for number, lines in enumerate(_filtered(pages), 1))
+
+
+def test_short_edge_lines_that_differ_are_kept():
+    # Words that read as roman numerals, and short closing lines sharing most of their letters
+    first_lines = ["I", "V", "XI", "Mix", "C"]
+    last_lines = ["of the river.", "by the river.", "over the river.", "on the river path.", "near the river."]
+    pages = [_page(number, first_lines[number % 5], BODY[number % len(BODY)], last_lines[number % 5])
+             for number in range(1, 11)]
+
+    assert _filtered(pages) == [page.text.split('\n') for page in pages]
@@ -0,0 +1,52 @@
+"""
+Tests for splitting extracted text into chunks
+"""
+
+from core.chunker import iter_chunks
+from core.text_segment import TextSegment
+
+
+def _pages(*texts):
+    return [TextSegment('page', number, f"Page {number}", text) for number, text in enumerate(texts, 1)]
+
+
+def test_small_document_is_one_chunk():
+    chunks = list(iter_chunks(_pages('First page.', 'Second page.'), size=100, overlap=10))
+
+    assert len(chunks) == 1
+    assert chunks[0].text == 'First page.\n\nSecond page.'
+    assert (chunks[0].number, chunks[0].kind, chunks[0].first, chunks[0].last) == (0, 'page', 1, 2)
+    assert chunks[0].labels == ('Page 1', 'Page 2')
+
+
+def test_chunks_respect_size_and_cover_text():
+    text = ' '.join(f"Sentence number {number} ends here." for number in range(200))
+    chunks = list(iter_chunks(_pages(text), size=300, overlap=0))
+
+    assert len(chunks) > 1
+    assert all(len(chunk.text) <= 300 for chunk in chunks)
+    assert [chunk.number for chunk in chunks] == list(range(len(chunks)))
+    assert ''.join(chunk.text for chunk in chunks).replace(' ', '') == text.replace(' ', '')
+
+
+def test_chunks_end_at_sentences():
+    text = ' '.join(f"Sentence number {number} ends here." for number in range(200))
+    chunks = list(iter_chunks(_pages(text), size=300, overlap=0))
+
+    assert all(chunk.text.rstrip().endswith('.') for chunk in chunks)
+
+
+def test_overlap_repeats_end_of_previous_chunk():
+    text = 'x' * 1000
+    chunks = list(iter_chunks(_pages(text), size=100, overlap=20, sentences=False))
+
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert chunk.text.startswith(previous.text[-20:])
+
+
+def test_chunk_records_the_pages_it_overlaps():
+    chunks = list(iter_chunks(_pages('a' * 80, 'b' * 80, 'c' * 80), size=100, overlap=0, sentences=False))
+
+    assert (chunks[0].first, chunks[0].last) == (1, 2)
+    assert (chunks[-1].first, chunks[-1].last) == (3, 3)
+    assert chunks[-1].labels == ('Page 3',)
@@ -0,0 +1,37 @@
+"""
+Tests for building the converter from the settings file
+"""
+
+import json
+
+from cli.commands import create_converter
+from config.settings import Settings
+
+
+def _settings(tmp_path, **values):
+    config_file = tmp_path / 'config.json'
+    config_file.write_text(json.dumps(values), encoding='utf-8')
+    return Settings(str(config_file))
+
+
+def test_page_range_from_settings(tmp_path):
+    converter = create_converter(_settings(tmp_path, page_range='2-5'))
+
+    assert converter.page_range == (2, 5)
+
+
+def test_invalid_page_range_in_settings_is_ignored(tmp_path):
+    converter = create_converter(_settings(tmp_path, page_range='9-2'))
+
+    assert converter.page_range is None
+
+
+def test_invalid_page_range_is_ignored_by_the_settings_helper(tmp_path):
+    settings = _settings(tmp_path, page_range='abc')
+
+    assert settings.get_parsed_page_range() is None
+    assert settings.get_page_range() == 'abc'
+
+
+def test_workers_default_to_sequential(tmp_path):
+    assert create_converter(_settings(tmp_path)).max_workers == 1
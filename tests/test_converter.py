@@ -0,0 +1,106 @@
+"""
+Tests for converting files and batches with a shared converter
+"""
+
+import threading
+
+import pytest
+
+from core import converter as converter_module
+from core.converter import DocumentToTxtConverter
+from core.text_segment import TextSegment
+
+
+def test_jobs_keep_their_own_options_and_statistics(make_pdf, tmp_path):
+    pdf = make_pdf('report.pdf', [[f"Page {number} of the report."] for number in range(1, 7)])
+    converter = DocumentToTxtConverter()
+    jobs = [converter.new_job(page_range=(number, number)) for number in range(1, 7)]
+    barrier = threading.Barrier(len(jobs))
+    results = {}
+
+    def convert(number, job):
+        barrier.wait()
+        results[number] = converter.convert_file(str(pdf), str(tmp_path / f"out{number}"), job=job)
+
+    threads = [threading.Thread(target=convert, args=(number, job)) for number, job in enumerate(jobs, 1)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert all(results.values()) and len(results) == 6
+    for number, job in enumerate(jobs, 1):
+        assert job.get_statistics()['pages'] == 1
+        assert (tmp_path / f"out{number}" / 'report.txt').read_text(encoding='utf-8') == f"Page {number} of the report."
+    # The converter's own settings are untouched by the jobs
+    assert converter.page_range is None
+
+
+def test_new_job_snapshots_the_settings():
+    converter = DocumentToTxtConverter()
+    job = converter.new_job()
+    converter.skip_existing = False
+
+    assert job.options.skip_existing is True
+    assert converter.new_job(pdf_layout=True).options.pdf_layout is True
+
+
+def test_worker_processes_write_the_same_output(make_pdf, tmp_path):
+    make_pdf('in/long.pdf', [[f"Page {number} of the long report."] for number in range(1, 61)])
+    make_pdf('in/short.pdf', [["A short note."]])
+    converter = DocumentToTxtConverter()
+    sequential = converter.new_job(low_memory=True)
+    parallel = converter.new_job(low_memory=True, max_workers=2)
+
+    assert converter.convert_directory(str(tmp_path / 'in'), str(tmp_path / 'seq'), job=sequential)
+    assert converter.convert_directory(str(tmp_path / 'in'), str(tmp_path / 'par'), job=parallel)
+
+    for name in ('long.txt', 'short.txt'):
+        expected = (tmp_path / 'seq' / name).read_text(encoding='utf-8')
+        assert (tmp_path / 'par' / name).read_text(encoding='utf-8') == expected
+    assert parallel.get_statistics()['pages'] == 61
+
+
+@pytest.mark.parametrize('name', ['report.pdf', 'book.epub'])
+def test_peak_memory_is_recorded_for_every_file_type(name, make_pdf, make_epub, tmp_path, monkeypatch):
+    if name.endswith('.pdf'):
+        document = make_pdf(name, [["Some text."]])
+    else:
+        document = make_epub(name, [('a.xhtml', '<p>Some text.</p>')])
+    converter = DocumentToTxtConverter()
+    job = converter.new_job()
+    monkeypatch.setattr(converter_module, 'get_rss_bytes', lambda: 10 ** 12)
+
+    assert converter.convert_file(str(document), str(tmp_path / 'out'), job=job)
+    assert job.get_statistics()['peak_rss_bytes'] == 10 ** 12
+
+
+def test_failed_extraction_leaves_no_partial_output(make_pdf, tmp_path, monkeypatch):
+    pdf = make_pdf('report.pdf', [["First page."], ["Second page."]])
+    converter = DocumentToTxtConverter()
+
+    def failing_segments(*args, **kwargs):
+        yield TextSegment('page', 1, '1', 'First page.')
+        raise RuntimeError('extraction failed')
+
+    monkeypatch.setattr(converter, 'iter_segments', failing_segments)
+    assert not converter.convert_file(str(pdf), str(tmp_path / 'out'))
+    assert list((tmp_path / 'out').iterdir()) == []
+
+    # The next run converts the file instead of skipping a truncated output
+    monkeypatch.undo()
+    assert converter.convert_file(str(pdf), str(tmp_path / 'out'))
+    assert converter.get_statistics()['skipped'] == 0
+    assert (tmp_path / 'out' / 'report.txt').read_text(encoding='utf-8') == 'First page.\n\nSecond page.'
+
+
+def test_split_output_size_is_the_size_of_its_files(make_pdf, tmp_path):
+    pdf = make_pdf('report.pdf', [[f"Page {number} of the report."] for number in range(1, 7)])
+    converter = DocumentToTxtConverter()
+    job = converter.new_job(output_format='split', split_pages=2)
+
+    assert converter.convert_file(str(pdf), str(tmp_path / 'out'), job=job)
+
+    files = list((tmp_path / 'out' / 'report').iterdir())
+    assert len(files) == 4
+    assert job.get_statistics()['bytes_out'] == sum(path.stat().st_size for path in files)
@@ -0,0 +1,81 @@
+"""
+Tests for detecting identical input files
+"""
+
+import pytest
+
+from core import dedupe
+from core.converter import DocumentToTxtConverter
+from core.dedupe import find_duplicate_groups
+
+
+@pytest.fixture
+def hashes(monkeypatch):
+    """Record the files each hashing stage reads"""
+    calls = {'partial': [], 'full': []}
+    partial_hash = dedupe._partial_hash
+    full_hash = dedupe._full_hash
+
+    def record_partial(path, size):
+        calls['partial'].append(path.name)
+        return partial_hash(path, size)
+
+    def record_full(path):
+        calls['full'].append(path.name)
+        return full_hash(path)
+
+    monkeypatch.setattr(dedupe, 'PARTIAL_HASH_BYTES', 16)
+    monkeypatch.setattr(dedupe, '_partial_hash', record_partial)
+    monkeypatch.setattr(dedupe, '_full_hash', record_full)
+    return calls
+
+
+def _write(tmp_path, name, data):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return path
+
+
+def test_files_of_different_sizes_are_never_read(tmp_path, hashes):
+    files = [_write(tmp_path, 'a.pdf', b'a' * 10), _write(tmp_path, 'b.pdf', b'a' * 11)]
+
+    assert find_duplicate_groups(files) == []
+    assert hashes == {'partial': [], 'full': []}
+
+
+def test_different_ends_are_told_apart_by_the_partial_hash(tmp_path, hashes):
+    files = [_write(tmp_path, 'a.pdf', b'head' + b'x' * 60), _write(tmp_path, 'b.pdf', b'HEAD' + b'x' * 60)]
+
+    assert find_duplicate_groups(files) == []
+    assert sorted(hashes['partial']) == ['a.pdf', 'b.pdf']
+    assert hashes['full'] == []
+
+
+def test_same_ends_are_compared_in_full(tmp_path, hashes):
+    same = b'h' * 16 + b'middle one' + b't' * 16
+    files = [_write(tmp_path, 'a.pdf', same), _write(tmp_path, 'b.pdf', same),
+             _write(tmp_path, 'c.pdf', same.replace(b'one', b'two'))]
+
+    assert find_duplicate_groups(files) == [[files[0], files[1]]]
+    assert sorted(hashes['full']) == ['a.pdf', 'b.pdf', 'c.pdf']
+
+
+def test_small_files_need_no_full_hash(tmp_path, hashes):
+    files = [_write(tmp_path, 'b.epub', b'tiny'), _write(tmp_path, 'a.epub', b'tiny')]
+
+    assert find_duplicate_groups(files) == [[files[1], files[0]]]
+    assert hashes['full'] == []
+
+
+def test_duplicate_is_extracted_once_and_shares_its_output(make_pdf, tmp_path):
+    original = make_pdf('in/a.pdf', [["Shared text of the book."]])
+    copy = tmp_path / 'in' / 'sub' / 'b.pdf'
+    copy.parent.mkdir()
+    copy.write_bytes(original.read_bytes())
+    converter = DocumentToTxtConverter()
+
+    assert converter.convert_directory(str(tmp_path / 'in'), str(tmp_path / 'out'))
+    statistics = converter.get_statistics()
+    assert (statistics['successful'], statistics['duplicates']) == (2, 1)
+    assert (tmp_path / 'out' / 'sub' / 'b.txt').read_text(encoding='utf-8') == \
+        (tmp_path / 'out' / 'a.txt').read_text(encoding='utf-8')
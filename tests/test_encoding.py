@@ -0,0 +1,62 @@
+"""
+Tests for markup encoding detection
+"""
+
+import codecs
+
+import pytest
+
+from utils.encoding import detect_markup_encoding
+
+
+@pytest.mark.parametrize('bom, expected', [
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+])
+def test_byte_order_mark_wins(bom, expected):
+    data = bom + b'<?xml version="1.0" encoding="big5"?><html/>'
+    assert detect_markup_encoding(data) == expected
+
+
+def test_xml_declaration():
+    assert detect_markup_encoding(b'<?xml version="1.0" encoding="UTF-8"?><html/>') == 'utf-8'
+
+
+def test_meta_charset():
+    data = b'<html><head><meta charset="shift_jis"></head></html>'
+    assert detect_markup_encoding(data) == 'cp932'
+
+
+@pytest.mark.parametrize('declared, expected', [
+    ('Big5', 'cp950'),
+    ('GB2312', 'gb18030'),
+    ('GBK', 'gb18030'),
+    ('US-ASCII', 'utf-8'),
+    ('ISO-8859-1', 'cp1252'),
+])
+def test_declared_charsets_use_superset_codecs(declared, expected):
+    data = f'<?xml version="1.0" encoding="{declared}"?><html/>'.encode('ascii')
+    assert detect_markup_encoding(data) == expected
+
+
+def test_unknown_declaration_is_ignored():
+    assert detect_markup_encoding(b'<?xml version="1.0" encoding="no-such-codec"?><p>ok</p>') == 'utf-8'
+
+
+def test_undeclared_utf8():
+    assert detect_markup_encoding('<p>中文內容</p>'.encode('utf-8')) == 'utf-8'
+
+
+def test_partial_utf8_may_end_inside_a_character():
+    data = '<p>中文內容</p>'.encode('utf-8')[:-6]
+    assert detect_markup_encoding(data, partial=True) == 'utf-8'
+
+
+def test_undeclared_legacy_encoding_decodes():
+    data = ('<p>' + '繁體中文的電子書內容' * 20 + '</p>').encode('big5')
+    encoding = detect_markup_encoding(data)
+
+    assert encoding != 'utf-8'
+    assert '繁體中文' in data.decode(encoding)
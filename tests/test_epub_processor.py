@@ -0,0 +1,97 @@
+"""
+Tests for EPUB text extraction
+"""
+
+import functools
+
+from core import epub_processor
+from core.epub_processor import EpubProcessor
+from core.xhtml_text import iter_text_chunks
+from utils.encoding import iter_decoded_markup
+
+PARTS = [
+    ('part1.xhtml', '<h2 id="ch1">Chapter 1</h2><p>It began.</p><h2 id="ch2">Chapter 2</h2><p>It went on.</p>'),
+    ('part2.xhtml', '<p>Still chapter 2.</p><h2 id="ch3">Chapter 3</h2><p>It ended.</p>'),
+]
+TOC = [('One', 'part1.xhtml#ch1'), ('Two', 'part1.xhtml#ch2'), ('Three', 'part2.xhtml#ch3')]
+
+
+def _segments(epub, **kwargs):
+    return [(segment.kind, segment.index, segment.label, segment.text)
+            for segment in EpubProcessor().iter_segments(str(epub), **kwargs)]
+
+
+def test_content_files_are_segments(make_epub):
+    assert _segments(make_epub('book.epub', PARTS)) == [
+        ('item', 1, 'OEBPS/part1.xhtml', 'Chapter 1\nIt began.\nChapter 2\nIt went on.'),
+        ('item', 2, 'OEBPS/part2.xhtml', 'Still chapter 2.\nChapter 3\nIt ended.'),
+    ]
+
+
+def test_chapters_follow_the_table_of_contents(make_epub):
+    assert _segments(make_epub('book.epub', PARTS, TOC), chapters=True) == [
+        ('chapter', 1, 'One', 'Chapter 1\nIt began.'),
+        ('chapter', 2, 'Two', 'Chapter 2\nIt went on.\n\nStill chapter 2.'),
+        ('chapter', 3, 'Three', 'Chapter 3\nIt ended.'),
+    ]
+
+
+def test_text_before_the_first_chapter_is_chapter_zero(make_epub):
+    epub = make_epub('book.epub', [('cover.xhtml', '<p>Title page</p>')] + PARTS, TOC)
+
+    assert _segments(epub, chapters=True)[0] == ('chapter', 0, 'OEBPS/cover.xhtml', 'Title page')
+
+
+def test_without_table_of_contents_chapters_are_content_files(make_epub):
+    assert [kind for kind, *_ in _segments(make_epub('book.epub', PARTS), chapters=True)] == ['item', 'item']
+
+
+def test_image_only_pages_are_skipped_without_parsing(make_epub, monkeypatch):
+    parsed = []
+    beautiful_soup = epub_processor.BeautifulSoup
+    monkeypatch.setattr(epub_processor, 'BeautifulSoup',
+                        lambda markup, *args: parsed.append(markup) or beautiful_soup(markup, *args))
+    epub = make_epub('comic.epub', [('p1.xhtml', '<div><img src="p1.jpg" alt=""/></div>'),
+                                    ('p2.xhtml', '<p>Afterword</p>'),
+                                    ('p3.xhtml', '<svg><image href="p3.jpg"/></svg>')])
+    stats = {}
+
+    assert _segments(epub, stats=stats) == [('item', 2, 'OEBPS/p2.xhtml', 'Afterword')]
+    assert stats['image_pages_skipped'] == 2
+    assert stats['pages'] == 3
+    assert len(parsed) == 1
+
+
+def test_drm_protected_epub_is_not_read(make_epub):
+    epub = make_epub('drm.epub', PARTS, extra=[('META-INF/rights.xml', b'<rights/>')])
+    stats = {}
+
+    assert _segments(epub, stats=stats) == []
+    assert stats == {'reason': 'drm'}
+
+
+def test_obfuscated_fonts_are_not_drm(make_epub):
+    encryption = (b'<encryption xmlns="urn:oasis:names:tc:opendocument:xmlns:container" '
+                  b'xmlns:enc="http://www.w3.org/2001/04/xmlenc#"><enc:EncryptedData>'
+                  b'<enc:EncryptionMethod Algorithm="http://www.idpf.org/2008/embedding"/>'
+                  b'</enc:EncryptedData></encryption>')
+    epub = make_epub('fonts.epub', PARTS, extra=[('META-INF/encryption.xml', encryption)])
+    stats = {}
+
+    assert len(_segments(epub, stats=stats)) == 2
+    assert 'reason' not in stats
+
+
+def test_huge_content_files_are_streamed_with_the_same_text(make_epub, monkeypatch):
+    paragraphs = ''.join(f'<p>Paragraph {number} of a very long chapter.</p>' for number in range(400))
+    epub = make_epub('huge.epub', [('intro.xhtml', '<p>Intro</p>'), ('long.xhtml', paragraphs)])
+    whole = EpubProcessor().extract_text(str(epub))
+
+    monkeypatch.setattr(epub_processor, 'STREAM_MIN_BYTES', 1000)
+    monkeypatch.setattr(epub_processor, 'iter_decoded_markup', functools.partial(iter_decoded_markup, chunk_size=512))
+    monkeypatch.setattr(epub_processor, 'iter_text_chunks', functools.partial(iter_text_chunks, chunk_chars=2000))
+    segments = list(EpubProcessor().iter_segments(str(epub)))
+
+    assert len(segments) > 3
+    assert [segment.continued for segment in segments[1:]] == [False] + [True] * (len(segments) - 2)
+    assert EpubProcessor().extract_text(str(epub)) == whole
@@ -0,0 +1,93 @@
+"""
+Tests for the conversion service's upload handling
+"""
+
+import http.client
+import json
+import socket
+import tempfile
+import threading
+from urllib.parse import quote
+
+import pytest
+
+from core.converter import DocumentToTxtConverter
+from server.http_server import ConversionServer
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    monkeypatch.setattr(tempfile, 'tempdir', str(tmp_path))
+    service = ConversionServer(DocumentToTxtConverter(), port=0, max_upload_bytes=1024)
+    thread = threading.Thread(target=service.serve_forever, daemon=True)
+    thread.start()
+    yield service
+    service.shutdown()
+    thread.join(timeout=5)
+
+
+def _post(server, target, headers, body):
+    host, port = server.httpd.server_address[:2]
+    request = f"POST {target} HTTP/1.1\r\nHost: {host}\r\n"
+    request += ''.join(f"{name}: {value}\r\n" for name, value in headers.items()) + "\r\n"
+    with socket.create_connection((host, port), timeout=10) as connection:
+        connection.sendall(request.encode('ascii') + body)
+        connection.shutdown(socket.SHUT_WR)
+        response = b''
+        while True:
+            data = connection.recv(65536)
+            if not data:
+                break
+            response += data
+    head, _, payload = response.partition(b'\r\n\r\n')
+    return int(head.split()[1]), json.loads(payload or b'{}')
+
+
+def test_truncated_upload_is_rejected_and_deleted(server, tmp_path):
+    status, payload = _post(server, '/convert?type=pdf', {'Content-Length': 500}, b'%PDF-1.4' + b'x' * 92)
+
+    assert status == 400
+    assert '100 of 500 bytes' in payload['error']
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_oversized_upload_is_refused(server, tmp_path):
+    status, _ = _post(server, '/convert?type=pdf', {'Content-Length': 4096}, b'')
+
+    assert status == 413
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_upload_needs_a_type(server):
+    status, _ = _post(server, '/convert', {'Content-Length': 4}, b'data')
+
+    assert status == 415
+
+
+def test_failed_conversion_deletes_the_upload(server, tmp_path):
+    status, _ = _post(server, '/convert?type=pdf', {'Content-Length': 12}, b'not a pdf!!!')
+
+    assert status == 422
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_unused_body_of_a_path_request_is_drained(make_pdf, tmp_path):
+    pdf = make_pdf('books/report.pdf', [["Quarterly figures."]])
+    service = ConversionServer(DocumentToTxtConverter(), port=0, allowed_roots=[str(tmp_path / 'books')])
+    thread = threading.Thread(target=service.serve_forever, daemon=True)
+    thread.start()
+    host, port = service.httpd.server_address[:2]
+    connection = http.client.HTTPConnection(host, port, timeout=10)
+    try:
+        connection.request('POST', f"/convert?path={quote(str(pdf))}", body=b'ignored body')
+        response = connection.getresponse()
+        assert (response.status, response.read()) == (200, b'Quarterly figures.')
+
+        # The next request on the same connection is not corrupted by the unread body
+        connection.request('GET', '/health')
+        response = connection.getresponse()
+        assert (response.status, json.loads(response.read())) == (200, {'status': 'ok'})
+    finally:
+        connection.close()
+        service.shutdown()
+        thread.join(timeout=5)
@@ -0,0 +1,64 @@
+"""
+Tests for the live metrics of a running conversion
+"""
+
+import queue
+import time
+
+import pytest
+
+from core.metrics import LOCAL_WORKER, JobMetrics
+from core.results import STATUS_CONVERTED, STATUS_DUPLICATE, STATUS_SKIPPED, ResultTable
+
+
+def test_pages_of_running_files_are_counted_live():
+    metrics = JobMetrics()
+    stats = {'pages': 0}
+    metrics.start('a.pdf', stats)
+    stats['pages'] = 7
+
+    snapshot = metrics.snapshot(ResultTable(), 3)
+
+    assert snapshot['pages'] == 7
+    assert [(activity.worker, activity.file_path) for activity in snapshot['workers']] == [(LOCAL_WORKER, 'a.pdf')]
+    assert snapshot['eta_seconds'] is None
+
+
+def test_finished_files_leave_the_workers_and_drive_the_eta():
+    metrics = JobMetrics()
+    metrics.started -= 10.0
+    results = ResultTable()
+    for name, status in [('a.pdf', STATUS_CONVERTED), ('b.pdf', STATUS_SKIPPED), ('c.pdf', STATUS_DUPLICATE)]:
+        metrics.start(name, {'pages': 0})
+        metrics.finish(name)
+        results.append(name, status, pages=2)
+
+    snapshot = metrics.snapshot(results, 6)
+
+    assert snapshot['workers'] == []
+    assert (snapshot['done_files'], snapshot['pages']) == (3, 6)
+    assert snapshot['files_per_second'] == pytest.approx(0.3, rel=0.05)
+    assert snapshot['eta_seconds'] == pytest.approx(10.0, rel=0.05)
+    assert snapshot['cache_hit_rate'] == pytest.approx(2 / 3)
+
+
+def test_closed_job_has_no_eta_left():
+    metrics = JobMetrics()
+    metrics.close()
+
+    assert metrics.snapshot(ResultTable(), 1)['eta_seconds'] == 0.0
+
+
+def test_worker_process_starts_arrive_as_events():
+    metrics = JobMetrics()
+    events = queue.Queue()
+    metrics.attach_events(events)
+    events.put((4242, 'big.pdf', 1, 4, time.time()))
+
+    workers = metrics.active()
+    assert [(activity.worker, activity.part, activity.parts) for activity in workers] == [('pid 4242', 1, 4)]
+
+    # A chunk that finishes before its start event is read is not shown afterwards
+    metrics.finish('big.pdf', 2)
+    events.put((4243, 'big.pdf', 2, 4, time.time()))
+    assert [activity.part for activity in metrics.active()] == [1]
@@ -0,0 +1,44 @@
+"""
+Tests for multi-column PDF page layout
+"""
+
+from core.pdf_layout import MIN_COLUMN_LINES, _find_gutters
+
+
+def _word(x0, x1, top):
+    return {'x0': x0, 'x1': x1, 'top': top, 'text': 'word'}
+
+
+def _two_column_lines(count):
+    return [[_word(50, 120, top), _word(130, 280, top), _word(320, 450, top), _word(460, 550, top)]
+            for top in range(0, count * 12, 12)]
+
+
+def test_two_columns_have_one_gutter():
+    gutters = _find_gutters(_two_column_lines(20), 600)
+
+    assert len(gutters) == 1
+    assert 280 <= gutters[0] <= 320
+
+
+def test_single_column_has_no_gutter():
+    lines = [[_word(50, 300, top), _word(305, 550, top)] for top in range(0, 240, 12)]
+
+    assert _find_gutters(lines, 600) == []
+
+
+def test_word_spaces_are_not_gutters():
+    lines = [[_word(x, x + 40, top) for x in range(50, 550, 46)] for top in range(0, 240, 12)]
+
+    assert _find_gutters(lines, 600) == []
+
+
+def test_short_pages_are_not_split():
+    assert _find_gutters(_two_column_lines(MIN_COLUMN_LINES - 1), 600) == []
+
+
+def test_stray_words_in_gutter_are_tolerated():
+    lines = _two_column_lines(30)
+    lines[5].append(_word(290, 310, lines[5][0]['top']))
+
+    assert len(_find_gutters(lines, 600)) == 1
@@ -0,0 +1,56 @@
+"""
+Tests for PDF text extraction
+"""
+
+from core.pdf_processor import PdfProcessor
+
+PAGES = [[f"Page {number} line {line} of the long report." for line in range(3)] for number in range(1, 8)]
+
+
+def test_low_memory_extracts_the_same_text(make_pdf):
+    pdf = make_pdf('report.pdf', PAGES)
+    processor = PdfProcessor()
+
+    assert processor.extract_text(str(pdf), low_memory=True) == processor.extract_text(str(pdf))
+
+
+def test_low_memory_honours_the_page_range(make_pdf):
+    pdf = make_pdf('report.pdf', PAGES)
+    stats = {}
+
+    segments = list(PdfProcessor().iter_segments(str(pdf), low_memory=True, stats=stats, page_range=(3, 5)))
+
+    assert [segment.index for segment in segments] == [3, 4, 5]
+    assert stats['pages'] == 3
+
+
+def test_low_memory_records_peak_memory(make_pdf):
+    stats = {}
+
+    PdfProcessor().extract_text(str(make_pdf('report.pdf', PAGES)), low_memory=True, stats=stats)
+
+    assert stats['peak_rss_bytes'] > 0
+
+
+def test_pypdf2_takes_over_when_pdfplumber_fails_part_way(make_pdf, monkeypatch):
+    pdf = make_pdf('report.pdf', PAGES)
+    processor = PdfProcessor()
+    expected = processor.extract_text(str(pdf))
+    iter_lazy_pages = processor._iter_lazy_pages
+
+    def failing_pages(pdf, selected):
+        for page in iter_lazy_pages(pdf, selected):
+            if page.page_number == 4:
+                raise ValueError("broken page tree")
+            yield page
+
+    monkeypatch.setattr(processor, '_iter_lazy_pages', failing_pages)
+    stats = {}
+    segments = list(processor.iter_segments(str(pdf), low_memory=True, stats=stats))
+
+    assert [segment.index for segment in segments] == list(range(1, 8))
+    assert '\n\n'.join(segment.text for segment in segments) == expected
+    assert stats['pages'] == 7
+    assert stats['pdfplumber_failed_page'] == 4
+    assert stats['pdfplumber_error'] == "broken page tree"
+    assert stats['backend'] == 'pdfplumber+PyPDF2'
@@ -0,0 +1,70 @@
+"""
+Tests for probing documents into a conversion plan
+"""
+
+import io
+from pathlib import Path
+
+import PyPDF2
+
+from core.probe import ROUTE_EXTRACT, ROUTE_OCR, ROUTE_SKIP, DocumentProber, load_plan
+
+TEXT_PAGE = ["A page of the report with enough text to count as a text layer."]
+
+
+def _encrypt(pdf_path):
+    writer = PyPDF2.PdfWriter()
+    for page in PyPDF2.PdfReader(str(pdf_path)).pages:
+        writer.add_page(page)
+    writer.encrypt('secret')
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    pdf_path.write_bytes(buffer.getvalue())
+    return pdf_path
+
+
+def test_text_pdf_is_extracted(make_pdf):
+    record = DocumentProber().probe_file(make_pdf('report.pdf', [TEXT_PAGE] * 4))
+
+    assert (record['route'], record['pages'], record['has_text_layer']) == (ROUTE_EXTRACT, 4, True)
+    assert record['estimated_chars'] == 4 * len(TEXT_PAGE[0])
+
+
+def test_image_only_pdf_is_sent_to_ocr(make_pdf):
+    record = DocumentProber().probe_file(make_pdf('scan.pdf', [[], [], []]))
+
+    assert (record['route'], record['reason'], record['has_text_layer']) == (ROUTE_OCR, 'no text layer', False)
+
+
+def test_encrypted_pdf_is_skipped(make_pdf):
+    record = DocumentProber().probe_file(_encrypt(make_pdf('locked.pdf', [TEXT_PAGE])))
+
+    assert (record['route'], record['reason'], record['encrypted']) == (ROUTE_SKIP, 'encrypted', True)
+
+
+def test_drm_epub_is_skipped(make_epub):
+    epub = make_epub('drm.epub', [('c1.xhtml', '<p>Scrambled</p>')], extra=[('META-INF/rights.xml', b'<rights/>')])
+
+    record = DocumentProber().probe_file(epub)
+
+    assert (record['route'], record['reason'], record['encrypted']) == (ROUTE_SKIP, 'encrypted', True)
+
+
+def test_image_only_epub_is_sent_to_ocr(make_epub):
+    epub = make_epub('comic.epub', [(f'p{number}.xhtml', '<img src="p.jpg"/>') for number in range(3)])
+
+    assert DocumentProber().probe_file(epub)['route'] == ROUTE_OCR
+
+
+def test_plan_lists_largest_first_and_round_trips(make_pdf, make_epub, tmp_path):
+    make_pdf('in/short.pdf', [TEXT_PAGE])
+    make_pdf('in/long.pdf', [TEXT_PAGE] * 5)
+    make_epub('in/book.epub', [('c1.xhtml', '<p>Tiny</p>')])
+    prober = DocumentProber()
+
+    plan = prober.build_plan(tmp_path / 'in')
+    assert [Path(record['path']).name for record in plan['files']] == ['long.pdf', 'short.pdf', 'book.epub']
+    assert plan['summary']['routes'] == {ROUTE_EXTRACT: 3, ROUTE_OCR: 0, ROUTE_SKIP: 0}
+
+    assert prober.write_plan(plan, tmp_path / 'plan.json')
+    assert load_plan(tmp_path / 'plan.json') == plan
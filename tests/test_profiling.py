@@ -0,0 +1,53 @@
+"""
+Tests for profiling the slowest documents
+"""
+
+import json
+import marshal
+
+from core.profiling import PROFILE_CPROFILE, PROFILE_SAMPLE, PROFILES_DIR, DocumentProfiler, merge_profile
+
+SAMPLE = {(('extract', 'pdf.py', 10),): 3}
+
+
+def test_only_the_slowest_documents_are_kept(tmp_path):
+    profiler = DocumentProfiler(PROFILE_SAMPLE, top=2)
+    for name, seconds in [('a.pdf', 1.0), ('b.pdf', 3.0), ('c.pdf', 2.0), ('d.pdf', 0.5)]:
+        profiler.offer(name, seconds, SAMPLE)
+
+    written = profiler.write(tmp_path)
+
+    assert list(written) == ['b.pdf', 'c.pdf']
+    assert all(path.parent == tmp_path / PROFILES_DIR for path in written.values())
+    speedscope = json.loads(written['b.pdf'].read_text(encoding='utf-8'))
+    assert speedscope['shared']['frames'] == [{'name': 'extract', 'file': 'pdf.py', 'line': 10}]
+    assert speedscope['profiles'][0]['samples'] == [[0]]
+
+
+def test_documents_over_the_threshold_are_kept_whatever_their_rank(tmp_path):
+    profiler = DocumentProfiler(PROFILE_SAMPLE, top=1, threshold=2.0)
+    for name, seconds in [('slow.pdf', 2.5), ('slower.pdf', 4.0), ('fast.pdf', 0.1)]:
+        profiler.offer(name, seconds, SAMPLE)
+
+    assert list(profiler.write(tmp_path)) == ['slower.pdf', 'slow.pdf']
+
+
+def test_cprofile_profiles_are_written_as_prof_files(tmp_path):
+    profiler = DocumentProfiler(PROFILE_CPROFILE, top=1)
+    with profiler.document('book.epub'):
+        sum(range(1000))
+
+    written = profiler.write(tmp_path)
+
+    assert written['book.epub'].suffix == '.prof'
+    with open(written['book.epub'], 'rb') as f:
+        assert marshal.load(f)
+
+
+def test_sample_profiles_of_chunks_are_added_up():
+    total = {}
+    merge_profile(PROFILE_SAMPLE, total, SAMPLE)
+    merge_profile(PROFILE_SAMPLE, total, SAMPLE)
+
+    assert total == {(('extract', 'pdf.py', 10),): 6}
+
@@ -0,0 +1,51 @@
+"""
+Tests for the per-file result table
+"""
+
+import pickle
+
+from core.results import (REASON_DRM, REASON_ENCRYPTED, STATUS_CONVERTED, STATUS_DUPLICATE, STATUS_FAILED,
+                          STATUS_SKIPPED, ResultTable)
+
+
+def _table():
+    table = ResultTable()
+    table.append('a.pdf', STATUS_CONVERTED, 1.5, bytes_in=100, bytes_out=40, pages=3, backend='pdfplumber')
+    table.append('b.epub', STATUS_SKIPPED, 0.25, bytes_in=200, bytes_out=80)
+    table.append('c.epub', STATUS_DUPLICATE, bytes_in=200, bytes_out=80)
+    table.append('d.pdf', STATUS_FAILED, 4.0, bytes_in=50, reason=REASON_ENCRYPTED)
+    return table
+
+
+def test_records_round_trip():
+    record = _table().get(0)
+
+    assert (record.path, record.status, record.pages, record.backend) == ('a.pdf', STATUS_CONVERTED, 3, 'pdfplumber')
+    assert record.duration == 1.5
+    assert _table().get(3).reason == REASON_ENCRYPTED
+
+
+def test_summary_counts_reused_outputs_as_successful():
+    summary = _table().summary()
+
+    assert (summary['successful'], summary['failed'], summary['protected']) == (3, 1, 1)
+    assert (summary['skipped'], summary['duplicates'], summary['pages']) == (1, 1, 3)
+    assert (summary['bytes_in'], summary['bytes_out'], summary['seconds']) == (550, 200, 5.75)
+
+
+def test_slowest_and_find():
+    table = _table()
+    table.append('a.pdf', STATUS_FAILED, 0.5, reason=REASON_DRM)
+
+    assert [record.path for record in table.slowest(2)] == ['d.pdf', 'a.pdf']
+    assert table.find('a.pdf').status == STATUS_FAILED
+    assert table.find('missing.pdf') is None
+
+
+def test_tables_pickle_and_merge():
+    table = _table()
+    table.merge(pickle.loads(pickle.dumps(_table())))
+
+    assert len(table) == 8
+    assert table.count(STATUS_CONVERTED) == 2
+    assert [record.path for record in table][4:] == ['a.pdf', 'b.epub', 'c.epub', 'd.pdf']
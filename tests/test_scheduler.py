@@ -0,0 +1,56 @@
+"""
+Tests for planning extraction jobs over worker processes
+"""
+
+from pathlib import Path
+
+from core.converter import DocumentToTxtConverter
+from core.job import ConversionOptions
+from core.scheduler import MIN_CHUNK_PAGES, plan_jobs
+
+
+def test_jobs_are_planned_longest_first():
+    costs = {Path('a.pdf'): 10, Path('b.epub'): 50, Path('c.pdf'): 30}
+    jobs = plan_jobs(costs, 2, {})
+
+    assert [job.file_path for job in jobs] == [Path('b.epub'), Path('c.pdf'), Path('a.pdf')]
+    assert all(job.page_range is None and job.parts == 1 for job in jobs)
+
+
+def test_costly_pdf_is_split_into_contiguous_chunks():
+    big = Path('big.pdf')
+    costs = {big: 100, Path('a.pdf'): 10, Path('b.pdf'): 10}
+    jobs = plan_jobs(costs, 2, {big: 100})
+
+    chunks = sorted((job for job in jobs if job.file_path == big), key=lambda job: job.part)
+    assert len(chunks) == 4
+    assert all(chunk.parts == 4 for chunk in chunks)
+    assert [chunk.page_range for chunk in chunks] == [(1, 25), (26, 50), (51, 75), (76, 100)]
+    assert sum(chunk.cost for chunk in chunks) == 100
+
+
+def test_chunks_keep_a_minimum_page_count():
+    big = Path('big.pdf')
+    jobs = plan_jobs({big: 1000, Path('a.pdf'): 1}, 8, {big: MIN_CHUNK_PAGES * 2})
+
+    assert len([job for job in jobs if job.file_path == big]) == 2
+
+
+def test_single_worker_never_splits():
+    big = Path('big.pdf')
+    jobs = plan_jobs({big: 1000}, 1, {big: 500})
+
+    assert len(jobs) == 1
+    assert jobs[0].page_range is None
+
+
+def test_boilerplate_stripping_keeps_pdfs_whole():
+    converter = DocumentToTxtConverter()
+    big = Path('big.pdf')
+    costs = {big: 1000, Path('a.pdf'): 1}
+    plan = {'files': [{'path': str(big), 'pages': 400}]}
+    options = ConversionOptions(max_workers=4)
+
+    assert converter._splittable_page_counts(options, costs, plan) == {big: 400}
+    assert converter._splittable_page_counts(options._replace(strip_boilerplate=True), costs, plan) == {}
+    assert converter._splittable_page_counts(options._replace(max_workers=1), costs, plan) == {}
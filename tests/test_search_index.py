@@ -0,0 +1,111 @@
+"""
+Tests for the full-text search index
+"""
+
+import io
+import json
+
+import pytest
+
+from core.converter import DocumentToTxtConverter
+from core.search_index import SearchIndex, join_segments, split_segments
+from core.text_segment import TextSegment
+
+SEGMENTS = [
+    TextSegment('page', 1, '1', 'The white whale was seen at dawn.'),
+    TextSegment('page', 2, '2', 'Captain Ahab paced the deck.'),
+    TextSegment('page', 2, '2', 'The harpoons were made ready.', continued=True),
+]
+
+
+@pytest.fixture
+def index(tmp_path):
+    search_index = SearchIndex(str(tmp_path / 'index.db'))
+    yield search_index
+    search_index.close()
+
+
+def test_segments_round_trip_through_joined_text():
+    text, spans = join_segments(SEGMENTS)
+
+    assert text == ('The white whale was seen at dawn.\n\nCaptain Ahab paced the deck.\n'
+                    'The harpoons were made ready.')
+    assert list(split_segments(text, spans)) == SEGMENTS
+
+
+def test_search_finds_the_matching_segment(index):
+    text, spans = join_segments(SEGMENTS)
+    assert index.add_document('moby.pdf', 'moby.txt', text, spans)
+
+    hits = index.search('ahab')
+
+    assert len(hits) == 1
+    hit = hits[0]
+    assert (hit.path, hit.output, hit.kind, hit.index) == ('moby.pdf', 'moby.txt', 'page', 2)
+    assert text[hit.start:hit.end] == 'Captain Ahab paced the deck.'
+    assert '[Ahab]' in hit.snippet
+
+
+def test_document_can_be_indexed_from_a_file(index):
+    text, spans = join_segments(SEGMENTS)
+    index.add_document('moby.pdf', 'moby.txt', io.StringIO(text), spans)
+
+    assert sorted(hit.index for hit in index.search('"white whale" OR harpoons')) == [1, 2]
+
+
+def test_reindexing_replaces_the_document(index):
+    text, spans = join_segments(SEGMENTS)
+    index.add_document('moby.pdf', 'moby.txt', text, spans)
+    index.add_document('moby.pdf', 'moby.txt', *join_segments([TextSegment('page', 1, '1', 'Call me Ishmael.')]))
+
+    assert index.search('whale') == []
+    assert index.get_statistics() == {'documents': 1, 'segments': 1}
+
+
+def test_copy_shares_the_entries_of_an_indexed_document(index):
+    index.add_document('moby.pdf', 'moby.txt', *join_segments(SEGMENTS))
+
+    assert index.copy_document('moby.pdf', 'copy.pdf', 'copy.txt')
+    assert not index.copy_document('missing.pdf', 'other.pdf', 'other.txt')
+    assert sorted(hit.path for hit in index.search('whale')) == ['copy.pdf', 'moby.pdf']
+
+
+def test_invalid_query_is_reported(index):
+    with pytest.raises(ValueError):
+        index.search('"unterminated')
+
+
+def test_conversion_adds_documents_to_the_index(make_pdf, tmp_path):
+    pdf = make_pdf('report.pdf', [["Annual budget of the council."], ["The river bridge was repaired."]])
+    converter = DocumentToTxtConverter()
+    converter.index_path = str(tmp_path / 'index.db')
+
+    assert converter.convert_file(str(pdf), str(tmp_path / 'out'))
+
+    index = SearchIndex(converter.index_path)
+    try:
+        hits = index.search('bridge')
+    finally:
+        index.close()
+    output = tmp_path / 'out' / 'report.txt'
+    assert [(hit.path, hit.output, hit.index) for hit in hits] == [(str(pdf), str(output), 2)]
+    # Offsets count characters of the file as written, with untranslated line ends
+    with open(output, encoding='utf-8', newline='') as f:
+        assert f.read()[hits[0].start:hits[0].end] == 'The river bridge was repaired.'
+
+
+def test_split_output_offsets_match_the_parts_of_its_index(make_pdf, tmp_path):
+    pdf = make_pdf('report.pdf', [["Annual budget of the council."], ["The river bridge was repaired."]])
+    converter = DocumentToTxtConverter()
+    job = converter.new_job(index_path=str(tmp_path / 'index.db'), output_format='split', split_pages=1)
+
+    assert converter.convert_file(str(pdf), str(tmp_path / 'out'), job=job)
+
+    index = SearchIndex(str(tmp_path / 'index.db'))
+    try:
+        hits = index.search('bridge')
+    finally:
+        index.close()
+    parts = json.loads((tmp_path / 'out' / 'report' / 'index.json').read_text(encoding='utf-8'))['parts']
+    assert [(hit.output, hit.index) for hit in hits] == [(str(tmp_path / 'out' / 'report'), 2)]
+    assert (hits[0].start, hits[0].end) == (parts[1]['offset'], parts[1]['offset'] + parts[1]['chars'])
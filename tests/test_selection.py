@@ -0,0 +1,38 @@
+"""
+Tests for page range parsing and formatting
+"""
+
+import pytest
+
+from core.selection import format_page_range, parse_page_range, range_indexes
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('', None),
+    ('   ', None),
+    ('5', (5, 5)),
+    ('1-10', (1, 10)),
+    (' 2 - 4 ', (2, 4)),
+    ('20-', (20, None)),
+    ('-3', (1, 3)),
+])
+def test_parse_page_range(value, expected):
+    assert parse_page_range(value) == expected
+
+
+@pytest.mark.parametrize('value', ['0', '0-5', '10-2', 'abc', '1-2-3', '-'])
+def test_parse_page_range_rejects_invalid(value):
+    with pytest.raises(ValueError):
+        parse_page_range(value)
+
+
+@pytest.mark.parametrize('page_range', [(5, 5), (1, 10), (20, None)])
+def test_format_page_range_round_trips(page_range):
+    assert parse_page_range(format_page_range(page_range)) == page_range
+
+
+def test_range_indexes_clamps_to_document():
+    assert range_indexes(None, 4) == range(0, 4)
+    assert range_indexes((2, 3), 10) == range(1, 3)
+    assert range_indexes((8, None), 10) == range(7, 10)
+    assert list(range_indexes((5, 9), 3)) == []
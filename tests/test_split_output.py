@@ -0,0 +1,83 @@
+"""
+Tests for split output: one file per page range or chapter
+"""
+
+import json
+
+from core import split_output
+from core.split_output import SPLIT_INDEX_FILE, iter_parts, part_file_name, write_split
+from core.text_segment import TextSegment, join_text
+from utils.encoding import write_text_file
+
+
+def _pages(*numbers):
+    return [TextSegment('page', number, str(number), f"Text of page {number}.") for number in numbers]
+
+
+def _boundaries(parts):
+    return [(part[0].index, part[-1].index) for part in parts]
+
+
+def test_pages_are_grouped_into_fixed_ranges():
+    parts = list(iter_parts(_pages(*range(1, 26)), pages=10))
+
+    assert _boundaries(parts) == [(1, 10), (11, 20), (21, 25)]
+
+
+def test_ranges_do_not_shift_when_pages_have_no_text():
+    parts = list(iter_parts(_pages(2, 3, 9, 12, 31), pages=10))
+
+    assert _boundaries(parts) == [(2, 9), (12, 12), (31, 31)]
+    assert [part_file_name(part) for part in parts] == ['page-0002-0009.txt', 'page-0012.txt', 'page-0031.txt']
+
+
+def test_each_chapter_is_a_part_however_it_was_streamed():
+    segments = [TextSegment('chapter', 1, 'One', 'Start of one.'),
+                TextSegment('chapter', 1, 'One', 'Rest of one.', continued=True),
+                TextSegment('chapter', 2, 'Two', 'All of two.'),
+                TextSegment('chapter', 2, 'Two', '')]
+
+    parts = list(iter_parts(segments))
+
+    assert _boundaries(parts) == [(1, 1), (2, 2)]
+    assert join_text(parts[0]) == 'Start of one.\nRest of one.'
+    assert part_file_name(parts[1]) == 'chapter-0002.txt'
+
+
+def test_index_records_where_each_part_lies_in_the_txt_output(tmp_path):
+    segments = _pages(1, 2, 3, 4, 5)
+    output = tmp_path / 'report'
+
+    assert write_split(output, 'report.pdf', segments, pages=2) == 3
+
+    index = json.loads((output / SPLIT_INDEX_FILE).read_text(encoding='utf-8'))
+    text = join_text(segments)
+    assert (index['source'], index['chars']) == ('report.pdf', len(text))
+    assert [record['file'] for record in index['parts']] == ['page-0001-0002.txt', 'page-0003-0004.txt',
+                                                             'page-0005.txt']
+    for record in index['parts']:
+        part_text = (output / record['file']).read_text(encoding='utf-8')
+        assert text[record['offset']:record['offset'] + record['chars']] == part_text
+    assert not output.with_name('report.part').exists()
+
+
+def test_document_without_text_writes_nothing(tmp_path):
+    assert write_split(tmp_path / 'empty', 'empty.pdf', [TextSegment('page', 1, '1', '')]) == 0
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_parts_are_written_while_they_are_streamed(tmp_path, monkeypatch):
+    consumed = []
+    monkeypatch.setattr(split_output, 'WRITE_QUEUE_SIZE', 1)
+    monkeypatch.setattr(split_output, 'write_text_file', lambda path, pieces, encoding: write_text_file(
+        path, (consumed.append(piece) or piece for piece in pieces), encoding))
+
+    def segments():
+        for number in range(20):
+            # Earlier pieces of the chapter have reached the file before the next one is extracted
+            assert number < 3 or f"Piece {number - 3}." in consumed
+            yield TextSegment('chapter', 1, 'One', f"Piece {number}.", continued=number > 0)
+
+    assert write_split(tmp_path / 'book', 'book.epub', segments()) == 1
+    assert (tmp_path / 'book' / 'chapter-0001.txt').read_text(encoding='utf-8') == '\n'.join(
+        f"Piece {number}." for number in range(20))
@@ -0,0 +1,132 @@
+"""
+Tests for the watch folder's scheduling of conversions and retries
+"""
+
+import time
+from concurrent.futures import Future
+
+import pytest
+
+from core import watcher as watcher_module
+from core.converter import DocumentToTxtConverter
+from core.watcher import MAX_RETRIES, FolderWatcher
+
+SIGNATURE = (1024, 1)
+
+
+@pytest.fixture
+def watcher(tmp_path):
+    return FolderWatcher(DocumentToTxtConverter, str(tmp_path / 'in'), str(tmp_path / 'out'), settle_time=1.0)
+
+
+def _submit(watcher, path, signature, success, reason=''):
+    watcher._in_flight[path] = signature
+    future = Future()
+    future.set_result((success, reason))
+    watcher._finish(path, future)
+
+
+def test_file_is_ready_once_it_settles(watcher):
+    snapshot = {'book.pdf': SIGNATURE}
+
+    assert list(watcher._ready_files(snapshot, 0.0)) == []
+    assert list(watcher._ready_files(snapshot, 0.5)) == []
+    assert list(watcher._ready_files(snapshot, 1.0)) == [('book.pdf', SIGNATURE)]
+
+
+def test_changing_file_restarts_the_settle_timer(watcher):
+    list(watcher._ready_files({'book.pdf': (10, 1)}, 0.0))
+
+    assert list(watcher._ready_files({'book.pdf': (20, 2)}, 1.0)) == []
+    assert list(watcher._ready_files({'book.pdf': (20, 2)}, 2.0)) == [('book.pdf', (20, 2))]
+
+
+def test_converted_file_is_not_converted_again(watcher):
+    _submit(watcher, 'book.pdf', SIGNATURE, True)
+    snapshot = {'book.pdf': SIGNATURE}
+
+    list(watcher._ready_files(snapshot, 0.0))
+    assert list(watcher._ready_files(snapshot, 10.0)) == []
+    assert watcher.stats == {'converted': 1, 'failed': 0}
+
+
+def test_empty_file_waits_for_content(watcher):
+    list(watcher._ready_files({'book.pdf': (0, 1)}, 0.0))
+
+    assert list(watcher._ready_files({'book.pdf': (0, 1)}, 5.0)) == []
+
+
+def test_scan_finds_supported_files_in_subfolders(watcher, tmp_path):
+    (tmp_path / 'in' / 'sub').mkdir(parents=True)
+    (tmp_path / 'in' / 'sub' / 'book.PDF').write_bytes(b'12345')
+    (tmp_path / 'in' / 'notes.txt').write_bytes(b'12345')
+
+    snapshot = watcher.scan()
+
+    assert list(snapshot) == [str(tmp_path / 'in' / 'sub' / 'book.PDF')]
+    assert next(iter(snapshot.values()))[0] == 5
+
+
+def test_failed_file_is_retried_with_growing_delays(watcher, monkeypatch):
+    monkeypatch.setattr(watcher_module, 'RETRY_DELAY', 10.0)
+    snapshot = {'book.pdf': SIGNATURE}
+
+    for failures in range(1, MAX_RETRIES + 1):
+        _submit(watcher, 'book.pdf', SIGNATURE, False)
+        retry_at = watcher._failed['book.pdf'][2]
+        assert watcher._failed['book.pdf'][1] == failures
+        assert retry_at - time.monotonic() == pytest.approx(10.0 * 2 ** (failures - 1), abs=1.0)
+
+        assert list(watcher._ready_files(snapshot, retry_at - 1.0)) == []
+        list(watcher._ready_files(snapshot, retry_at))
+        assert list(watcher._ready_files(snapshot, retry_at + 1.0)) == [('book.pdf', SIGNATURE)]
+
+    # Out of retries: left alone until the file changes
+    _submit(watcher, 'book.pdf', SIGNATURE, False)
+    later = watcher._failed['book.pdf'][2] + 1000.0
+    list(watcher._ready_files(snapshot, later))
+    assert list(watcher._ready_files(snapshot, later + 1.0)) == []
+
+    changed = {'book.pdf': (2048, 2)}
+    list(watcher._ready_files(changed, later))
+    assert list(watcher._ready_files(changed, later + 1.0)) == [('book.pdf', (2048, 2))]
+
+
+def test_success_after_failure_clears_the_retry(watcher):
+    _submit(watcher, 'book.pdf', SIGNATURE, False)
+    _submit(watcher, 'book.pdf', SIGNATURE, True)
+
+    assert 'book.pdf' not in watcher._failed
+    assert watcher._done['book.pdf'] == SIGNATURE
+    assert watcher.stats == {'converted': 1, 'failed': 1}
+
+
+def test_protected_file_is_not_retried_until_it_changes(watcher, make_epub):
+    epub = make_epub('in/drm.epub', [('a.xhtml', '<p>Text</p>')], extra=[('META-INF/rights.xml', b'<rights/>')])
+    path = str(epub)
+    signature = watcher.scan()[path]
+
+    watcher._in_flight[path] = signature
+    future = Future()
+    future.set_result(watcher._convert(path))
+    watcher._finish(path, future)
+
+    assert future.result() == (False, 'drm')
+    snapshot = {path: signature}
+    later = time.monotonic() + 10000.0
+    list(watcher._ready_files(snapshot, later))
+    assert list(watcher._ready_files(snapshot, later + 1.0)) == []
+
+    changed = {path: (signature[0] + 1, signature[1] + 1)}
+    list(watcher._ready_files(changed, later))
+    assert list(watcher._ready_files(changed, later + 1.0)) == [(path, changed[path])]
+
+
+def test_conversion_error_counts_as_failure(watcher):
+    watcher._in_flight['book.pdf'] = SIGNATURE
+    future = Future()
+    future.set_exception(RuntimeError('broken file'))
+    watcher._finish('book.pdf', future)
+
+    assert watcher._failed['book.pdf'][:2] == (SIGNATURE, 1)
+    assert 'book.pdf' not in watcher._in_flight
@@ -0,0 +1,45 @@
+"""
+Tests for the incremental XHTML text parser
+"""
+
+from core.xhtml_text import iter_text_chunks
+
+DOCUMENT = ('<html><head><title>Skipped</title><style>p { color: red; }</style></head><body>'
+            + ''.join(f'<p id="p{number}">Paragraph   {number} &amp; more <b>bold</b> text.</p>'
+                      for number in range(200))
+            + '<script>var ignored = 1;</script></body></html>')
+
+
+def _pieces(text, size):
+    return [text[start:start + size] for start in range(0, len(text), size)]
+
+
+def test_text_does_not_depend_on_how_the_document_is_cut():
+    whole = '\n'.join(iter_text_chunks([DOCUMENT]))
+
+    for size in (7, 100, 4096):
+        assert '\n'.join(iter_text_chunks(_pieces(DOCUMENT, size))) == whole
+
+
+def test_chunks_end_at_line_boundaries():
+    chunks = list(iter_text_chunks(_pieces(DOCUMENT, 64), chunk_chars=500))
+
+    assert len(chunks) > 5
+    assert all(len(chunk) < 1000 for chunk in chunks)
+    assert [line for chunk in chunks for line in chunk.split('\n')] == '\n'.join(iter_text_chunks([DOCUMENT])).split('\n')
+
+
+def test_scripts_and_styles_are_dropped_and_spaces_collapsed():
+    lines = '\n'.join(iter_text_chunks(_pieces(DOCUMENT, 64))).split('\n')
+
+    assert lines[:4] == ['Skipped', 'Paragraph 0 & more', 'bold', 'text.']
+    assert not any('color' in line or 'ignored' in line for line in lines)
+
+
+def test_anchor_lines_are_emitted_before_their_element():
+    chunks = iter_text_chunks(_pieces(DOCUMENT, 50), anchors={'p3': 'MARK', 'missing': 'LOST'}, starts=['START'])
+    lines = '\n'.join(chunks).split('\n')
+
+    assert lines[0] == 'START'
+    assert lines[lines.index('MARK') + 1].startswith('Paragraph 3 ')
+    assert lines[-1] == 'LOST'